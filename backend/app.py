@@ -5,8 +5,8 @@ os.environ["TF_CPP_MIN_LOG_LEVEL"] = "2"
 
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from typing import Optional, Dict, List, Any
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from typing import Optional, Dict, List, Any, Tuple
 import base64
 from PIL import Image
 import io
@@ -21,19 +21,43 @@ from gensim.models import Word2Vec
 import pickle
 from scipy.spatial.distance import cosine
 from pydantic import BaseModel
-from review_logic import analyze_review_text, compare_images, check_relevance
+from image_fetcher import image_fetcher
+import inference_executor
+from inference_executor import run_cpu, run_io
+from review_logic import analyze_review_texts, compare_images, check_relevance_batch, sentiment_batcher, relevance_batcher
+from micro_batcher import MicroBatcher, batcher_stats
+from result_cache import review_result_cache, review_cache_key
+from embedding_cache import image_embedding_cache
+from model_registry import registry, MODEL_LOADING_MODE
+from image_uploads import (
+    ImageUploadError, save_upload, read_upload, upload_path, upload_media_type, keep_upload, is_upload_ref,
+    evidence_image, sweep_uploads_periodically, UploadLimitExceeded
+)
+from sequence_encoder import SequenceEncoder
+from listing_jobs import ListingJobManager, JobQueueFull
+from event_log import configure_logging, get_event_logger, logging_stats
+from price_model import PriceModel
+from storage import db, encode_cursor, decode_cursor, SEVERITY_RANKS
+from flag_reports import FlagReportManager, REPORT_FIELDS
+from llm_client import LLMClient, LLMUnavailable
+from product_search import ProductSearchIndex, SEARCH_DEFAULT_LIMIT, project
+from listing_sessions import ListingSession, listing_sessions, input_hash, reuse_analysis
+from keyword_rules import (
+    RULE_MATCHER, CATEGORY_KEYWORDS, SUSPICIOUS_BRANDS,
+    COUNTERFEIT_KEYWORDS_TAG, SUSPICIOUS_BRANDS_TAG, category_tag
+)
 from fastapi import APIRouter
 from pydantic import BaseModel as PydanticBaseModel
 import uuid
-import requests
+import time
+import asyncio
 from dotenv import load_dotenv
 
-# Configure logging with more detail
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+# Structured logging through a non-blocking queue, see event_log
+configure_logging()
 logger = logging.getLogger(__name__)
+events = get_event_logger("app")
+monitoring_events = get_event_logger("monitoring")
 
 app = FastAPI()
 
@@ -65,17 +89,8 @@ CATEGORY_PRICE_RANGES = {
     "default": {"min": 1, "max": 20000} # A general fallback for unlisted categories
 }
 
-# Simple keyword matching for category relevance. This helps detect if a product
-# is listed in a completely wrong category, which is a common red flag.
-CATEGORY_KEYWORDS = {
-    "electronics": ["electronic", "phone", "tv", "camera", "computer", "headphone", "cable", "charger", "laptop", "tablet"],
-    "clothing, shoes & jewelry": ["shirt", "pant", "shoe", "dress", "jewelry", "watch", "hat", "sock", "boot", "sandal", "jeans", "coat", "nike", "adidas"],
-    "automotive": ["car", "tire", "motor", "engine", "wheel", "vehicle", "oil", "filter", "brake"],
-    "home & kitchen": ["kitchen", "furniture", "decor", "towel", "pan", "knife", "blender", "sofa", "lamp"],
-    "office products": ["pen", "paper", "desk", "chair", "printer", "stapler", "ink", "toner"],
-    "beauty & personal care": ["lotion", "shampoo", "makeup", "lipstick", "cream", "perfume", "mascara"],
-    "health & household": ["vitamins", "medicine", "cleaner", "soap", "tissue", "supplement"],
-}
+# Learned per-category price bands; CATEGORY_PRICE_RANGES covers categories without enough data
+price_model = PriceModel(CATEGORY_PRICE_RANGES)
 
 # --- ML Model and Authenticity Check Integration ---
 # (Moved from inference_api.py)
@@ -95,7 +110,9 @@ REFERENCE_FEATURES_PATH = os.path.join(MODEL_SAVE_DIR, REFERENCE_FEATURES_FILENA
 
 ml_model = None
 image_feature_extractor_model = None
+authenticity_server = None  # KerasServingModel around ml_model
 word2vec_model_wv = None
+sequence_encoder = None
 label_encoder = None
 IMAGE_SIZE_W, IMAGE_SIZE_H = None, None
 MAX_SEQUENCE_LEN = None
@@ -104,17 +121,23 @@ REAL_LABEL_ENCODED = None
 FAKE_LABEL_ENCODED = None
 BRAND_REFERENCE_FEATURES = None
 
-# In-memory store for flags (must be global and defined before use)
-flags_store = []
-
-# In-memory storage for listed products and monitoring flags
-listed_products = []
-monitoring_flags = []
-
-# Initialize text analysis pipeline
-text_analyzer = None
-text_tokenizer = None
-text_model = None
+# Flags, listed products and monitoring flags live in the storage backend (SQLite by default)
+flags_collection = db["flags"]
+products_collection = db["listed_products"]
+monitoring_flags_collection = db["monitoring_flags"]
+
+# Flag queue queries: sortable (indexed) fields and the fields returned by view=summary
+FLAG_SORT_FIELDS = {"created_at": "created_at", "severity": "severity_rank", "status": "status",
+                    "risk": "risk", "category": "category"}
+FLAG_SUMMARY_FIELDS = ("id", "title", "severity", "status", "flaggedOn", "risk", "category",
+                       "seller_id", "product_id", "created_at")
+FLAG_QUERY_MAX_LIMIT = 200
+# Product fields returned by /products/search?view=summary (images are added only as URLs)
+PRODUCT_SUMMARY_FIELDS = ["id", "seller_id", "status", "created_at",
+                          "listing_data.productTitle", "listing_data.brandName", "listing_data.category",
+                          "listing_data.price", "listing_data.condition",
+                          "monitoring_result.risk_level", "monitoring_result.overall_risk_score"]
+product_index = ProductSearchIndex()  # Rebuilt from storage on startup, updated on every submission
 
 # Product Listing Data Models
 class ProductListingData(BaseModel):
@@ -204,13 +227,74 @@ def preprocess_image(image_bytes: bytes, target_size: tuple):
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Image preprocessing failed: {e}")
 
-def get_embedded_sequence_for_inference(text: str, w2v_wv, max_len: int, embedding_dim: int):
-    words = text.lower().split()
-    sequence = np.zeros((max_len, embedding_dim), dtype=np.float32)
-    for i, word in enumerate(words[:max_len]):
-        if word in w2v_wv.key_to_index:
-            sequence[i] = w2v_wv[word]
-    return np.expand_dims(sequence, axis=0)
+def get_embedded_sequence_for_inference(text: str) -> np.ndarray:
+    """(1, MAX_SEQUENCE_LEN, EMBEDDING_DIM) Word2Vec sequence for text, memoized by sequence_encoder."""
+    return sequence_encoder.encode(text)
+
+def decode_image_data(image_data: str) -> bytes:
+    """Decode a base64 image string, with or without a data URL prefix, or read an upload ref."""
+    if is_upload_ref(image_data):
+        return read_upload(image_data)
+    if image_data.startswith('data:image'):
+        return base64.b64decode(image_data.split(',')[1])
+    return base64.b64decode(image_data)
+
+def predict_authenticity_batch(inputs: List[tuple]) -> List[float]:
+    """Run ml_model once, through its serving wrapper, over a list of (image, brand, tagline) arrays with batch dimension 1."""
+    images, brands, taglines = zip(*inputs)
+    prediction_output = authenticity_server.predict(np.concatenate(images), np.concatenate(brands), np.concatenate(taglines))
+    return [float(row[0]) for row in prediction_output]
+
+# Concurrent authenticity checks share one Keras forward pass
+authenticity_batcher = MicroBatcher("keras_authenticity", predict_authenticity_batch)
+
+def prepare_authenticity_input(image_bytes: bytes, brand: str, tagline: str) -> tuple:
+    """Preprocessed (image, brand, tagline) arrays for one image; blocking, call via run_cpu."""
+    ensure_authenticity_assets()
+    processed_image = preprocess_image(image_bytes, target_size=(IMAGE_SIZE_W, IMAGE_SIZE_H))
+    processed_brand = get_embedded_sequence_for_inference(brand)
+    processed_tagline = get_embedded_sequence_for_inference(tagline)
+    return processed_image, processed_brand, processed_tagline
+
+async def score_image_authenticity(image_bytes: bytes, brand: str, tagline: str) -> float:
+    """Run the Keras logo/text authenticity model on one image.
+
+    Preprocessing runs on the CPU pool; the forward pass is awaited on the
+    event loop, so any number of requests can join the same batch.
+    """
+    inputs = await run_cpu(prepare_authenticity_input, image_bytes, brand, tagline)
+    return await authenticity_batcher.asubmit(inputs)
+
+def prepare_images_authenticity_inputs(images: List[str], brand: str, tagline: str) -> Tuple[List[tuple], List[Optional[Dict]]]:
+    """Decode and preprocess several images for one brand/tagline; blocking, call via run_cpu.
+
+    Returns the model inputs for the images that decoded, and a per-image
+    results list holding a {"score": None, "error"} dict for those that did not.
+    """
+    ensure_authenticity_assets()
+    processed_brand = get_embedded_sequence_for_inference(brand)
+    processed_tagline = get_embedded_sequence_for_inference(tagline)
+    results: List[Optional[Dict]] = [None] * len(images)
+    inputs = []
+    for position, image_data in enumerate(images):
+        try:
+            processed_image = preprocess_image(decode_image_data(image_data), target_size=(IMAGE_SIZE_W, IMAGE_SIZE_H))
+        except Exception as e:
+            results[position] = {"score": None, "error": str(getattr(e, "detail", e))}
+            continue
+        inputs.append((processed_image, processed_brand, processed_tagline))
+    return inputs, results
+
+async def score_images_data_authenticity(images: List[str], brand: str, tagline: str) -> List[Dict]:
+    """Score several images against one brand/tagline in a single batched Keras forward pass.
+
+    Returns one {"score", "error"} dict per image, in order; images that fail
+    to decode get score None instead of failing the whole batch.
+    """
+    inputs, results = await run_cpu(prepare_images_authenticity_inputs, images, brand, tagline)
+    # asubmit_many enqueues every image before waiting, so they share one forward pass
+    scores = iter(await authenticity_batcher.asubmit_many(inputs))
+    return [result if result is not None else {"score": next(scores), "error": None} for result in results]
 
 def truncate_image_url(url: str, max_length: int = 50) -> str:
     """Truncate long image URLs for terminal display"""
@@ -220,8 +304,6 @@ def truncate_image_url(url: str, max_length: int = 50) -> str:
 
 def analyze_text_with_ml(text: str, product_data: ProductListingData) -> Dict:
     """Analyze text content using real ML models (BERT-based) and enhanced rule-based checks."""
-    global text_analyzer, text_tokenizer, text_model
-    
     analysis = {
         "suspicious_keywords": [],
         "price_anomalies": False,
@@ -239,20 +321,11 @@ def analyze_text_with_ml(text: str, product_data: ProductListingData) -> Dict:
 
     # --- Enhanced Rule-Based Analysis ---
 
-    # 1. Known counterfeit/spam keywords
-    COUNTERFEIT_KEYWORDS = [
-        "replica", "fake", "copy", "imitation", "knockoff", "counterfeit",
-        "unauthorized", "unlicensed", "bootleg", "pirated", "duplicate",
-        "reproduction", "faux", "knock-off", "knock off", "repro",
-        "aftermarket", "compatible", "alternative", "substitute", "test", 
-        "asdf", "lorem ipsum", "example"
-    ]
-    
-    for keyword in COUNTERFEIT_KEYWORDS:
-        if keyword in text_lower:
-            analysis["suspicious_keywords"].append(keyword)
-            if keyword not in analysis["counterfeit_indicators"]:
-                analysis["counterfeit_indicators"].append(f"Suspicious keyword detected: {keyword}")
+    # 1. Known counterfeit/spam keywords (keyword_rules.COUNTERFEIT_KEYWORDS)
+    counterfeit_hits = RULE_MATCHER.matches_by_tag(text, [COUNTERFEIT_KEYWORDS_TAG]).get(COUNTERFEIT_KEYWORDS_TAG, [])
+    for keyword in counterfeit_hits:
+        analysis["suspicious_keywords"].append(keyword)
+        analysis["counterfeit_indicators"].append(f"Suspicious keyword detected: {keyword}")
 
     # 2. Brand consistency check (simple but effective)
     if brand_lower not in title_lower and brand_lower not in text_lower:
@@ -274,6 +347,7 @@ def analyze_text_with_ml(text: str, product_data: ProductListingData) -> Dict:
 
     # --- ML-based Analysis (BERT) ---
     try:
+        text_analyzer = registry.get("text_analyzer")
         if text_analyzer:
             result = text_analyzer(text)
             if result and len(result) > 0:
@@ -300,18 +374,19 @@ def analyze_text_with_ml(text: str, product_data: ProductListingData) -> Dict:
         
     return analysis
 
-@app.on_event("startup")
-async def load_ml_assets_unified():
-    global ml_model, image_feature_extractor_model, word2vec_model_wv, label_encoder
+def load_authenticity_assets():
+    """Load the Keras model, Word2Vec vectors, label encoder and reference features into module globals.
+
+    Registered with the model registry as "keras_authenticity"; returns the Keras model.
+    """
+    global ml_model, image_feature_extractor_model, authenticity_server, word2vec_model_wv, sequence_encoder, label_encoder
     global IMAGE_SIZE_W, IMAGE_SIZE_H, MAX_SEQUENCE_LEN, EMBEDDING_DIM
     global REAL_LABEL_ENCODED, FAKE_LABEL_ENCODED, BRAND_REFERENCE_FEATURES
-    global text_analyzer, text_tokenizer, text_model
     import tensorflow as tf
     from tensorflow.keras.models import load_model, Model
     from gensim.models import Word2Vec
     import pickle
-    import torch
-    from transformers import pipeline
+    from keras_serving import KerasServingModel
     
     logger.info("Loading ML models and assets (unified)...")
     try:
@@ -326,17 +401,21 @@ async def load_ml_assets_unified():
             FAKE_LABEL_ENCODED = config.get('FAKE_LABEL_ENCODED', None)
         logger.info(f"Configuration loaded: {config}")
         
-        ml_model = load_model(MODEL_LOAD_PATH)
+        model = load_model(MODEL_LOAD_PATH)
         logger.info(f"Keras model loaded successfully from {MODEL_LOAD_PATH}")
         
         image_feature_extractor_model = Model(
-            inputs=ml_model.input[0],
-            outputs=ml_model.get_layer('image_flatten_output').output
+            inputs=model.input[0],
+            outputs=model.get_layer('image_flatten_output').output
         )
         logger.info("Image feature extractor sub-model created.")
+
+        authenticity_server = KerasServingModel(model)
+        logger.info(f"Authenticity model serving through '{authenticity_server.backend}'.")
         
         full_word2vec_model = Word2Vec.load(WORD2VEC_MODEL_PATH)
         word2vec_model_wv = full_word2vec_model.wv
+        sequence_encoder = SequenceEncoder(word2vec_model_wv, MAX_SEQUENCE_LEN, EMBEDDING_DIM)
         logger.info(f"Word2Vec word vectors loaded successfully from {WORD2VEC_MODEL_PATH}")
         
         with open(LABEL_ENCODER_PATH, 'rb') as f:
@@ -347,25 +426,52 @@ async def load_ml_assets_unified():
             BRAND_REFERENCE_FEATURES = pickle.load(f)
         logger.info(f"Reference brand features loaded successfully. Brands: {list(BRAND_REFERENCE_FEATURES.keys())}")
         
-        # Load BERT text analysis model
-        try:
-            logger.info("Loading BERT text analysis model...")
-            text_analyzer = pipeline(
-                "text-classification",
-                model="microsoft/DialoGPT-medium",  # Using a general model for text classification
-                device=0 if torch.cuda.is_available() else -1
-            )
-            logger.info("BERT text analysis model loaded successfully")
-        except Exception as e:
-            logger.warning(f"Failed to load BERT model: {e}. Will use rule-based text analysis.")
-            text_analyzer = None
-        
+        # Publish the model last so a non-None ml_model means every asset is in place
+        ml_model = model
         logger.info("All ML assets loaded and ready (unified).")
+        return ml_model
         
     except Exception as e:
         logger.error(f"Failed to load ML assets: {e}")
         raise RuntimeError(f"Failed to load ML assets: {e}")
 
+def load_text_analyzer():
+    """Load the transformers text-classification pipeline used by analyze_text_with_ml.
+
+    Returns None when the model cannot be loaded, so text analysis falls back to rules.
+    """
+    import torch
+    from transformers import pipeline
+    try:
+        logger.info("Loading BERT text analysis model...")
+        analyzer = pipeline(
+            "text-classification",
+            model="microsoft/DialoGPT-medium",  # Using a general model for text classification
+            device=0 if torch.cuda.is_available() else -1
+        )
+        logger.info("BERT text analysis model loaded successfully")
+        return analyzer
+    except Exception as e:
+        logger.warning(f"Failed to load BERT model: {e}. Will use rule-based text analysis.")
+        return None
+
+registry.register("keras_authenticity", load_authenticity_assets)
+registry.register("text_analyzer", load_text_analyzer)
+
+def ensure_authenticity_assets():
+    """Load the Keras authenticity assets on first use; blocking, call via run_cpu."""
+    return registry.get("keras_authenticity")
+
+@app.on_event("startup")
+async def load_ml_assets_unified():
+    if MODEL_LOADING_MODE == "lazy":
+        # Serve immediately; models load in the background or on first use
+        logger.info("Lazy model loading enabled; warming up models in the background.")
+        registry.start_background_warm_up()
+        return
+    await run_cpu(registry.get, "keras_authenticity")
+    await run_cpu(registry.warm_up)
+
 class PredictionOutput(BaseModel):
     visual_analysis_status: str
     visual_analysis_message: str
@@ -379,6 +485,8 @@ class PredictionOutput(BaseModel):
 
 # Remove hardcoded API key and load from environment variable
 GROQ_API_KEY = os.environ.get("GROQ_API_KEY")  # Set this in your environment, do NOT hardcode
+# Shared Groq client: pooled connections, one deadline across fallback models, per-model circuit breakers
+llm_client = LLMClient(GROQ_API_KEY)
 
 @app.post("/predict_authenticity/", response_model=PredictionOutput)
 async def predict_authenticity(
@@ -386,28 +494,23 @@ async def predict_authenticity(
     brand_name: str = Form(...),
     tagline: str = Form(...)
 ):
-    if ml_model is None or word2vec_model_wv is None or label_encoder is None:
+    try:
+        await run_cpu(ensure_authenticity_assets)
+    except Exception:
         raise HTTPException(status_code=503, detail="ML model and assets not loaded. Server is not ready.")
     # Import cv2 and numpy only when needed
     import cv2
     import numpy as np
-    logger.info(f"Received authenticity check request: Image='{image.filename}', Brand='{brand_name}', Tagline='{tagline}'")
+    events.info("authenticity.request", filename=image.filename, brand=brand_name, tagline=tagline)
     try:
         image_bytes = await image.read()
-        processed_image = preprocess_image(image_bytes, target_size=(IMAGE_SIZE_W, IMAGE_SIZE_H))
-        processed_brand = get_embedded_sequence_for_inference(brand_name, word2vec_model_wv, MAX_SEQUENCE_LEN, EMBEDDING_DIM)
-        processed_tagline = get_embedded_sequence_for_inference(tagline, word2vec_model_wv, MAX_SEQUENCE_LEN, EMBEDDING_DIM)
-        prediction_output = ml_model.predict([processed_image, processed_brand, processed_tagline])
-        authenticity_score = float(prediction_output[0][0])
+        authenticity_score = await score_image_authenticity(image_bytes, brand_name, tagline)
         predicted_label_idx = REAL_LABEL_ENCODED if authenticity_score >= 0.9 else FAKE_LABEL_ENCODED
         predicted_label_text = label_encoder.inverse_transform([predicted_label_idx])[0]
-        logger.info(f"Main Model Predicted Label: {predicted_label_text}")
-        logger.info(f"Authenticity Score: {authenticity_score}")
+        events.info("authenticity.scored", predicted_label=predicted_label_text, authenticity_score=authenticity_score)
         # --- Flag creation logic for product listing (match product verification) ---
-        logger.info(f"Checking if flag should be created: predicted_label_text={predicted_label_text}, authenticity_score={authenticity_score}")
         if predicted_label_text.lower() != "genuine" or authenticity_score < 0.9:
-            logger.info("Creating flag for product listing (counterfeit detected)...")
-            flag = create_flag({
+            flag = await run_io(create_flag, {
                 "title": "Counterfeit Product Listing Detected",
                 "severity": "Critical",
                 "risk": "Counterfeit",
@@ -424,7 +527,6 @@ async def predict_authenticity(
                     "authenticity_score": authenticity_score
                 },
             })
-            logger.info(f"Flag created for product listing: {flag}")
         response = PredictionOutput(
             visual_analysis_status='clear' if predicted_label_text == 'Genuine' else 'warning',
             visual_analysis_message=f"Visual analysis {'passed' if predicted_label_text == 'Genuine' else 'failed'} with score {authenticity_score:.4f}",
@@ -459,6 +561,7 @@ def create_flag(flag_data):
         "id": flag_id,
         "title": flag_data.get("title", "Suspicious Activity Detected"),
         "severity": flag_data.get("severity", "High"),
+        "severity_rank": SEVERITY_RANKS.get(flag_data.get("severity", "High"), 0),
         "status": "Open",
         "flaggedOn": datetime.now().strftime("%Y-%m-%d"),
         "risk": flag_data.get("risk", "Counterfeit"),
@@ -469,24 +572,19 @@ def create_flag(flag_data):
         "product": flag_data.get("product"),
         "account": flag_data.get("account"),
         "user_upload": flag_data.get("user_upload", {}),
+        "seller_id": flag_data.get("seller_id"),
+        "product_id": flag_data.get("product_id"),
+        "created_at": datetime.now().isoformat(),
     }
-    flags_store.append(flag)
-    logger.info(f"Flag created: {flag}")
+    flag = convert_numpy_types(flag)
+    flags_collection.insert_one(flag)
+    flag_reports.schedule(flag)
+    events.info("flag.created", flag_id=flag_id, title=flag["title"], severity=flag["severity"],
+                risk=flag["risk"], category=flag["category"], evidence_items=len(flag["evidence"]))
     return flag
 
-def get_groq_analysis(flag):
-    """
-    Generate AI analysis using Groq API with bulletproof implementation and improved prompt for detailed admin report
-    """
-    api_keys = [
-        GROQ_API_KEY if GROQ_API_KEY else None
-    ]
-    models_to_try = [
-        "llama3-8b-8192",
-        "mixtral-8x7b-32768", 
-        "llama-3.1-8b-instant",
-        "gemma2-9b-it"
-    ]
+def groq_report_messages(flag):
+    """Chat messages asking for the detailed admin report on a flag"""
     # Improved system prompt for detailed, markdown-formatted admin report
     system_prompt = """
 You are an Amazon Trust & Safety AI assistant. Given a flag object, generate a detailed, markdown-formatted report for human admins. 
@@ -501,56 +599,35 @@ ALWAYS include these sections:
 - ## Additional Context (any extra info)
 Be concise, professional, and use bullet points and tables where helpful. Use markdown formatting for all sections.
 """
-    # Pass the entire flag object as JSON
+    # Pass the entire flag object (without any earlier report) as JSON
+    flag_data = {key: value for key, value in flag.items() if key not in REPORT_FIELDS}
     user_prompt = f"""Flag Data (JSON):
-{json.dumps(flag, indent=2)}
+{json.dumps(flag_data, indent=2)}
 """
-    for api_key in api_keys:
-        if not api_key:
-            continue
-        for model in models_to_try:
-            try:
-                print(f"Trying Groq API with model: {model}")
-                response = requests.post(
-                    "https://api.groq.com/openai/v1/chat/completions",
-                    headers={
-                        "Content-Type": "application/json",
-                        "Authorization": f"Bearer {api_key}"
-                    },
-                    json={
-                        "model": model,
-                        "messages": [
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": user_prompt}
-                        ],
-                        "temperature": 0.3,
-                        "max_tokens": 1200,
-                        "stream": False
-                    },
-                    timeout=20
-                )
-                if response.status_code == 200:
-                    result = response.json()
-                    content = result["choices"][0]["message"]["content"]
-                    print(f"✅ SUCCESS: Groq API worked with model {model}")
-                    return content
-                elif response.status_code == 404:
-                    print(f"❌ Model {model} not found, trying next...")
-                    continue
-                elif response.status_code == 401:
-                    print(f"❌ API key invalid, trying next...")
-                    break
-                else:
-                    print(f"❌ Error {response.status_code}: {response.text}")
-                    continue
-            except requests.exceptions.Timeout:
-                print(f"❌ Timeout with model {model}, trying next...")
-                continue
-            except Exception as e:
-                print(f"❌ Exception with model {model}: {str(e)}")
-                continue
-    print("🔄 All Groq attempts failed, using enhanced mock response")
-    return create_enhanced_mock_analysis(flag)
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+
+def get_groq_analysis(flag):
+    """
+    Generate the detailed admin report with Groq; raises LLMUnavailable when no model can answer
+    """
+    if not llm_client.configured:
+        raise LLMUnavailable("GROQ_API_KEY is not set")
+    try:
+        content, model = llm_client.chat_sync(groq_report_messages(flag), temperature=0.3, max_tokens=1200)
+    except LLMUnavailable as e:
+        events.warning("groq.unavailable", flag_id=flag.get("id"), error=str(e))
+        raise
+    events.info("groq.success", model=model)
+    return content
+
+def save_flag_report(flag_id: str, fields: Dict):
+    flags_collection.update_one({"id": flag_id}, {"$set": fields})
+
+# Reports are generated in the background when a flag is created, see flag_reports.py
+flag_reports = FlagReportManager(get_groq_analysis, save_flag_report)
 
 def create_enhanced_mock_analysis(flag):
     """
@@ -658,22 +735,16 @@ Based on automated analysis, this incident requires human review to determine ap
 
 *Report generated by AI Security Monitoring System*"""
 
-@router.post("/analyze/review")
-@router.post("/analyze/review/")
-async def analyze_review(request: ReviewRequest):
-    logger.info("/analyze/review endpoint called")
-    review = request.review_text
-    product_img_url = request.product_image_url
-    review_img_url = request.review_image_url
+# Upper bound on reviews accepted by a single /analyze/reviews/batch call
+MAX_REVIEW_BATCH = 1000
+
+class ReviewBatchRequest(PydanticBaseModel):
+    reviews: List[ReviewRequest]
+
+def build_review_result(request: ReviewRequest, text_score, image_score, relevance):
+    """Combine model scores into the trust score response and raise a flag for low-trust reviews."""
     verified = request.verified
     rating = request.ratings
-    title = request.product_title
-    description = request.product_description
-    category = request.product_category
-
-    text_score = analyze_review_text(review)
-    image_score = compare_images(product_img_url, review_img_url)
-    relevance = check_relevance(review, title, description, category)
 
     if image_score is not None:
         trust_score = 0.7 * text_score + 0.3 * image_score
@@ -691,7 +762,7 @@ async def analyze_review(request: ReviewRequest):
             "Medium Trust Review" if trust_score >= 60 else \
             "Low Trust Review"
 
-    logger.info(f"Review analyzed: trust_score={trust_score}, badge={badge}")
+    events.info("review.analyzed", trust_score=trust_score, badge=badge)
 
     # --- Flag creation logic ---
     if trust_score < 50 or badge == "Low Trust Review":
@@ -718,9 +789,104 @@ async def analyze_review(request: ReviewRequest):
         "relevance_check": relevance["relevance_check"]
     }
 
+@router.post("/analyze/review")
+@router.post("/analyze/review/")
+async def analyze_review(request: ReviewRequest):
+    logger.info("/analyze/review endpoint called")
+    review = request.review_text
+
+    # Repeated texts for the same product reuse earlier sentiment and relevance results
+    cache_key = review_cache_key(review, request.product_title, request.product_description, request.product_category)
+    cached = review_result_cache.get(cache_key)
+    if cached is not None:
+        text_score, relevance = cached
+        image_score = await compare_images(request.product_image_url, request.review_image_url)
+    else:
+        text_score, image_score, relevance = await asyncio.gather(
+            sentiment_batcher.asubmit(review),
+            compare_images(request.product_image_url, request.review_image_url),
+            relevance_batcher.asubmit((review, request.product_title, request.product_description, request.product_category)),
+        )
+        review_result_cache.put(cache_key, (text_score, relevance))
+
+    # build_review_result may store a flag, so it runs off the event loop
+    return await run_io(build_review_result, request, text_score, image_score, relevance)
+
+@router.post("/analyze/reviews/batch")
+async def analyze_reviews_batch(request: ReviewBatchRequest):
+    """Score many reviews at once; text and relevance models run one forward pass per length bucket."""
+    reviews = request.reviews
+    if len(reviews) > MAX_REVIEW_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_REVIEW_BATCH} reviews per batch")
+    logger.info(f"/analyze/reviews/batch endpoint called with {len(reviews)} reviews")
+
+    # Only distinct reviews that are not already cached go through the models
+    cache_keys = [
+        review_cache_key(r.review_text, r.product_title, r.product_description, r.product_category) for r in reviews
+    ]
+    scored = {}
+    to_score = {}
+    for key, r in zip(cache_keys, reviews):
+        if key in scored or key in to_score:
+            continue
+        cached = review_result_cache.get(key)
+        if cached is not None:
+            scored[key] = cached
+        else:
+            to_score[key] = r
+    pending = list(to_score.values())
+
+    text_scores, relevances, image_scores = await asyncio.gather(
+        run_cpu(analyze_review_texts, [r.review_text for r in pending]),
+        run_cpu(check_relevance_batch, [
+            (r.review_text, r.product_title, r.product_description, r.product_category) for r in pending
+        ]),
+        asyncio.gather(*(compare_images(r.product_image_url, r.review_image_url) for r in reviews)),
+    )
+    for key, text_score, relevance in zip(to_score, text_scores, relevances):
+        scored[key] = (text_score, relevance)
+        review_result_cache.put(key, (text_score, relevance))
+
+    results = await run_io(lambda: [
+        build_review_result(r, scored[key][0], image_score, scored[key][1])
+        for r, key, image_score in zip(reviews, cache_keys, image_scores)
+    ])
+    return {"count": len(results), "results": results}
+
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    models = registry.readiness()
+    return {
+        "status": "ok",
+        "models_ready": all(state == "ready" for state in models.values()),
+        "models": models,
+    }
+
+@app.get("/models")
+def get_models():
+    """Load state and weight memory of every shared model"""
+    return registry.report()
+
+@app.get("/stats/caches")
+def get_cache_stats():
+    """Hit/miss counters for the review, image embedding, listing session and Word2Vec sequence caches, and flag report generation"""
+    return {
+        "review_results": review_result_cache.stats(),
+        "image_embeddings": image_embedding_cache.stats(),
+        "listing_sessions": listing_sessions.stats(),
+        "word2vec_sequences": sequence_encoder.stats() if sequence_encoder is not None else None,
+        "flag_reports": flag_reports.stats(),
+    }
+
+@app.get("/stats/llm")
+def get_llm_stats():
+    """Call counts, hedging and per-model circuit breaker state for the Groq client"""
+    return llm_client.stats()
+
+@app.get("/stats/batching")
+def get_batching_stats():
+    """Micro-batching counters for every model batcher"""
+    return batcher_stats()
 
 app.include_router(router)
 
@@ -728,19 +894,188 @@ app.include_router(router)
 async def startup_event():
     logger.info("FastAPI server started and ready to receive requests.")
     logger.info("Groq API configured with multiple fallback models for reliability.")
+    listing_jobs.start()
+    llm_client.bind_loop(asyncio.get_running_loop())
+    try:
+        if await run_io(price_model.load):
+            logger.info(f"Price model loaded: {price_model.stats()}")
+    except Exception as e:
+        logger.warning(f"Could not load price model state: {e}")
+    await run_io(lambda: product_index.rebuild(products_collection.find()))
+    logger.info(f"Product search index built: {product_index.stats()}")
+    # Pending uploads come from unauthenticated clients; sweep them for as long as the server runs
+    app.state.upload_sweeper = asyncio.create_task(sweep_uploads_periodically())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Let accepted listing jobs finish before the executors go away
+    await listing_jobs.drain()
+    app.state.upload_sweeper.cancel()
+    try:
+        await run_io(price_model.save)
+    except Exception as e:
+        logger.warning(f"Could not save price model state: {e}")
+    await image_fetcher.aclose()
+    flag_reports.shutdown()
+    await llm_client.aclose()
+    inference_executor.shutdown(wait=False)
 
 @app.get("/flags")
 def get_flags():
-    return flags_store
+    return flags_collection.find()
+
+@app.get("/flags/query")
+def query_flags(
+    status: Optional[str] = None,
+    severity: Optional[str] = None,
+    risk: Optional[str] = None,
+    category: Optional[str] = None,
+    seller_id: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    sort: str = "-created_at",
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    view: str = "summary",
+    include_total: bool = False,
+):
+    """Page through the flag queue using the storage indexes.
+
+    Filters are exact matches (comma-separated values match any of them);
+    since/until bound created_at (ISO timestamps). sort is one of created_at,
+    severity, status, risk or category, prefixed with "-" for descending.
+    view=summary drops evidence, AI output and embedded seller/product data;
+    view=full returns whole flags. Pass next_cursor back as cursor.
+    """
+    sort_field = FLAG_SORT_FIELDS.get(sort.lstrip("-"))
+    if sort_field is None:
+        raise HTTPException(status_code=400, detail=f"Unsupported sort field: {sort}")
+    if view not in ("summary", "full"):
+        raise HTTPException(status_code=400, detail=f"Unsupported view: {view}")
+
+    query = {}
+    for field, value in (("status", status), ("severity", severity), ("risk", risk),
+                         ("category", category), ("seller_id", seller_id)):
+        if value:
+            values = [item.strip() for item in value.split(",") if item.strip()]
+            query[field] = values[0] if len(values) == 1 else {"$in": values}
+    if since or until:
+        query["created_at"] = {key: bound for key, bound in (("$gte", since), ("$lt", until)) if bound}
+
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    flags, next_key = flags_collection.find_page(query, sort_field, -1 if sort.startswith("-") else 1, after,
+                                                 max(1, min(limit, FLAG_QUERY_MAX_LIMIT)))
+    if view == "summary":
+        flags = [{**{field: flag.get(field) for field in FLAG_SUMMARY_FIELDS},
+                  "evidence_count": len(flag.get("evidence") or []),
+                  "has_report": "ai_analysis" in flag} for flag in flags]
+    result = {"flags": flags, "next_cursor": encode_cursor(next_key) if next_key else None}
+    if include_total:
+        result["total"] = flags_collection.count_documents(query)
+    return result
 
 @app.get("/flags/{flag_id}")
 def get_flag(flag_id: str):
-    for flag in flags_store:
-        if flag["id"] == flag_id:
-            # Use only Groq analysis, remove Gemini
-            flag["ai_analysis"] = get_groq_analysis(flag)
-            return flag
-    return {"error": "Flag not found"}, 404
+    flag = flags_collection.find_one({"id": flag_id})
+    if flag is None:
+        return {"error": "Flag not found"}, 404
+    # Never waits on the LLM: a stale or missing report comes back as "pending" while it is (re)generated
+    result = {**flag, "report_status": flag_reports.status(flag)}
+    if not flag.get("ai_analysis"):
+        # Shown until a real report exists; never saved on the flag
+        result["ai_analysis"] = create_enhanced_mock_analysis(flag)
+        result["ai_analysis_placeholder"] = True
+    return result
+
+def sse_event(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.get("/flags/{flag_id}/analysis/stream")
+async def stream_flag_analysis(flag_id: str, refresh: bool = False):
+    """Server-sent events: "token" events carrying report text as it is generated, then "done".
+
+    A stored report for the flag's current content is sent at once unless
+    refresh=true. Generation is shared with flag_reports: if the report is
+    already being generated (in the background or for another viewer), this
+    stream waits for it and sends it whole. When Groq is unavailable the mock
+    report is streamed as a placeholder and not saved; "done" then carries
+    report_status "failed". If the provider fails part-way, a "report_error"
+    event ends the stream.
+    """
+    flag = await run_io(flags_collection.find_one, {"id": flag_id})
+    if flag is None:
+        raise HTTPException(status_code=404, detail="Flag not found")
+
+    def placeholder_events(status: str):
+        for line in create_enhanced_mock_analysis(flag).splitlines(keepends=True):
+            yield sse_event("token", {"text": line})
+        yield sse_event("done", {"source": "mock", "report_status": status})
+
+    async def shared_events(future):
+        try:
+            report = await asyncio.shield(asyncio.wrap_future(future))
+        except LLMUnavailable:
+            for event in placeholder_events("failed"):
+                yield event
+            return
+        except Exception:
+            yield sse_event("report_error", {"detail": "Report generation failed"})
+            return
+        yield sse_event("token", {"text": report})
+        yield sse_event("done", {"source": "shared", "report_status": "ready"})
+
+    async def report_events():
+        if flag_reports.is_current(flag) and not refresh:
+            yield sse_event("token", {"text": flag["ai_analysis"]})
+            yield sse_event("done", {"source": "stored", "report_status": "ready"})
+            return
+        yield ": generating\n\n"  # First byte before the provider answers
+
+        future, owner = flag_reports.claim(flag)
+        if future is None:
+            # Failed recently; flag_reports retries after FLAG_REPORT_RETRY_AFTER
+            for event in placeholder_events("failed"):
+                yield event
+            return
+        if not owner:
+            async for event in shared_events(future):
+                yield event
+            return
+
+        parts, source = [], None
+        try:
+            try:
+                if not llm_client.configured:
+                    raise LLMUnavailable("GROQ_API_KEY is not set")
+                async for model, delta in llm_client.stream_chat(groq_report_messages(flag), temperature=0.3,
+                                                                 max_tokens=1200):
+                    source = model
+                    parts.append(delta)
+                    yield sse_event("token", {"text": delta})
+            except LLMUnavailable as e:
+                events.warning("groq.stream_unavailable", flag_id=flag_id, error=str(e), tokens_sent=len(parts))
+                flag_reports.fail(flag, e)
+                if parts:
+                    yield sse_event("report_error", {"detail": "Report generation was interrupted"})
+                else:
+                    for event in placeholder_events("failed"):
+                        yield event
+                return
+
+            report = "".join(parts)
+            await run_io(flag_reports.finish, flag, report)
+            events.info("groq.stream_complete", flag_id=flag_id, source=source, chars=len(report))
+            yield sse_event("done", {"source": source, "report_status": "ready"})
+        finally:
+            if not future.done():
+                # The viewer left before the report was saved; the next request may retry at once
+                flag_reports.fail(flag, LLMUnavailable("Report stream closed"), record=False)
+
+    return StreamingResponse(report_events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.post("/verify")
 async def verify_product(
@@ -750,14 +1085,16 @@ async def verify_product(
     try:
         contents = await image.read()
         pil_image = Image.open(io.BytesIO(contents))
-        logger.info(f"Received image: size={pil_image.size}, mode={pil_image.mode}")
-        opencv_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-        verification_details = verifier.verify_product(opencv_image, order_id)
+        events.info("verify.request", order_id=order_id, size=pil_image.size, mode=pil_image.mode)
+        opencv_image = await run_cpu(lambda: cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR))
+        verification_details = await verifier.verify_product_async(opencv_image, order_id)
         verification_details = convert_numpy_types(verification_details)
-        logger.info(f"Verification details: {json.dumps(verification_details, indent=2)}")
+        events.info("verify.result", order_id=order_id, is_authentic=verification_details.get("is_authentic"),
+                    overall_score=verification_details.get("overall_score"))
+        events.debug("verify.details", order_id=order_id, details=verification_details)
         # --- Flag creation logic for product verification ---
         if not verification_details.get("is_authentic", True):
-            flag = create_flag({
+            flag = await run_io(create_flag, {
                 "title": "Counterfeit Product Detected",
                 "severity": "Critical",
                 "risk": "Counterfeit",
@@ -776,7 +1113,6 @@ async def verify_product(
                     "verification_details": verification_details
                 },
             })
-            logger.info(f"Flag created for product verification: {flag}")
         return JSONResponse({
             "result": "authentic" if verification_details.get("is_authentic", False) else "counterfeit",
             "verification_details": verification_details
@@ -788,50 +1124,50 @@ async def verify_product(
             "error": str(e)
         }, status_code=500)
 
-async def perform_comprehensive_monitoring(
-    listing_data: ProductListingData, 
-    product_id: str, 
-    seller_id: str
-) -> MonitoringResult:
-    """Perform comprehensive AI monitoring on the product listing - REAL ML VERSION"""
-    
+# --- Monitoring stages ---
+# Each stage returns (flags, risk_increments, details). perform_comprehensive_monitoring
+# runs the two model stages concurrently and merges all stages in a fixed order.
+
+async def score_listing_images(
+    session: Optional[ListingSession], main_image: str, additional_images: List[str], brand: str, tagline: str
+) -> List[Dict]:
+    """Keras authenticity scores for the main image followed by every additional image.
+
+    All images go through one batched forward pass; the result is reused from
+    the listing session when the images, brand and title are unchanged.
+    """
+    images = [main_image] + [image for image in additional_images if image]
+    return await reuse_analysis(
+        session, "listing_image_authenticity", input_hash(images, brand, tagline),
+        lambda: score_images_data_authenticity(images, brand, tagline)
+    )
+
+async def run_image_stage(listing_data: ProductListingData, session: Optional[ListingSession] = None) -> Tuple[List[Dict], List[float], Dict]:
+    """Keras authenticity model on the main image and every additional image."""
     flags = []
-    risk_score = 0.0
-    
-    print(f"\n🔍 STARTING AI MONITORING FOR PRODUCT: {listing_data.brandName} - {listing_data.productTitle}")
-    print("="*60)
-    
+    risk = []
+
     # 1. REAL ML IMAGE ANALYSIS using existing predict_authenticity endpoint
-    logger.info("Starting REAL ML image analysis...")
-    print("🤖 Attempting ML-based image counterfeit detection...")
-    
     # Get the main image for analysis
     main_image = listing_data.mainImage
     if main_image:
-        logger.info(f"Analyzing image with ML models...")
-        print(f"📸 Processing image data ({len(main_image)} characters)...")
+        monitoring_events.debug("monitoring.image.start", image_chars=len(main_image),
+                                additional_images=len(listing_data.additionalImages))
         
         try:
-            # Convert base64 to bytes
-            if main_image.startswith('data:image'):
-                image_data_clean = main_image.split(',')[1]
-                image_bytes = base64.b64decode(image_data_clean)
-            else:
-                image_bytes = base64.b64decode(main_image)
-            
             # Use the existing ML model directly (no need to call external API)
-            processed_image = preprocess_image(image_bytes, target_size=(IMAGE_SIZE_W, IMAGE_SIZE_H))
-            processed_brand = get_embedded_sequence_for_inference(listing_data.brandName, word2vec_model_wv, MAX_SEQUENCE_LEN, EMBEDDING_DIM)
-            processed_tagline = get_embedded_sequence_for_inference(listing_data.productTitle, word2vec_model_wv, MAX_SEQUENCE_LEN, EMBEDDING_DIM)
-            
-            prediction_output = ml_model.predict([processed_image, processed_brand, processed_tagline])
-            authenticity_score = float(prediction_output[0][0])
+            image_results = await score_listing_images(
+                session, main_image, listing_data.additionalImages, listing_data.brandName, listing_data.productTitle
+            )
+            main_result, additional_results = image_results[0], image_results[1:]
+            if main_result["error"]:
+                raise ValueError(main_result["error"])
+            authenticity_score = main_result["score"]
             predicted_label_idx = REAL_LABEL_ENCODED if authenticity_score >= 0.9 else FAKE_LABEL_ENCODED
             predicted_label_text = label_encoder.inverse_transform([predicted_label_idx])[0]
             
-            print(f"✅ ML Image Analysis SUCCESSFUL!")
-            print(f"   📊 Authenticity Score: {authenticity_score:.4f}")
-            print(f"   🏷️  Predicted Label: {predicted_label_text}")
+            monitoring_events.info("monitoring.image.scored", authenticity_score=round(authenticity_score, 4),
+                                   predicted_label=predicted_label_text)
             
             # Add flags based on REAL ML analysis
             if predicted_label_text.lower() in ["fake", "counterfeit"]:
@@ -839,20 +1175,41 @@ async def perform_comprehensive_monitoring(
                     "type": "ml_analysis",
                     "severity": "critical",
                     "message": f"ML model detected counterfeit: Score {authenticity_score:.4f}",
-                    "image": listing_data.mainImage
+                    "image": evidence_image(listing_data.mainImage)
                 })
-                risk_score += 0.6  # High penalty for ML-detected counterfeit
-                print(f"   🚨 CRITICAL: ML model detected counterfeit!")
+                risk.append(0.6)  # High penalty for ML-detected counterfeit
             
             if authenticity_score < 0.7:
                 flags.append({
                     "type": "ml_analysis",
                     "severity": "high",
                     "message": f"Low ML authenticity score: {authenticity_score:.4f}",
-                    "image": listing_data.mainImage
+                    "image": evidence_image(listing_data.mainImage)
                 })
-                risk_score += 0.4
-                print(f"   ⚠️  WARNING: Low authenticity score ({authenticity_score:.4f})")
+                risk.append(0.4)
+
+            # Additional images: counterfeiters often show the genuine photo first
+            additional_images = [image for image in listing_data.additionalImages if image]
+            low_additional = False
+            for number, (image, result) in enumerate(zip(additional_images, additional_results), 1):
+                if result["score"] is None:
+                    monitoring_events.warning("monitoring.image.additional_failed", image=number, error=result["error"])
+                elif result["score"] < 0.7:
+                    low_additional = True
+                    flags.append({
+                        "type": "ml_analysis",
+                        "severity": "high",
+                        "message": f"Low ML authenticity score on additional image {number}: {result['score']:.4f}",
+                        "image": evidence_image(image)
+                    })
+            if low_additional:
+                risk.append(0.4)
+
+            image_scores = [
+                {"image": "main" if index == 0 else f"additional_{index}", **result}
+                for index, result in enumerate(image_results)
+            ]
+            scored = [result["score"] for result in image_results if result["score"] is not None]
             
             # Add ML analysis details
             ml_analysis = {
@@ -862,13 +1219,15 @@ async def perform_comprehensive_monitoring(
                 "text_analysis": f"Brand and title analysis completed",
                 "similarity_check": "Image similarity check completed",
                 "summary": f"ML model predicts {predicted_label_text} with confidence {authenticity_score:.4f}",
-                "ml_model_used": True
+                "ml_model_used": True,
+                "image_scores": image_scores,
+                "images_analyzed": len(scored),
+                "min_authenticity_score": min(scored),
+                "mean_authenticity_score": sum(scored) / len(scored)
             }
             
         except Exception as e:
-            logger.error(f"ML image analysis failed: {e}")
-            print(f"❌ ML Image Analysis FAILED: {str(e)}")
-            print("   🔄 Falling back to rule-based analysis...")
+            monitoring_events.error("monitoring.image.failed", error=str(e))
             
             ml_analysis = {
                 "authenticity_score": 0.5,
@@ -876,24 +1235,40 @@ async def perform_comprehensive_monitoring(
                 "error": f"ML analysis failed: {str(e)}",
                 "ml_model_used": False
             }
-            risk_score += 0.2  # Penalty for ML failure
+            risk.append(0.2)  # Penalty for ML failure
     else:
-        logger.warning("No main image provided for ML analysis")
-        print("❌ No image provided for ML analysis")
+        monitoring_events.warning("monitoring.image.missing")
         ml_analysis = {
             "authenticity_score": 0.3,
             "predicted_label": "No Image",
             "error": "No image provided for analysis",
             "ml_model_used": False
         }
-        risk_score += 0.3  # Penalty for no image
-    
-    # 2. REAL ML TEXT ANALYSIS
-    print("\n📝 Performing ML-based text analysis...")
-    text_analysis = analyze_text_with_ml(
-        f"{listing_data.productTitle} {listing_data.productDescription} {' '.join(listing_data.bulletPoints)}",
-        listing_data
+        risk.append(0.3)  # Penalty for no image
+
+    return flags, risk, ml_analysis
+
+async def analyze_listing_text(session: Optional[ListingSession], listing_data: ProductListingData) -> Dict:
+    """Text classifier over title, description and bullets; shared by /monitor/step step 1 and submission.
+
+    The result is reused from the listing session while those fields and the
+    brand are unchanged (analyze_text_with_ml reads the brand, title and
+    description length besides the text itself).
+    """
+    text = f"{listing_data.productTitle} {listing_data.productDescription} {' '.join(listing_data.bulletPoints)}"
+    return await reuse_analysis(
+        session, "listing_text_analysis",
+        input_hash(text, listing_data.brandName, listing_data.productTitle, listing_data.productDescription),
+        lambda: run_cpu(analyze_text_with_ml, text, listing_data)
     )
+
+async def run_text_stage(listing_data: ProductListingData, session: Optional[ListingSession] = None) -> Tuple[List[Dict], List[float], Dict]:
+    """Rule keywords plus the transformers text classifier over title, description and bullets."""
+    flags = []
+    risk = []
+
+    # 2. REAL ML TEXT ANALYSIS
+    text_analysis = dict(await analyze_listing_text(session, listing_data))
     
     if text_analysis["suspicious_keywords"]:
         flags.append({
@@ -901,8 +1276,7 @@ async def perform_comprehensive_monitoring(
             "severity": "critical",
             "message": f"Counterfeit keywords detected: {', '.join(text_analysis['suspicious_keywords'])}"
         })
-        risk_score += 0.4
-        print(f"   🚨 CRITICAL: Counterfeit keywords detected: {', '.join(text_analysis['suspicious_keywords'])}")
+        risk.append(0.4)
     
     if text_analysis["counterfeit_indicators"]:
         for indicator in text_analysis["counterfeit_indicators"]:
@@ -911,29 +1285,26 @@ async def perform_comprehensive_monitoring(
                 "severity": "high",
                 "message": indicator
             })
-            risk_score += 0.2
-            print(f"   ⚠️  WARNING: {indicator}")
-    
-    # Show ML text analysis results
-    if text_analysis.get("ml_text_score", 0) != 0.5:
-        print(f"   🤖 ML Text Score: {text_analysis['ml_text_score']:.4f}")
-        print(f"   📊 ML Analysis: {text_analysis['ml_analysis']}")
+            risk.append(0.2)
     
+    monitoring_events.info("monitoring.text.analyzed", ml_text_score=text_analysis.get("ml_text_score"),
+                           suspicious_keywords=text_analysis["suspicious_keywords"],
+                           indicators=len(text_analysis["counterfeit_indicators"]))
+
+    return flags, risk, text_analysis
+
+def run_pricing_stage(listing_data: ProductListingData) -> Tuple[List[Dict], List[float], Dict]:
+    """Category price range and category keyword relevance rules."""
+    flags = []
+    risk = []
+
     # 3. Price and Category Analysis
-    print(f"\n💰 Analyzing pricing and category relevance...")
     price = listing_data.price
-    category_lower = listing_data.category.lower()
     text_to_search = f"{listing_data.productTitle.lower()} {listing_data.productDescription.lower()}"
 
-    # Find appropriate price range from our map
-    price_range = CATEGORY_PRICE_RANGES.get("default")
-    matched_category_key = "default"
-    for cat_key, cat_range in CATEGORY_PRICE_RANGES.items():
-        # Handle cases like "clothing, shoes & jewelry" vs "clothing"
-        if cat_key.split(',')[0] in category_lower:
-            price_range = cat_range
-            matched_category_key = cat_key
-            break
+    # Learned percentile band for the category, or the static range while it is cold
+    price_range = price_model.price_range(listing_data.category)
+    matched_category_key = price_range["matched_category"]
             
     # Price anomaly check
     price_anomaly = False
@@ -941,7 +1312,9 @@ async def perform_comprehensive_monitoring(
         price_anomaly = True
         severity = "critical" if price > price_range["max"] else "high"
         
-        if matched_category_key == "default":
+        if price_range["source"] == "learned":
+            message = f"Suspicious price: ${price}. Typical range for '{listing_data.category}' is ${price_range['min']}-${price_range['max']} (learned from {price_range['samples']} listings)."
+        elif matched_category_key == "default":
             message = f"Suspicious price: ${price}. The price is significantly outside the typical range for products."
         else:
             message = f"Suspicious price: ${price}. Expected range for '{matched_category_key}' is ${price_range['min']}-${price_range['max']}."
@@ -951,17 +1324,13 @@ async def perform_comprehensive_monitoring(
             "severity": severity,
             "message": message
         })
-        risk_score += 0.4
-        print(f"   🚨 CRITICAL: {message}")
-    
-    # This ensures the frontend UI gets the correct status for "Price Analysis"
-    text_analysis["price_anomalies"] = price_anomaly
+        risk.append(0.4)
 
     # Category relevance check
     category_relevance_passed = False
     relevant_keywords = CATEGORY_KEYWORDS.get(matched_category_key, [])
             
-    if not relevant_keywords or any(keyword in text_to_search for keyword in relevant_keywords):
+    if not relevant_keywords or RULE_MATCHER.matches_by_tag(text_to_search, [category_tag(matched_category_key)]):
         category_relevance_passed = True # Pass if category is unknown or keywords match
     
     if not category_relevance_passed:
@@ -971,21 +1340,24 @@ async def perform_comprehensive_monitoring(
             "severity": "high",
             "message": message
         })
-        risk_score += 0.3
-        print(f"   ⚠️  WARNING: {message}")
+        risk.append(0.3)
+
+    return flags, risk, {"price_anomaly": price_anomaly, "matched_category": matched_category_key, "price_range": price_range}
+
+def run_brand_stage(listing_data: ProductListingData) -> Tuple[List[Dict], List[float], Dict]:
+    """Suspicious brand terms and description quality rules."""
+    flags = []
+    risk = []
 
     # 4. Brand Consistency Check
-    print(f"\n🏷️  Checking brand consistency...")
     brand_lower = listing_data.brandName.lower()
-    suspicious_brands = ["fake", "replica", "copy", "imitation", "knockoff", "counterfeit"]
-    if any(brand in brand_lower for brand in suspicious_brands):
+    if RULE_MATCHER.matches_by_tag(brand_lower, [SUSPICIOUS_BRANDS_TAG]):
         flags.append({
             "type": "brand",
             "severity": "critical",
             "message": f"Suspicious brand name: {listing_data.brandName}"
         })
-        risk_score += 0.5
-        print(f"   🚨 CRITICAL: Suspicious brand name: {listing_data.brandName}")
+        risk.append(0.5)
     
     # 5. Description Quality Check
     if len(listing_data.productDescription) < 50 and "lorem ipsum" not in listing_data.productDescription.lower():
@@ -994,8 +1366,61 @@ async def perform_comprehensive_monitoring(
             "severity": "medium",
             "message": "Description too short - suspicious"
         })
-        risk_score += 0.1
-        print(f"   ⚠️  WARNING: Description too short ({len(listing_data.productDescription)} characters)")
+        risk.append(0.1)
+
+    return flags, risk, {"brand_suspicious": brand_lower in SUSPICIOUS_BRANDS}
+
+async def _timed(stage_timings: Dict[str, float], name: str, awaitable):
+    started = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        stage_timings[name] = round((time.perf_counter() - started) * 1000, 2)
+
+def _timed_call(stage_timings: Dict[str, float], name: str, fn, *args):
+    started = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        stage_timings[name] = round((time.perf_counter() - started) * 1000, 2)
+
+async def perform_comprehensive_monitoring(
+    listing_data: ProductListingData, 
+    product_id: str, 
+    seller_id: str,
+    session: Optional[ListingSession] = None
+) -> MonitoringResult:
+    """Perform comprehensive AI monitoring on the product listing - REAL ML VERSION
+
+    The image and text model stages are independent and run concurrently, so
+    latency follows the slower of the two; per-stage wall time in milliseconds
+    is reported under ai_analysis["stage_timings"]. With the seller's listing
+    session, image and text analyses whose inputs did not change since the
+    /monitor/step calls are reused instead of recomputed.
+    """
+    
+    monitoring_events.info("monitoring.start", product_id=product_id, brand=listing_data.brandName,
+                           title=listing_data.productTitle)
+
+    stage_timings = {}
+    started = time.perf_counter()
+    (image_flags, image_risk, ml_analysis), (text_flags, text_risk, text_analysis) = await asyncio.gather(
+        _timed(stage_timings, "image", run_image_stage(listing_data, session)),
+        _timed(stage_timings, "text", run_text_stage(listing_data, session)),
+    )
+    pricing_flags, pricing_risk, pricing = _timed_call(stage_timings, "pricing_category", run_pricing_stage, listing_data)
+    brand_flags, brand_risk, brand = _timed_call(stage_timings, "brand", run_brand_stage, listing_data)
+    stage_timings["total"] = round((time.perf_counter() - started) * 1000, 2)
+
+    # Merge in the original stage order so flags and the risk sum are unchanged
+    flags = image_flags + text_flags + pricing_flags + brand_flags
+    risk_score = 0.0
+    for increment in image_risk + text_risk + pricing_risk + brand_risk:
+        risk_score += increment
+
+    price_anomaly = pricing["price_anomaly"]
+    # This ensures the frontend UI gets the correct status for "Price Analysis"
+    text_analysis["price_anomalies"] = price_anomaly
     
     # Determine risk level based on REAL ML results + rules
     if risk_score >= 0.8:
@@ -1007,14 +1432,10 @@ async def perform_comprehensive_monitoring(
     else:
         risk_level = "low"
     
-    print(f"\n📊 FINAL RISK ASSESSMENT:")
-    print(f"   Risk Score: {risk_score:.4f}")
-    print(f"   Risk Level: {risk_level.upper()}")
-    print(f"   Total Flags: {len(flags)}")
     
     # Create monitoring flag if risk is medium or higher
     if risk_level in ["medium", "high", "critical"]:
-        create_flag({
+        await run_io(create_flag, {
             "title": f"High Risk Product Listing - {listing_data.brandName}",
             "severity": "High" if risk_level == "high" else "Critical" if risk_level == "critical" else "Medium",
             "risk": "Counterfeit",
@@ -1024,7 +1445,6 @@ async def perform_comprehensive_monitoring(
             "product_id": product_id,
             "seller_id": seller_id
         })
-        print(f"   🚩 Monitoring flag created for {risk_level} risk level")
     
     # Generate recommendations based on REAL analysis
     recommendations = []
@@ -1043,11 +1463,12 @@ async def perform_comprehensive_monitoring(
     if price_anomaly:
         recommendations.append("Verify pricing accuracy - suspicious price")
     
-    if brand_lower in suspicious_brands:
+    if brand["brand_suspicious"]:
         recommendations.append("Brand name appears suspicious - verify authenticity")
     
-    print(f"   💡 Recommendations: {len(recommendations)} generated")
-    print("="*60)
+    monitoring_events.info("monitoring.result", product_id=product_id, risk_score=round(risk_score, 4),
+                           risk_level=risk_level, flags=len(flags), recommendations=len(recommendations),
+                           stage_timings_ms=stage_timings)
     
     return MonitoringResult(
         product_id=product_id,
@@ -1058,7 +1479,9 @@ async def perform_comprehensive_monitoring(
         ai_analysis={
             "ml_analysis": ml_analysis,
             "text_analysis": text_analysis,
-            "brand_authenticity_score": ml_analysis.get("authenticity_score", 0.5)
+            "brand_authenticity_score": ml_analysis.get("authenticity_score", 0.5),
+            "price_range": pricing["price_range"],
+            "stage_timings": stage_timings
         },
         recommendations=recommendations
     )
@@ -1069,12 +1492,21 @@ async def perform_comprehensive_monitoring(
 async def monitor_listing_step(request: Dict):
     """Monitor individual steps during product listing - REAL ML VERSION"""
     try:
-        logger.info(f"Received step monitoring request: {request}")
+        events.debug("monitor_step.request", request=request)
         
         step_data = request.get("step_data", {})
         step_number = request.get("step_number", 1)
         product_id = request.get("product_id", "unknown")
         
+        # Steps resent with unchanged data return the stored result
+        session = listing_sessions.get_or_create(product_id) if product_id != "unknown" else None
+        step_hash = input_hash(step_number, step_data)
+        if session is not None:
+            previous = session.step_result(step_number, step_hash)
+            if previous is not None:
+                logger.info(f"Step {step_number} unchanged for product {product_id}, reusing result")
+                return {**previous, "reused": True}
+
         monitoring_result = {
             "step": step_number,
             "product_id": product_id,
@@ -1121,11 +1553,8 @@ async def monitor_listing_step(request: Dict):
                     "freeShipping": False
                 }
                 
-                # Use ML text analysis
-                text_analysis = analyze_text_with_ml(
-                    f"{brand_name} {product_title}",
-                    ProductListingData(**minimal_data)
-                )
+                # Use ML text analysis; stored in the session so /submit/listing can reuse it
+                text_analysis = await analyze_listing_text(session, ProductListingData(**minimal_data))
                 
                 if text_analysis["suspicious_keywords"]:
                     monitoring_result["warnings"].append(f"CRITICAL: ML detected suspicious keywords: {', '.join(text_analysis['suspicious_keywords'])}")
@@ -1170,7 +1599,7 @@ async def monitor_listing_step(request: Dict):
                     "freeShipping": False
                 }
                 
-                text_analysis = analyze_text_with_ml(manufacturer, ProductListingData(**minimal_data))
+                text_analysis = await run_cpu(analyze_text_with_ml, manufacturer, ProductListingData(**minimal_data))
                 
                 if text_analysis["suspicious_keywords"]:
                     monitoring_result["warnings"].append("ML detected suspicious manufacturer information")
@@ -1188,23 +1617,30 @@ async def monitor_listing_step(request: Dict):
                 main_image = step_data["mainImage"]
                 if main_image:
                     try:
-                        # Use ML image analysis
-                        if main_image.startswith('data:image'):
-                            image_data_clean = main_image.split(',')[1]
-                            image_bytes = base64.b64decode(image_data_clean)
-                        else:
-                            image_bytes = base64.b64decode(main_image)
-                        
-                        processed_image = preprocess_image(image_bytes, target_size=(IMAGE_SIZE_W, IMAGE_SIZE_H))
-                        processed_brand = get_embedded_sequence_for_inference(step_data.get("brandName", ""), word2vec_model_wv, MAX_SEQUENCE_LEN, EMBEDDING_DIM)
-                        processed_tagline = get_embedded_sequence_for_inference(step_data.get("productTitle", ""), word2vec_model_wv, MAX_SEQUENCE_LEN, EMBEDDING_DIM)
-                        
-                        prediction_output = ml_model.predict([processed_image, processed_brand, processed_tagline])
-                        authenticity_score = float(prediction_output[0][0])
+                        # Use ML image analysis; scores every image so /submit/listing can reuse them
+                        image_results = await score_listing_images(
+                            session,
+                            main_image,
+                            step_data.get("additionalImages") or [],
+                            step_data.get("brandName", ""),
+                            step_data.get("productTitle", "")
+                        )
+                        if image_results[0]["error"]:
+                            raise ValueError(image_results[0]["error"])
+                        authenticity_score = image_results[0]["score"]
                         
                         if authenticity_score < 0.7:
                             monitoring_result["warnings"].append(f"ML model detected potential counterfeit image (score: {authenticity_score:.4f})")
                             monitoring_result["risk_score"] += 0.5
+
+                        low_additional = [
+                            f"{number} ({result['score']:.4f})"
+                            for number, result in enumerate(image_results[1:], 1)
+                            if result["score"] is not None and result["score"] < 0.7
+                        ]
+                        if low_additional:
+                            monitoring_result["warnings"].append(f"ML model detected potential counterfeit additional images: {', '.join(low_additional)}")
+                            monitoring_result["risk_score"] += 0.5
                         
                     except Exception as e:
                         monitoring_result["warnings"].append(f"Image analysis failed: {str(e)}")
@@ -1216,6 +1652,8 @@ async def monitor_listing_step(request: Dict):
         elif monitoring_result["risk_score"] > 0.4:
             monitoring_result["recommendations"].append("Medium risk detected - review recommended")
         
+        if session is not None:
+            session.store_step(step_number, step_hash, monitoring_result)
         logger.info(f"Step {step_number} monitoring completed for product {product_id}")
         return monitoring_result
         
@@ -1223,6 +1661,24 @@ async def monitor_listing_step(request: Dict):
         logger.error(f"Error in step monitoring: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/uploads/images")
+async def upload_listing_image(image: UploadFile = File(...)):
+    """Stream one image to temporary storage and return a ref for a listing's image fields"""
+    try:
+        return await save_upload(image)
+    except UploadLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ImageUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/uploads/images/{upload_id}")
+async def get_listing_image(upload_id: str):
+    try:
+        path = await run_io(upload_path, upload_id)
+        return FileResponse(path, media_type=await run_io(upload_media_type, path))
+    except ImageUploadError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
 @app.post("/submit/listing")
 async def submit_product_listing(request: Dict):
     """Submit final product listing with comprehensive AI monitoring"""
@@ -1233,116 +1689,247 @@ async def submit_product_listing(request: Dict):
         # Convert dict to ProductListingData object
         listing_data = ProductListingData(**listing_data_dict)
         
-        product_id = str(uuid.uuid4())
-        timestamp = datetime.now().isoformat()
-        
-        logger.info(f"Processing product listing submission for seller {seller_id}")
-        
-        # Comprehensive AI monitoring
-        monitoring_result = await perform_comprehensive_monitoring(listing_data, product_id, seller_id)
-        
-        # Create listed product
-        listed_product = ListedProduct(
-            id=product_id,
-            listing_data=listing_data,
-            monitoring_result=monitoring_result,
-            created_at=timestamp,
-            status="active" if monitoring_result.risk_level in ["low", "medium"] else "flagged"
-        )
-        
-        listed_products.append(listed_product)
-        
-        # Print all details to terminal
-        print("\n" + "="*80)
-        print("PRODUCT LISTING SUBMITTED")
-        print("="*80)
-        print(f"Product ID: {product_id}")
-        print(f"Seller ID: {seller_id}")
-        print(f"Timestamp: {timestamp}")
-        print(f"Brand: {listing_data.brandName}")
-        print(f"Product Title: {listing_data.productTitle}")
-        print(f"Price: ${listing_data.price}")
-        print(f"Category: {listing_data.category}")
-        print(f"Condition: {listing_data.condition}")
-        print(f"Fulfillment: {listing_data.fulfillmentType}")
-        print(f"Quantity: {listing_data.quantity}")
-        print(f"Country of Origin: {listing_data.countryOfOrigin}")
-        print(f"Manufacturer: {listing_data.manufacturer}")
-        print(f"Part Number: {listing_data.partNumber}")
-        print(f"Model Number: {listing_data.modelNumber}")
-        print(f"Description: {listing_data.productDescription[:100]}...")
-        print(f"Bullet Points: {listing_data.bulletPoints}")
-        print(f"Has Variations: {listing_data.hasVariations}")
-        print(f"Variation Type: {listing_data.variationType}")
-        print(f"Variations: {listing_data.variations}")
-        print(f"Main Image: {truncate_image_url(listing_data.mainImage, 30)}")
-        print(f"Additional Images: {len(listing_data.additionalImages)}")
-        print(f"Shipping Template: {listing_data.shippingTemplate}")
-        print(f"Handling Time: {listing_data.handlingTime}")
-        print(f"Shipping Weight: {listing_data.shippingWeight}")
-        print(f"Shipping Dimensions: {listing_data.shippingDimensions}")
-        print(f"Shipping Service: {listing_data.shippingService}")
-        print(f"Free Shipping: {listing_data.freeShipping}")
-        print("\nAI MONITORING RESULTS:")
-        print(f"Risk Level: {monitoring_result.risk_level}")
-        print(f"Risk Score: {monitoring_result.overall_risk_score}")
-        print(f"Flags: {len(monitoring_result.flags)}")
-        
-        # Show ML analysis results
-        ml_analysis = monitoring_result.ai_analysis.get("ml_analysis", {})
-        if ml_analysis.get("ml_model_used", False):
-            print(f"\nML MODEL ANALYSIS:")
-            print(f"  Authenticity Score: {ml_analysis.get('authenticity_score', 0):.4f}")
-            print(f"  Predicted Label: {ml_analysis.get('predicted_label', 'Unknown')}")
-            print(f"  Visual Analysis: {ml_analysis.get('visual_analysis', 'N/A')}")
-            print(f"  Text Analysis: {ml_analysis.get('text_analysis', 'N/A')}")
-            print(f"  Similarity Check: {ml_analysis.get('similarity_check', 'N/A')}")
-            print(f"  Summary: {ml_analysis.get('summary', 'N/A')}")
-        else:
-            print(f"\nML MODEL ANALYSIS: {ml_analysis.get('error', 'Not available')}")
-        
-        # Show all flags
-        if monitoring_result.flags:
-            print(f"\nDETECTED FLAGS:")
-            for i, flag in enumerate(monitoring_result.flags, 1):
-                print(f"  {i}. [{flag.get('severity', 'unknown').upper()}] {flag.get('message', 'No message')}")
-        
-        print(f"\nRecommendations: {monitoring_result.recommendations}")
-        print("="*80)
-        
-        return {
-            "product_id": product_id,
-            "status": "success",
-            "monitoring_result": monitoring_result.dict(),
-            "message": "Product listing submitted successfully"
-        }
+        return await process_listing_submission(listing_data, seller_id, request.get("product_id"))
         
     except Exception as e:
         logger.error(f"Error in product listing submission: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/submit/listing/multipart")
+async def submit_product_listing_multipart(
+    listing_data: str = Form(...),
+    seller_id: str = Form("unknown"),
+    product_id: Optional[str] = Form(None),
+    main_image: Optional[UploadFile] = File(None),
+    additional_images: List[UploadFile] = File([])
+):
+    """Submit a listing as multipart form data with the images as binary file parts.
+
+    listing_data is the listing JSON; its image fields may be left empty or
+    hold upload refs. Uploaded files are streamed to storage and replace the
+    corresponding fields, so no base64 image is ever parsed from JSON.
+    """
+    try:
+        listing_data_dict = json.loads(listing_data)
+        if main_image is not None:
+            listing_data_dict["mainImage"] = (await save_upload(main_image))["ref"]
+        if additional_images:
+            listing_data_dict["additionalImages"] = list(listing_data_dict.get("additionalImages") or [])
+            for upload in additional_images:
+                listing_data_dict["additionalImages"].append((await save_upload(upload))["ref"])
+        listing_data_dict.setdefault("mainImage", "")
+        listing_data_dict.setdefault("additionalImages", [])
+    except UploadLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ImageUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"listing_data is not valid JSON: {e}")
+
+    try:
+        return await process_listing_submission(ProductListingData(**listing_data_dict), seller_id, product_id)
+    except Exception as e:
+        logger.error(f"Error in product listing submission: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def process_listing_submission(listing_data: ProductListingData, seller_id: str, session_id: Optional[str] = None) -> Dict:
+    """Monitor and store a submitted listing; shared by the JSON and multipart submit endpoints"""
+    product_id = str(uuid.uuid4())
+    timestamp = datetime.now().isoformat()
+    
+    logger.info(f"Processing product listing submission for seller {seller_id}")
+    
+    # Reuse analyses from the wizard's /monitor/step session, if the client sent its id
+    session = listing_sessions.get(session_id)
+
+    # Comprehensive AI monitoring
+    monitoring_result = await perform_comprehensive_monitoring(listing_data, product_id, seller_id, session)
+    if session is not None:
+        listing_sessions.discard(session_id)
+    
+    # Create listed product
+    listed_product = ListedProduct(
+        id=product_id,
+        listing_data=listing_data,
+        monitoring_result=monitoring_result,
+        created_at=timestamp,
+        status="active" if monitoring_result.risk_level in ["low", "medium"] else "flagged"
+    )
+    
+    product_document = {**convert_numpy_types(listed_product.dict()), "seller_id": seller_id}
+    await run_io(products_collection.insert_one, product_document)
+    product_index.add(product_document)
+    if listed_product.status == "active":
+        price_model.observe(listing_data.category, listing_data.price)
+
+    # Uploaded images referenced by a listed product are no longer temporary
+    for image in [listing_data.mainImage, *listing_data.additionalImages]:
+        if is_upload_ref(image):
+            keep_upload(image)
+    
+    ml_analysis = monitoring_result.ai_analysis.get("ml_analysis", {})
+    events.info(
+        "listing.submitted",
+        product_id=product_id,
+        seller_id=seller_id,
+        brand=listing_data.brandName,
+        title=listing_data.productTitle,
+        price=listing_data.price,
+        category=listing_data.category,
+        main_image=listing_data.mainImage,
+        additional_images=len(listing_data.additionalImages),
+        risk_level=monitoring_result.risk_level,
+        risk_score=monitoring_result.overall_risk_score,
+        authenticity_score=ml_analysis.get("authenticity_score"),
+        ml_model_used=ml_analysis.get("ml_model_used", False),
+        flags=[f"[{flag.get('severity', 'unknown')}] {flag.get('message', '')}" for flag in monitoring_result.flags],
+    )
+    
+    return {
+        "product_id": product_id,
+        "status": "success",
+        "monitoring_result": monitoring_result.dict(),
+        "message": "Product listing submitted successfully"
+    }
+
+# --- Asynchronous listing submission ---
+
+async def run_listing_job(payload: Dict) -> Dict:
+    return await process_listing_submission(payload["listing_data"], payload["seller_id"], payload["session_id"])
+
+listing_jobs = ListingJobManager(run_listing_job)
+
+SSE_HEARTBEAT_SECONDS = 15
+
+@app.post("/submit/listing/jobs", status_code=202)
+async def submit_product_listing_job(request: Dict):
+    """Queue a listing submission and return at once; poll the job or stream its events for the result"""
+    try:
+        listing_data = ProductListingData(**request.get("listing_data", {}))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid listing_data: {e}")
+    try:
+        job = listing_jobs.submit({
+            "listing_data": listing_data,
+            "seller_id": request.get("seller_id", "unknown"),
+            "session_id": request.get("product_id"),
+        })
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/submit/listing/jobs/{job.id}",
+        "events_url": f"/submit/listing/jobs/{job.id}/events",
+    }
+
+@app.get("/submit/listing/jobs/{job_id}")
+async def get_product_listing_job(job_id: str):
+    job = listing_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.delete("/submit/listing/jobs/{job_id}")
+async def cancel_product_listing_job(job_id: str):
+    job = await listing_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"job_id": job.id, "status": job.status}
+
+@app.get("/submit/listing/jobs/{job_id}/events")
+async def stream_product_listing_job(job_id: str):
+    """Server-sent events: a "status" event on every change, then a final "result" event"""
+    job = listing_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        seen_version = -1
+        while True:
+            if job.version != seen_version:
+                seen_version = job.version
+                if job.finished:
+                    yield f"event: result\ndata: {json.dumps(convert_numpy_types(job.to_dict()), default=str)}\n\n"
+                    return
+                yield f"event: status\ndata: {json.dumps({'job_id': job.id, 'status': job.status})}\n\n"
+            elif not await listing_jobs.wait_for_change(job, seen_version, SSE_HEARTBEAT_SECONDS):
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/price-model")
+def get_price_model_state():
+    """Export the learned per-category price sketches"""
+    return {"stats": price_model.stats(), "state": price_model.export_state()}
+
+@app.put("/price-model")
+def import_price_model_state(state: Dict):
+    """Replace the learned price sketches with a previously exported state"""
+    try:
+        price_model.import_state(state.get("state", state))
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid price model state: {e}")
+    return price_model.stats()
+
+@app.get("/stats/logging")
+def get_logging_stats():
+    """Log queue depth and records dropped because the queue was full"""
+    return logging_stats()
+
+@app.get("/stats/jobs")
+def get_job_stats():
+    """Queue depth and job counts for asynchronous listing submission"""
+    return listing_jobs.stats()
+
+def product_summary(product: Dict) -> Dict:
+    summary = project(product, PRODUCT_SUMMARY_FIELDS)
+    main_image = (product.get("listing_data") or {}).get("mainImage") or ""
+    if main_image and not main_image.startswith("data:"):
+        summary.setdefault("listing_data", {})["mainImage"] = evidence_image(main_image)
+    return summary
+
 @app.get("/products/search")
-async def search_products(keyword: str = ""):
-    """Search listed products by keyword"""
+async def search_products(
+    keyword: str = "",
+    category: str = "",
+    seller_id: str = "",
+    status: str = "",
+    risk_level: str = "",
+    limit: int = SEARCH_DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+    fields: str = "",
+    view: str = "summary",
+):
+    """Search listed products by keyword (tokens and prefixes), ranked and paginated.
+
+    Pass next_cursor back as cursor for the next page. view=summary (default)
+    returns listing basics and the risk level, with the main image only when it
+    is a URL rather than inline data; view=full returns whole documents. fields
+    is a comma-separated list of dotted paths to return instead (e.g.
+    "id,listing_data.productTitle,status").
+    """
+    if view not in ("summary", "full"):
+        raise HTTPException(status_code=400, detail=f"Unsupported view: {view}")
     try:
-        if not keyword:
-            return {"products": [p.dict() for p in listed_products]}
-        
-        # Simple keyword search
-        filtered_products = []
-        keyword_lower = keyword.lower()
-        
-        for product in listed_products:
-            title = product.listing_data.productTitle.lower()
-            brand = product.listing_data.brandName.lower()
-            description = product.listing_data.productDescription.lower()
-            
-            if (keyword_lower in title or 
-                keyword_lower in brand or 
-                keyword_lower in description):
-                filtered_products.append(product)
-        
-        return {"products": [p.dict() for p in filtered_products]}
+        page = product_index.search(
+            keyword,
+            filters={"category": category, "seller_id": seller_id, "status": status, "risk_level": risk_level},
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        documents = {doc["id"]: doc for doc in await run_io(products_collection.find, {"id": {"$in": page["ids"]}})}
+        projection = [field.strip() for field in fields.split(",") if field.strip()]
+        if projection:
+            products = [project(documents[product_id], projection) for product_id in page["ids"] if product_id in documents]
+        elif view == "summary":
+            products = [product_summary(documents[product_id]) for product_id in page["ids"] if product_id in documents]
+        else:
+            products = [documents[product_id] for product_id in page["ids"] if product_id in documents]
+        return {"products": products, "total": page["total"], "next_cursor": page["next_cursor"]}
         
     except Exception as e:
         logger.error(f"Error in product search: {e}")
@@ -1352,20 +1939,22 @@ async def search_products(keyword: str = ""):
 async def get_product_details(product_id: str):
     """Get detailed product information including monitoring results"""
     try:
-        for product in listed_products:
-            if product.id == product_id:
-                return product.dict()
+        product = await run_io(products_collection.find_one, {"id": product_id})
+        if product is not None:
+            return product
         
         raise HTTPException(status_code=404, detail="Product not found")
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting product details: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/monitoring/flags")
-async def get_monitoring_flags():
+def get_monitoring_flags():
     """Get all monitoring flags"""
-    return {"flags": monitoring_flags}
+    return {"flags": monitoring_flags_collection.find()}
 
 @app.get("/test")
 async def test_endpoint():
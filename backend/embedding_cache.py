@@ -0,0 +1,126 @@
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from inference_executor import run_io
+
+# Cache limits, overridable from the environment
+EMBEDDING_CACHE_SIZE = int(os.environ.get("EMBEDDING_CACHE_SIZE", 2048))
+EMBEDDING_URL_TTL = float(os.environ.get("EMBEDDING_URL_TTL", 3600))
+EMBEDDING_CACHE_DIR = os.environ.get("EMBEDDING_CACHE_DIR")  # Unset disables the on-disk store
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+class EmbeddingCache:
+    """Content-addressed store for image embeddings.
+
+    Embeddings are keyed by the SHA-256 of the image bytes and kept in an LRU
+    map, optionally backed by one .npy file per hash on disk. A second, smaller
+    map remembers which content hash a URL resolved to, so a known URL skips
+    both the download and the forward pass until its entry expires. Concurrent
+    lookups for the same key share a single computation. Only the in-memory
+    maps are touched on the event loop; disk reads and writes go through run_io.
+    """
+
+    def __init__(self, max_entries: int = EMBEDDING_CACHE_SIZE, url_ttl: float = EMBEDDING_URL_TTL,
+                 disk_dir: Optional[str] = EMBEDDING_CACHE_DIR):
+        self.max_entries = max_entries
+        self.url_ttl = url_ttl
+        self.disk_dir = disk_dir
+        self._embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._urls: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}  # Shared compute tasks
+        self.hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.npy")
+
+    async def get(self, key: str) -> Optional[np.ndarray]:
+        """Return the embedding for a content hash from memory or disk, or None."""
+        embedding = self._embeddings.get(key)
+        if embedding is None and self.disk_dir:
+            embedding = await run_io(self._load, key)
+            if embedding is not None:
+                self._remember(key, embedding)
+        if embedding is None:
+            self.misses += 1
+            return None
+        self._embeddings.move_to_end(key)
+        self.hits += 1
+        return embedding
+
+    async def put(self, key: str, embedding: np.ndarray):
+        self._remember(key, embedding)
+        if self.disk_dir:
+            await run_io(np.save, self._disk_path(key), embedding)
+
+    def _load(self, key: str) -> Optional[np.ndarray]:
+        path = self._disk_path(key)
+        return np.load(path) if os.path.exists(path) else None
+
+    def _remember(self, key: str, embedding: np.ndarray):
+        self._embeddings[key] = embedding
+        self._embeddings.move_to_end(key)
+        while len(self._embeddings) > self.max_entries:
+            self._embeddings.popitem(last=False)
+
+    async def get_by_url(self, url: str) -> Optional[np.ndarray]:
+        """Return the embedding last seen at url if the mapping has not expired."""
+        entry = self._urls.get(url)
+        if entry is None:
+            return None
+        key, seen_at = entry
+        if time.monotonic() - seen_at > self.url_ttl:
+            del self._urls[url]
+            return None
+        self._urls.move_to_end(url)
+        return await self.get(key)
+
+    def remember_url(self, url: str, key: str):
+        self._urls[url] = (key, time.monotonic())
+        self._urls.move_to_end(url)
+        while len(self._urls) > self.max_entries:
+            self._urls.popitem(last=False)
+
+    async def single_flight(self, key: str, compute: Callable[[], Awaitable[np.ndarray]]) -> np.ndarray:
+        """Run compute once for concurrent callers using the same key and share its result.
+
+        compute runs in its own task, so a caller that is cancelled (e.g. its
+        client disconnected) stops waiting without cancelling the work the
+        other callers are waiting on.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish_flight(key, done))
+        return await asyncio.shield(task)
+
+    def _finish_flight(self, key: str, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved even if every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict:
+        return {
+            "entries": len(self._embeddings),
+            "urls": len(self._urls),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_dir": self.disk_dir,
+        }
+
+# Process-wide cache for ViT image embeddings
+image_embedding_cache = EmbeddingCache()
@@ -0,0 +1,184 @@
+"""Structured, hot-path-safe logging.
+
+Request handlers log events (a name plus keyword fields) instead of
+preformatted strings. An event whose level is disabled or that is sampled
+out costs one level check and one random draw; everything else is shipped
+as a record through a bounded queue to a listener thread, which does the
+truncation, redaction and formatting off the request path. When the queue
+is full records are dropped and counted rather than blocking the caller.
+
+Configuration (environment):
+    LOG_LEVEL             root level, default INFO
+    LOG_LEVELS            per-logger levels, e.g. "review_logic=WARNING,monitoring=DEBUG"
+    LOG_SAMPLE_RATES      per-event sampling by name prefix, e.g. "monitoring.stage=0.1"
+    LOG_FORMAT            "text" (default) or "json"
+    LOG_MAX_FIELD_CHARS   strings longer than this are truncated, default 200
+    LOG_QUEUE_SIZE        pending records before dropping, default 10000
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from typing import Any, Dict
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.environ.get("LOG_LEVELS", "")
+LOG_SAMPLE_RATES = os.environ.get("LOG_SAMPLE_RATES", "")
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text").lower()
+LOG_MAX_FIELD_CHARS = int(os.environ.get("LOG_MAX_FIELD_CHARS", 200))
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", 10000))
+LOG_MAX_LIST_ITEMS = 20
+
+def _parse_pairs(spec: str) -> Dict[str, str]:
+    pairs = {}
+    for item in spec.split(","):
+        if "=" in item:
+            key, value = item.split("=", 1)
+            pairs[key.strip()] = value.strip()
+    return pairs
+
+_sample_rates = {prefix: float(rate) for prefix, rate in _parse_pairs(LOG_SAMPLE_RATES).items()}
+
+def redact(value: Any, max_chars: int = LOG_MAX_FIELD_CHARS) -> Any:
+    """Copy of value with long strings truncated, data URLs summarized and long lists cut."""
+    if isinstance(value, str):
+        if value.startswith("data:") and "," in value[:100]:
+            return f"<{value.split(',', 1)[0]}, {len(value)} chars>"
+        if len(value) > max_chars:
+            return f"{value[:max_chars]}...<{len(value)} chars>"
+        return value
+    if isinstance(value, dict):
+        return {key: redact(item, max_chars) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [redact(item, max_chars) for item in value[:LOG_MAX_LIST_ITEMS]]
+        if len(value) > LOG_MAX_LIST_ITEMS:
+            items.append(f"<{len(value) - LOG_MAX_LIST_ITEMS} more>")
+        return items
+    if hasattr(value, "dict") and callable(value.dict):  # pydantic models
+        return redact(value.dict(), max_chars)
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return redact(str(value), max_chars)
+
+class EventFormatter(logging.Formatter):
+    """Formats records in the listener thread; event records get their fields redacted."""
+
+    def __init__(self, json_output: bool = False):
+        super().__init__()
+        self.json_output = json_output
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = getattr(record, "event", None)
+        fields = redact(getattr(record, "fields", {}))
+        message = event if event is not None else redact(record.getMessage(), LOG_MAX_FIELD_CHARS * 5)
+        if self.json_output:
+            payload = {"time": self.formatTime(record), "level": record.levelname, "logger": record.name,
+                       "event" if event is not None else "message": message, **fields}
+            if record.exc_info:
+                payload["exception"] = self.formatException(record.exc_info)
+            return json.dumps(payload, default=str)
+        line = f"{self.formatTime(record)} - {record.levelname} - {record.name} - {message}"
+        if fields:
+            line += " " + " ".join(f"{key}={json.dumps(value, default=str)}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks or formats: records go to the listener as-is, or are dropped when full."""
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve %-style args now so later mutation of the arguments cannot change the message
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+class EventLogger:
+    """Thin wrapper over a stdlib logger for structured events.
+
+    events.info("listing.submitted", product_id=..., risk_level=...) logs the
+    event name with its fields; nothing is formatted unless the level is
+    enabled and the event survives sampling (`sample=` or LOG_SAMPLE_RATES).
+    """
+
+    def __init__(self, name: str):
+        self.logger = logging.getLogger(name)
+
+    def is_enabled(self, level: int) -> bool:
+        return self.logger.isEnabledFor(level)
+
+    def log(self, level: int, event: str, sample: float = None, exc_info=None, **fields):
+        if not self.logger.isEnabledFor(level):
+            return
+        rate = sample if sample is not None else _sample_rate(event)
+        if rate < 1.0 and random.random() >= rate:
+            return
+        self.logger.log(level, event, exc_info=exc_info, extra={"event": event, "fields": fields})
+
+    def debug(self, event: str, **fields):
+        self.log(logging.DEBUG, event, **fields)
+
+    def info(self, event: str, **fields):
+        self.log(logging.INFO, event, **fields)
+
+    def warning(self, event: str, **fields):
+        self.log(logging.WARNING, event, **fields)
+
+    def error(self, event: str, **fields):
+        self.log(logging.ERROR, event, **fields)
+
+def _sample_rate(event: str) -> float:
+    if not _sample_rates:
+        return 1.0
+    best, rate = -1, 1.0
+    for prefix, prefix_rate in _sample_rates.items():
+        if event.startswith(prefix) and len(prefix) > best:
+            best, rate = len(prefix), prefix_rate
+    return rate
+
+def get_event_logger(name: str) -> EventLogger:
+    return EventLogger(name)
+
+_listener = None
+
+def configure_logging():
+    """Route all logging through a bounded queue to one stdout writer thread; safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        return
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(EventFormatter(json_output=LOG_FORMAT == "json"))
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(DroppingQueueHandler(log_queue))
+    root.setLevel(LOG_LEVEL)
+    for name, level in _parse_pairs(LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _listener.start()
+    atexit.register(_listener.stop)
+
+def logging_stats() -> Dict:
+    return {
+        "queued": _listener.queue.qsize() if _listener is not None else 0,
+        "queue_size": LOG_QUEUE_SIZE,
+        "dropped": DroppingQueueHandler.dropped,
+    }
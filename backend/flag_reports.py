@@ -0,0 +1,159 @@
+"""Background generation and caching of AI flag reports.
+
+A report is generated for one content version of a flag: a hash of every
+field except the report itself. create_flag() schedules generation right
+away on a small dedicated pool, so the LLM round trip happens off the
+request path and never competes with image fetches for io_executor threads.
+The finished report is written back to the flag document (ai_analysis plus
+ai_analysis_version); a GET then only compares versions. When the flag has
+changed since its report was written, the old report is still served with
+status "pending" while the new one is generated.
+
+generate() raises when no report could be produced; the version is then
+"failed" and not retried for FLAG_REPORT_RETRY_AFTER seconds. A report that
+is streamed to an admin is produced under the same key with claim(), so a
+GET during the stream does not start a second generation, and a second
+viewer waits for the first one's result.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+from listing_sessions import input_hash
+
+logger = logging.getLogger(__name__)
+
+# Report generation settings, overridable from the environment
+FLAG_REPORT_WORKERS = int(os.environ.get("FLAG_REPORT_WORKERS", 2))
+FLAG_REPORT_RETRY_AFTER = float(os.environ.get("FLAG_REPORT_RETRY_AFTER", 60))  # Seconds before a failed report is retried
+
+# Flag fields that are not part of its content version
+REPORT_FIELDS = ("ai_analysis", "ai_analysis_version", "ai_analysis_generated_at")
+
+READY, PENDING, FAILED = "ready", "pending", "failed"
+
+def report_version(flag: Dict) -> str:
+    return input_hash({key: value for key, value in flag.items() if key not in REPORT_FIELDS})
+
+class FlagReportManager:
+    """Generates one report per flag content version and stores it with save(flag_id, fields)."""
+
+    def __init__(self, generate: Callable[[Dict], str], save: Callable[[str, Dict], None],
+                 workers: int = FLAG_REPORT_WORKERS):
+        self.generate = generate
+        self.save = save
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="flag-report")
+        self._pending: Dict[Tuple[str, str], Future] = {}
+        self._failures: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        self.generated = 0
+        self.failed = 0
+
+    def schedule(self, flag: Dict) -> Optional[Future]:
+        """Start generating a report for the flag's current version unless one is running or recently failed."""
+        key = (flag["id"], report_version(flag))
+        snapshot = {k: v for k, v in flag.items() if k not in REPORT_FIELDS}
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+            failed_at = self._failures.get(key)
+            if failed_at is not None and time.time() - failed_at < FLAG_REPORT_RETRY_AFTER:
+                return None
+            future = self._pending[key] = self._executor.submit(self._run, key, snapshot)
+        return future
+
+    def claim(self, flag: Dict) -> Tuple[Optional[Future], bool]:
+        """Future for the flag's current report and whether the caller has to produce it.
+
+        Returns the running generation's future (False) when there is one, None
+        (False) when the version failed recently, and otherwise registers a new
+        future (True) that the caller must settle with finish() or fail().
+        """
+        key = (flag["id"], report_version(flag))
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key], False
+            failed_at = self._failures.get(key)
+            if failed_at is not None and time.time() - failed_at < FLAG_REPORT_RETRY_AFTER:
+                return None, False
+            future = self._pending[key] = Future()
+            future.set_running_or_notify_cancel()
+        return future, True
+
+    def finish(self, flag: Dict, report: str):
+        """Save a claimed report and hand it to anyone waiting on the claim."""
+        key = (flag["id"], report_version(flag))
+        try:
+            self._save_report(key[0], key[1], report)
+        except Exception as e:
+            self.fail(flag, e)
+            raise
+        with self._lock:
+            self._failures.pop(key, None)
+            self.generated += 1
+            future = self._pending.pop(key, None)
+        if future is not None:
+            future.set_result(report)
+
+    def fail(self, flag: Dict, error: Exception, record: bool = True):
+        """Give up a claim; record=False (e.g. the viewer left) allows an immediate retry."""
+        key = (flag["id"], report_version(flag))
+        with self._lock:
+            if record:
+                self._failures[key] = time.time()
+                self.failed += 1
+            future = self._pending.pop(key, None)
+        if future is not None:
+            future.set_exception(error)
+
+    def _run(self, key: Tuple[str, str], flag: Dict) -> str:
+        flag_id, version = key
+        try:
+            report = self.generate(flag)
+            self._save_report(flag_id, version, report)
+            with self._lock:
+                self._failures.pop(key, None)
+                self.generated += 1
+            return report
+        except Exception as e:
+            logger.error(f"Report generation for flag {flag_id} failed: {e}")
+            with self._lock:
+                self._failures[key] = time.time()
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def _save_report(self, flag_id: str, version: str, report: str):
+        self.save(flag_id, {
+            "ai_analysis": report,
+            "ai_analysis_version": version,
+            "ai_analysis_generated_at": time.time(),
+        })
+
+    @staticmethod
+    def is_current(flag: Dict) -> bool:
+        return bool(flag.get("ai_analysis")) and flag.get("ai_analysis_version") == report_version(flag)
+
+    def status(self, flag: Dict) -> str:
+        """READY if the stored report matches the flag's content, else schedules one and returns PENDING or FAILED."""
+        if self.is_current(flag):
+            return READY
+        return PENDING if self.schedule(flag) is not None else FAILED
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "generated": self.generated,
+                "failed": self.failed,
+                "workers": self._executor._max_workers,
+            }
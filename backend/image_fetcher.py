@@ -0,0 +1,87 @@
+import asyncio
+import os
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+# Fetcher limits, overridable from the environment
+IMAGE_FETCH_TIMEOUT = float(os.environ.get("IMAGE_FETCH_TIMEOUT", 10))
+IMAGE_FETCH_CONNECT_TIMEOUT = float(os.environ.get("IMAGE_FETCH_CONNECT_TIMEOUT", 3))
+IMAGE_FETCH_MAX_BYTES = int(os.environ.get("IMAGE_FETCH_MAX_BYTES", 10 * 1024 * 1024))
+IMAGE_FETCH_MAX_CONNECTIONS = int(os.environ.get("IMAGE_FETCH_MAX_CONNECTIONS", 100))
+IMAGE_FETCH_MAX_KEEPALIVE = int(os.environ.get("IMAGE_FETCH_MAX_KEEPALIVE", 20))
+IMAGE_FETCH_PER_HOST = int(os.environ.get("IMAGE_FETCH_PER_HOST", 8))
+
+class ImageFetchError(Exception):
+    """Raised when an image cannot be downloaded within the configured limits."""
+
+class ImageFetcher:
+    """Shared async image downloader.
+
+    Keeps one keep-alive connection pool for the whole process, caps the number
+    of in-flight requests per host so one slow CDN cannot take every
+    connection, and aborts downloads that exceed the timeout or byte limit.
+    """
+
+    def __init__(
+        self,
+        timeout: float = IMAGE_FETCH_TIMEOUT,
+        connect_timeout: float = IMAGE_FETCH_CONNECT_TIMEOUT,
+        max_bytes: int = IMAGE_FETCH_MAX_BYTES,
+        max_connections: int = IMAGE_FETCH_MAX_CONNECTIONS,
+        max_keepalive: int = IMAGE_FETCH_MAX_KEEPALIVE,
+        per_host_limit: int = IMAGE_FETCH_PER_HOST,
+    ):
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self.max_bytes = max_bytes
+        self.per_host_limit = per_host_limit
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created lazily so the client binds to the running event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits, follow_redirects=True)
+        return self._client
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host_limit)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    async def fetch(self, url: str) -> bytes:
+        """Download url and return its body, enforcing the timeout and size limit."""
+        client = self._get_client()
+        async with self._host_semaphore(url):
+            try:
+                async with client.stream("GET", url) as response:
+                    response.raise_for_status()
+                    declared = response.headers.get("content-length")
+                    if declared is not None and declared.isdigit() and int(declared) > self.max_bytes:
+                        raise ImageFetchError(f"Image at {url} is {declared} bytes, limit is {self.max_bytes}")
+
+                    body = bytearray()
+                    async for chunk in response.aiter_bytes():
+                        body.extend(chunk)
+                        if len(body) > self.max_bytes:
+                            raise ImageFetchError(f"Image at {url} exceeds {self.max_bytes} bytes")
+                    return bytes(body)
+            except httpx.HTTPError as e:
+                raise ImageFetchError(f"Failed to fetch {url}: {e}") from e
+
+    async def fetch_many(self, urls: List[str]) -> List[bytes]:
+        """Download several images concurrently; raises on the first failure."""
+        return list(await asyncio.gather(*(self.fetch(url) for url in urls)))
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+# Process-wide fetcher shared by every caller
+image_fetcher = ImageFetcher()
@@ -0,0 +1,183 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import time
+import uuid
+from typing import Dict, Optional
+
+from inference_executor import run_io
+
+logger = logging.getLogger(__name__)
+
+# Upload storage and limits, overridable from the environment
+IMAGE_UPLOAD_DIR = os.environ.get("IMAGE_UPLOAD_DIR", os.path.join("uploads", "images"))
+IMAGE_UPLOAD_MAX_BYTES = int(os.environ.get("IMAGE_UPLOAD_MAX_BYTES", 10 * 1024 * 1024))
+IMAGE_UPLOAD_TTL = float(os.environ.get("IMAGE_UPLOAD_TTL", 24 * 3600))  # For uploads never used by a listing
+IMAGE_UPLOAD_MAX_PENDING = int(os.environ.get("IMAGE_UPLOAD_MAX_PENDING", 1000))  # Uploads not yet used by a listing
+IMAGE_UPLOAD_SWEEP_INTERVAL = float(os.environ.get("IMAGE_UPLOAD_SWEEP_INTERVAL", 3600))
+IMAGE_UPLOAD_CHUNK_BYTES = 256 * 1024
+
+# Listing image fields may hold "upload:<id>" instead of a base64 string
+UPLOAD_REF_PREFIX = "upload:"
+UPLOAD_URL_PREFIX = "/uploads/images/"
+
+_UPLOAD_ID = re.compile(r"^[0-9a-f]{32}$")
+_PENDING = "pending"  # Uploaded, not yet part of a submitted listing
+_KEPT = "kept"        # Referenced by a listed product, never swept
+
+class ImageUploadError(Exception):
+    """Raised for uploads that are not images, exceed the size limit or cannot be found."""
+
+class UploadLimitExceeded(ImageUploadError):
+    """Raised when IMAGE_UPLOAD_MAX_PENDING unused uploads are already stored."""
+
+def is_upload_ref(value: Optional[str]) -> bool:
+    return bool(value) and value.startswith(UPLOAD_REF_PREFIX)
+
+def upload_id_from_ref(ref: str) -> str:
+    upload_id = ref[len(UPLOAD_REF_PREFIX):] if is_upload_ref(ref) else ref
+    if not _UPLOAD_ID.match(upload_id):
+        raise ImageUploadError(f"Invalid upload reference: {ref[:64]}")
+    return upload_id
+
+def upload_path(ref: str) -> str:
+    """Path of an uploaded image, whether still pending or kept by a listing."""
+    upload_id = upload_id_from_ref(ref)
+    for state in (_KEPT, _PENDING):
+        path = os.path.join(IMAGE_UPLOAD_DIR, state, upload_id)
+        if os.path.exists(path):
+            return path
+    raise ImageUploadError(f"Unknown or expired upload: {upload_id}")
+
+def read_upload(ref: str) -> bytes:
+    with open(upload_path(ref), "rb") as f:
+        return f.read()
+
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF8", "image/gif"),
+)
+
+def upload_media_type(path: str) -> str:
+    """Image type from the file signature; uploads are stored without an extension."""
+    with open(path, "rb") as f:
+        head = f.read(12)
+    for signature, media_type in _SIGNATURES:
+        if head.startswith(signature):
+            return media_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+def evidence_image(value: str) -> str:
+    """Value to show as a flag's evidence image: a URL for upload refs, the value itself otherwise."""
+    if is_upload_ref(value):
+        return UPLOAD_URL_PREFIX + upload_id_from_ref(value)
+    return value
+
+async def save_upload(upload) -> Dict:
+    """Stream a FastAPI UploadFile to pending storage in fixed-size chunks.
+
+    At most one chunk is held in memory; the upload is rejected once it
+    exceeds IMAGE_UPLOAD_MAX_BYTES.
+    """
+    content_type = upload.content_type or ""
+    if not content_type.startswith("image/"):
+        raise ImageUploadError(f"Expected an image upload, got {content_type or 'unknown content type'}")
+
+    await run_io(_reserve_pending_slot)
+    upload_id = uuid.uuid4().hex
+    path = os.path.join(IMAGE_UPLOAD_DIR, _PENDING, upload_id)
+    partial_path = path + ".part"
+
+    digest = hashlib.sha256()
+    size = 0
+    f = await run_io(open, partial_path, "wb")
+    try:
+        while True:
+            chunk = await upload.read(IMAGE_UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > IMAGE_UPLOAD_MAX_BYTES:
+                raise ImageUploadError(f"Image exceeds {IMAGE_UPLOAD_MAX_BYTES} bytes")
+            digest.update(chunk)
+            await run_io(f.write, chunk)
+        if size == 0:
+            raise ImageUploadError("Empty image upload")
+    except BaseException:
+        await run_io(_discard_partial, f, partial_path)
+        raise
+    await run_io(_finish_partial, f, partial_path, path)
+
+    return {
+        "upload_id": upload_id,
+        "ref": UPLOAD_REF_PREFIX + upload_id,
+        "url": UPLOAD_URL_PREFIX + upload_id,
+        "size": size,
+        "content_type": content_type,
+        "sha256": digest.hexdigest(),
+    }
+
+def _pending_count(pending_dir: str) -> int:
+    return sum(1 for entry in os.scandir(pending_dir) if entry.is_file())
+
+def _reserve_pending_slot():
+    """Make sure the pending directory exists and has room for one more upload."""
+    pending_dir = os.path.join(IMAGE_UPLOAD_DIR, _PENDING)
+    os.makedirs(pending_dir, exist_ok=True)
+    if _pending_count(pending_dir) < IMAGE_UPLOAD_MAX_PENDING:
+        return
+    sweep_expired_uploads()
+    if _pending_count(pending_dir) >= IMAGE_UPLOAD_MAX_PENDING:
+        raise UploadLimitExceeded(f"Too many pending image uploads ({IMAGE_UPLOAD_MAX_PENDING}); try again later")
+
+def _discard_partial(f, partial_path: str):
+    f.close()
+    try:
+        os.remove(partial_path)
+    except FileNotFoundError:
+        pass
+
+def _finish_partial(f, partial_path: str, path: str):
+    f.close()
+    os.replace(partial_path, path)
+
+def keep_upload(ref: str):
+    """Move a pending upload to kept storage once a submitted listing references it."""
+    upload_id = upload_id_from_ref(ref)
+    pending = os.path.join(IMAGE_UPLOAD_DIR, _PENDING, upload_id)
+    if os.path.exists(pending):
+        kept_dir = os.path.join(IMAGE_UPLOAD_DIR, _KEPT)
+        os.makedirs(kept_dir, exist_ok=True)
+        os.replace(pending, os.path.join(kept_dir, upload_id))
+
+def sweep_expired_uploads(ttl: float = IMAGE_UPLOAD_TTL) -> int:
+    """Delete pending uploads older than ttl seconds; returns how many were removed."""
+    pending_dir = os.path.join(IMAGE_UPLOAD_DIR, _PENDING)
+    if not os.path.isdir(pending_dir):
+        return 0
+    cutoff = time.time() - ttl
+    removed = 0
+    for entry in os.scandir(pending_dir):
+        if entry.is_file() and entry.stat().st_mtime < cutoff:
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
+
+async def sweep_uploads_periodically(interval: float = IMAGE_UPLOAD_SWEEP_INTERVAL):
+    """Run sweep_expired_uploads every interval seconds until cancelled; start as a task on startup."""
+    while True:
+        try:
+            removed = await run_io(sweep_expired_uploads)
+            if removed:
+                logger.info(f"Removed {removed} expired image uploads.")
+        except Exception as e:
+            logger.warning(f"Image upload sweep failed: {e}")
+        await asyncio.sleep(interval)
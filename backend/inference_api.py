@@ -8,6 +8,7 @@ from PIL import Image
 import tensorflow as tf
 from tensorflow.keras.models import load_model, Model
 from gensim.models import Word2Vec
+from keras_serving import KerasServingModel
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
@@ -56,6 +57,7 @@ app.add_middleware(
 # --- Global Variables for Model and Assets ---
 ml_model = None
 image_feature_extractor_model = None # NEW: Sub-model for just image features
+authenticity_server = None # Traced/TFLite serving wrapper around ml_model
 word2vec_model_wv = None
 label_encoder = None
 IMAGE_SIZE_W, IMAGE_SIZE_H = None, None
@@ -119,7 +121,7 @@ async def load_ml_assets():
     """
     Load the Keras model, Word2Vec model, LabelEncoder, and config when the app starts.
     """
-    global ml_model, image_feature_extractor_model, word2vec_model_wv, label_encoder
+    global ml_model, image_feature_extractor_model, authenticity_server, word2vec_model_wv, label_encoder
     global IMAGE_SIZE_W, IMAGE_SIZE_H, MAX_SEQUENCE_LEN, EMBEDDING_DIM
     global REAL_LABEL_ENCODED, FAKE_LABEL_ENCODED, BRAND_REFERENCE_FEATURES
 
@@ -151,6 +153,9 @@ async def load_ml_assets():
 
         print("Image feature extractor sub-model created.")
 
+        authenticity_server = KerasServingModel(ml_model)
+        print(f"Authenticity model serving through '{authenticity_server.backend}'.")
+
         # Load Word2Vec model (only need the word vectors part for inference)
         full_word22vec_model = Word2Vec.load(WORD2VEC_MODEL_PATH)
         word2vec_model_wv = full_word22vec_model.wv
@@ -274,7 +279,7 @@ async def predict_authenticity(
 
     # 3. Main Model Prediction
     try:
-        prediction_output = ml_model.predict([processed_image, processed_brand, processed_tagline])
+        prediction_output = authenticity_server.predict(processed_image, processed_brand, processed_tagline)
         authenticity_score = float(prediction_output[0][0])
         print(f"Main model raw prediction output: {prediction_output}")
         print(f"Main model Authenticity Score: {authenticity_score:.4f}")
@@ -0,0 +1,28 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Pool sizes, overridable from the environment. Torch, TensorFlow and OpenCV
+# release the GIL inside their kernels, so threads give real parallelism for
+# model work; the CPU pool is kept small so concurrent requests queue instead
+# of oversubscribing the cores the models already parallelise over.
+INFERENCE_CPU_WORKERS = int(os.environ.get("INFERENCE_CPU_WORKERS", min(4, os.cpu_count() or 1)))
+INFERENCE_IO_WORKERS = int(os.environ.get("INFERENCE_IO_WORKERS", 16))
+
+cpu_executor = ThreadPoolExecutor(max_workers=INFERENCE_CPU_WORKERS, thread_name_prefix="inference-cpu")
+io_executor = ThreadPoolExecutor(max_workers=INFERENCE_IO_WORKERS, thread_name_prefix="inference-io")
+
+async def run_cpu(fn, *args, **kwargs):
+    """Run a blocking, CPU-bound call (model inference, image decoding) off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_executor, functools.partial(fn, *args, **kwargs))
+
+async def run_io(fn, *args, **kwargs):
+    """Run a blocking I/O call (HTTP via requests, file access) off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(io_executor, functools.partial(fn, *args, **kwargs))
+
+def shutdown(wait: bool = True):
+    cpu_executor.shutdown(wait=wait)
+    io_executor.shutdown(wait=wait)
@@ -0,0 +1,119 @@
+"""Low-overhead execution path for the Keras logo authenticity model.
+
+Keras `predict` builds a data adapter, runs the callback loop and draws a
+progress bar on every call, which dominates the cost of the small batches the
+API sends. KerasServingModel traces the model once into a graph with a fixed
+(image, brand, tagline) input signature and a dynamic batch dimension, or
+converts it to TFLite, and checks the result against `predict` before use.
+
+KERAS_SERVING_BACKEND selects "function" (default, tf.function), "tflite" or
+"predict" (plain Keras, no wrapper).
+"""
+
+import logging
+import os
+import threading
+from typing import Dict
+
+import numpy as np
+import tensorflow as tf
+
+logger = logging.getLogger(__name__)
+
+KERAS_SERVING_BACKEND = os.environ.get("KERAS_SERVING_BACKEND", "function").lower()
+KERAS_SERVING_TOLERANCE = float(os.environ.get("KERAS_SERVING_TOLERANCE", 1e-4))
+PARITY_BATCH_SIZE = 4
+
+class KerasServingModel:
+    """Callable wrapper around the three-input Keras model.
+
+    predict(images, brands, taglines) takes float32 arrays shaped
+    (batch, H, W, 3), (batch, MAX_SEQUENCE_LEN, EMBEDDING_DIM) twice and
+    returns a (batch, 1) numpy array, like `model.predict` does. If the traced
+    or converted model disagrees with Keras beyond the tolerance on a random
+    batch, the wrapper falls back to `model.predict`.
+    """
+
+    def __init__(self, model, backend: str = KERAS_SERVING_BACKEND, tolerance: float = KERAS_SERVING_TOLERANCE):
+        self.model = model
+        self.input_shapes = [tuple(model_input.shape[1:]) for model_input in model.inputs]
+        self.tolerance = tolerance
+        self.backend = "predict"
+        self._run = self._keras_predict
+        self._lock = threading.Lock()  # TFLite interpreters are not thread-safe
+        self.parity: Dict = {}
+
+        if backend not in ("function", "tflite", "predict"):
+            logger.warning(f"Unknown KERAS_SERVING_BACKEND '{backend}', using Keras predict.")
+            return
+        if backend == "predict":
+            return
+        try:
+            if backend == "function":
+                self._build_function()
+            else:
+                self._build_tflite()
+            self._check_parity(backend)
+        except Exception as e:
+            # Tracing or conversion failures must not take the model down with them
+            logger.warning(f"Keras serving backend '{backend}' unavailable ({e}); using Keras predict.")
+            self.backend = "predict"
+            self._run = self._keras_predict
+            self.parity = {"backend": backend, "error": str(e)}
+
+    def _signature(self):
+        names = ("image", "brand", "tagline")
+        return [tf.TensorSpec((None,) + shape, tf.float32, name=name) for name, shape in zip(names, self.input_shapes)]
+
+    def _build_function(self):
+        model = self.model
+
+        @tf.function(input_signature=self._signature())
+        def serve(image, brand, tagline):
+            return model([image, brand, tagline], training=False)
+
+        self._function = serve
+        self._candidate = lambda images, brands, taglines: self._function(images, brands, taglines).numpy()
+
+    def _build_tflite(self):
+        model = self.model
+
+        @tf.function(input_signature=self._signature())
+        def serve(image, brand, tagline):
+            return {"score": model([image, brand, tagline], training=False)}
+
+        converter = tf.lite.TFLiteConverter.from_concrete_functions([serve.get_concrete_function()], model)
+        interpreter = tf.lite.Interpreter(model_content=converter.convert())
+        self._runner = interpreter.get_signature_runner()
+
+        def run(images, brands, taglines):
+            # The signature runner resizes its inputs when the batch size changes
+            with self._lock:
+                return self._runner(image=images, brand=brands, tagline=taglines)["score"].copy()
+
+        self._candidate = run
+
+    def _keras_predict(self, images, brands, taglines):
+        return self.model.predict([images, brands, taglines], verbose=0)
+
+    def _check_parity(self, backend: str):
+        rng = np.random.default_rng(0)
+        sample = [rng.random((PARITY_BATCH_SIZE,) + shape, dtype=np.float32) for shape in self.input_shapes]
+        expected = self._keras_predict(*sample)
+        single = self._candidate(*(array[:1] for array in sample))
+        batched = self._candidate(*sample)
+        max_diff = float(max(np.abs(batched - expected).max(), np.abs(single - expected[:1]).max()))
+        self.parity = {"backend": backend, "max_abs_diff": max_diff, "tolerance": self.tolerance}
+        if max_diff <= self.tolerance:
+            self.backend = backend
+            self._run = self._candidate
+            logger.info(f"Keras serving backend '{backend}' ready (max abs diff vs predict: {max_diff:.2e}).")
+        else:
+            logger.warning(f"Keras serving backend '{backend}' differs from predict by {max_diff:.2e}; using Keras predict.")
+
+    def predict(self, images: np.ndarray, brands: np.ndarray, taglines: np.ndarray) -> np.ndarray:
+        return self._run(
+            np.asarray(images, dtype=np.float32),
+            np.asarray(brands, dtype=np.float32),
+            np.asarray(taglines, dtype=np.float32),
+        )
@@ -0,0 +1,111 @@
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+class KeywordHit(NamedTuple):
+    tag: str        # Name of the keyword list the hit belongs to
+    keyword: str
+    position: int   # Index of the keyword within its list
+    start: int      # Offsets into the lowercased text
+    end: int
+
+class _Pattern(NamedTuple):
+    tag: str
+    keyword: str
+    position: int   # Index of the keyword within its list
+    whole_word: bool
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over several tagged keyword lists.
+
+    Every keyword from every list is compiled into one trie with failure
+    links, so scanning a text costs one pass over its characters regardless of
+    how many keywords are registered. Matching is case-insensitive and, like
+    the `keyword in text` checks it replaces, finds substrings by default;
+    lists added with whole_word=True only match between word boundaries.
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._patterns: List[List[_Pattern]] = [[]]  # Keywords ending at each node
+        self._outputs: List[List[_Pattern]] = [[]]   # Plus those of its failure chain, set by build()
+        self._lists: Dict[str, List[str]] = {}
+        self._built = False
+
+    def add_list(self, tag: str, keywords: Iterable[str], whole_word: bool = False):
+        keywords = list(keywords)
+        self._lists[tag] = keywords
+        for position, keyword in enumerate(keywords):
+            self._insert(_Pattern(tag, keyword.lower(), position, whole_word))
+        self._built = False
+        return self
+
+    def _insert(self, pattern: _Pattern):
+        node = 0
+        for char in pattern.keyword:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._patterns.append([])
+                self._goto[node][char] = next_node
+            node = next_node
+        self._patterns[node].append(pattern)
+
+    def build(self):
+        """Compute failure links breadth-first and merge suffix outputs into each node."""
+        self._outputs = [list(patterns) for patterns in self._patterns]
+        queue = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+        self._built = True
+        return self
+
+    def keywords(self, tag: str) -> List[str]:
+        return self._lists.get(tag, [])
+
+    def find_all(self, text: str, tags: Optional[Iterable[str]] = None) -> List[KeywordHit]:
+        """Return every (possibly overlapping) hit in text, optionally limited to some lists."""
+        if not self._built:
+            self.build()
+        wanted = set(tags) if tags is not None else None
+        text = text.lower()
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        hits = []
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for pattern in outputs[node]:
+                if wanted is not None and pattern.tag not in wanted:
+                    continue
+                start = index - len(pattern.keyword) + 1
+                end = index + 1
+                if pattern.whole_word and not _at_word_boundaries(text, start, end):
+                    continue
+                hits.append(KeywordHit(pattern.tag, pattern.keyword, pattern.position, start, end))
+        return hits
+
+    def matches_by_tag(self, text: str, tags: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+        """Distinct matched keywords per list, in each list's original order, from one scan of text."""
+        positions: Dict[str, set] = {}
+        for hit in self.find_all(text, tags):
+            positions.setdefault(hit.tag, set()).add(hit.position)
+        return {tag: [self._lists[tag][position] for position in sorted(found)] for tag, found in positions.items()}
+
+def _at_word_boundaries(text: str, start: int, end: int) -> bool:
+    before_ok = start == 0 or not text[start - 1].isalnum()
+    after_ok = end == len(text) or not text[end].isalnum()
+    return before_ok and after_ok
@@ -0,0 +1,51 @@
+from keyword_matcher import KeywordMatcher
+
+# Rule keyword lists shared by review and listing analysis. They are compiled
+# into a single matcher at import time, so adding terms does not add passes
+# over the text.
+
+# Phrases in a review that suggest the buyer received a fake
+FAKE_INDICATORS = ['fake', 'counterfeit', 'not authentic', 'not as described', 'scam']
+
+# Known counterfeit/spam keywords in listing text
+COUNTERFEIT_KEYWORDS = [
+    "replica", "fake", "copy", "imitation", "knockoff", "counterfeit",
+    "unauthorized", "unlicensed", "bootleg", "pirated", "duplicate",
+    "reproduction", "faux", "knock-off", "knock off", "repro",
+    "aftermarket", "compatible", "alternative", "substitute", "test", 
+    "asdf", "lorem ipsum", "example"
+]
+
+# Terms that make a brand name itself suspicious
+SUSPICIOUS_BRANDS = ["fake", "replica", "copy", "imitation", "knockoff", "counterfeit"]
+
+# Simple keyword matching for category relevance. This helps detect if a product
+# is listed in a completely wrong category, which is a common red flag.
+CATEGORY_KEYWORDS = {
+    "electronics": ["electronic", "phone", "tv", "camera", "computer", "headphone", "cable", "charger", "laptop", "tablet"],
+    "clothing, shoes & jewelry": ["shirt", "pant", "shoe", "dress", "jewelry", "watch", "hat", "sock", "boot", "sandal", "jeans", "coat", "nike", "adidas"],
+    "automotive": ["car", "tire", "motor", "engine", "wheel", "vehicle", "oil", "filter", "brake"],
+    "home & kitchen": ["kitchen", "furniture", "decor", "towel", "pan", "knife", "blender", "sofa", "lamp"],
+    "office products": ["pen", "paper", "desk", "chair", "printer", "stapler", "ink", "toner"],
+    "beauty & personal care": ["lotion", "shampoo", "makeup", "lipstick", "cream", "perfume", "mascara"],
+    "health & household": ["vitamins", "medicine", "cleaner", "soap", "tissue", "supplement"],
+}
+
+# Matcher list names
+FAKE_INDICATORS_TAG = "fake_indicators"
+COUNTERFEIT_KEYWORDS_TAG = "counterfeit_keywords"
+SUSPICIOUS_BRANDS_TAG = "suspicious_brands"
+
+def category_tag(category_key: str) -> str:
+    return f"category:{category_key}"
+
+def build_rule_matcher() -> KeywordMatcher:
+    matcher = KeywordMatcher()
+    matcher.add_list(FAKE_INDICATORS_TAG, FAKE_INDICATORS)
+    matcher.add_list(COUNTERFEIT_KEYWORDS_TAG, COUNTERFEIT_KEYWORDS)
+    matcher.add_list(SUSPICIOUS_BRANDS_TAG, SUSPICIOUS_BRANDS)
+    for category_key, keywords in CATEGORY_KEYWORDS.items():
+        matcher.add_list(category_tag(category_key), keywords)
+    return matcher.build()
+
+RULE_MATCHER = build_rule_matcher()
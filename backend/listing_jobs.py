@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Listing job limits, overridable from the environment
+LISTING_JOB_WORKERS = int(os.environ.get("LISTING_JOB_WORKERS", 2))
+LISTING_JOB_QUEUE_SIZE = int(os.environ.get("LISTING_JOB_QUEUE_SIZE", 100))
+LISTING_JOB_RETENTION = float(os.environ.get("LISTING_JOB_RETENTION", 3600))  # Seconds finished jobs stay queryable
+LISTING_JOB_DRAIN_TIMEOUT = float(os.environ.get("LISTING_JOB_DRAIN_TIMEOUT", 30))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+class JobQueueFull(Exception):
+    """Raised when the job queue is at capacity or the manager is draining."""
+
+class ListingJob:
+    def __init__(self, payload: Any):
+        self.id = str(uuid.uuid4())
+        self.payload = payload
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.version = 0  # Bumped on every status change, see ListingJobManager.wait_for_change
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+class ListingJobManager:
+    """Bounded queue of listing submissions processed by a fixed pool of asyncio workers.
+
+    submit() returns immediately; a worker awaits handler(payload) and stores
+    its result on the job. Queued jobs can be cancelled before they start and
+    running ones are cancelled at their next await. drain() stops accepting
+    work and gives in-flight jobs a grace period on shutdown.
+    """
+
+    def __init__(self, handler: Callable[[Any], Awaitable[Any]], workers: int = LISTING_JOB_WORKERS,
+                 queue_size: int = LISTING_JOB_QUEUE_SIZE, retention: float = LISTING_JOB_RETENTION):
+        self.handler = handler
+        self.worker_count = workers
+        self.queue_size = queue_size
+        self.retention = retention
+        self.jobs: Dict[str, ListingJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+        self._changed: Optional[asyncio.Condition] = None
+        self._accepting = False
+
+    def start(self):
+        """Create the queue and workers; call from the running event loop."""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._changed = asyncio.Condition()
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.worker_count)]
+        self._accepting = True
+
+    def submit(self, payload: Any) -> ListingJob:
+        if not self._accepting:
+            raise JobQueueFull("Listing jobs are not being accepted (server starting or shutting down)")
+        self._prune()
+        job = ListingJob(payload)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull(f"Listing job queue is full ({self.queue_size} jobs)")
+        self.jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[ListingJob]:
+        return self.jobs.get(job_id)
+
+    async def cancel(self, job_id: str) -> Optional[ListingJob]:
+        job = self.jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        if job.status == QUEUED:
+            # The worker skips it when dequeued
+            await self._set_status(job, CANCELLED)
+        elif job._task is not None:
+            job._task.cancel()
+        return job
+
+    async def wait_for_change(self, job: ListingJob, seen_version: int, timeout: float) -> bool:
+        """Wait until job.version moves past seen_version; False on timeout."""
+        async with self._changed:
+            try:
+                await asyncio.wait_for(self._changed.wait_for(lambda: job.version > seen_version), timeout)
+                return True
+            except asyncio.TimeoutError:
+                return False
+
+    async def _set_status(self, job: ListingJob, status: str, result: Any = None, error: Optional[str] = None):
+        job.status = status
+        if status == RUNNING:
+            job.started_at = time.time()
+        if status in FINISHED_STATES:
+            job.finished_at = time.time()
+            job.result = result
+            job.error = error
+            job.payload = None  # Drop the listing (and any inline images) once done
+        job.version += 1
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def _worker(self, number: int):
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.status != QUEUED:
+                    continue
+                await self._set_status(job, RUNNING)
+                job._task = asyncio.create_task(self.handler(job.payload))
+                try:
+                    result = await asyncio.shield(job._task)
+                except asyncio.CancelledError:
+                    if not job._task.cancelled():
+                        # The worker itself is being cancelled (drain timeout); stop the job too
+                        job._task.cancel()
+                        await self._set_status(job, CANCELLED, error="Server shutting down")
+                        raise
+                    await self._set_status(job, CANCELLED)
+                except Exception as e:
+                    logger.error(f"Listing job {job.id} failed: {e}")
+                    await self._set_status(job, FAILED, error=str(e))
+                else:
+                    await self._set_status(job, SUCCEEDED, result=result)
+            finally:
+                self._queue.task_done()
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.finished and job.finished_at < cutoff]:
+            del self.jobs[job_id]
+
+    async def drain(self, timeout: float = LISTING_JOB_DRAIN_TIMEOUT):
+        """Stop accepting jobs, wait up to timeout for the queue to empty, then cancel what is left."""
+        if not self._workers:
+            return
+        self._accepting = False
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Listing job drain timed out after {timeout}s; cancelling {self._queue.qsize()} queued jobs.")
+        for job in self.jobs.values():
+            if job.status == QUEUED:
+                await self._set_status(job, CANCELLED, error="Server shutting down")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def stats(self) -> Dict:
+        counts = {state: 0 for state in (QUEUED, RUNNING) + FINISHED_STATES}
+        for job in self.jobs.values():
+            counts[job.status] += 1
+        return {
+            "workers": self.worker_count,
+            "queue_size": self.queue_size,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "accepting": self._accepting,
+            "jobs": counts,
+        }
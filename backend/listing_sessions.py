@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from result_cache import TTLCache
+
+# Listing wizard sessions, overridable from the environment
+LISTING_SESSION_MAX = int(os.environ.get("LISTING_SESSION_MAX", 1000))
+LISTING_SESSION_TTL = float(os.environ.get("LISTING_SESSION_TTL", 3600))
+
+def input_hash(*parts: Any) -> str:
+    """Stable sha256 over JSON-serializable inputs."""
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ListingSession:
+    """Analysis state for one product listing while the seller walks through the wizard.
+
+    Keeps the last result of each /monitor/step call together with the hash
+    of its step data, plus named analyses (e.g. the main image authenticity
+    score) keyed by the hash of exactly the inputs they depend on, so both a
+    repeated step and the final submission can skip work whose inputs did not
+    change.
+    """
+
+    def __init__(self, product_id: str):
+        self.product_id = product_id
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self._steps: Dict[int, tuple] = {}
+        self._analyses: Dict[str, tuple] = {}
+        self.reused = 0
+        self.computed = 0
+
+    def step_result(self, step_number: int, step_hash: str) -> Optional[Dict]:
+        entry = self._steps.get(step_number)
+        if entry is not None and entry[0] == step_hash:
+            self.reused += 1
+            return entry[1]
+        return None
+
+    def store_step(self, step_number: int, step_hash: str, result: Dict):
+        self._steps[step_number] = (step_hash, result)
+        self.updated_at = time.time()
+
+    async def reuse(self, name: str, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the stored analysis for name if key matches, otherwise await compute() and store it."""
+        entry = self._analyses.get(name)
+        if entry is not None and entry[0] == key:
+            self.reused += 1
+            return entry[1]
+        value = await compute()
+        self._analyses[name] = (key, value)
+        self.computed += 1
+        self.updated_at = time.time()
+        return value
+
+    def summary(self) -> Dict:
+        return {
+            "product_id": self.product_id,
+            "steps": sorted(self._steps),
+            "analyses": sorted(self._analyses),
+            "reused": self.reused,
+            "computed": self.computed,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+async def reuse_analysis(session: Optional[ListingSession], name: str, key: str,
+                         compute: Callable[[], Awaitable[Any]]) -> Any:
+    """ListingSession.reuse that also works without a session."""
+    if session is None:
+        return await compute()
+    return await session.reuse(name, key, compute)
+
+class ListingSessionStore:
+    """Sessions by product_id; idle sessions expire after ttl seconds."""
+
+    def __init__(self, max_sessions: int, ttl: float):
+        self._sessions = TTLCache(max_sessions, ttl)
+        self._lock = threading.Lock()
+
+    def get(self, product_id: Optional[str]) -> Optional[ListingSession]:
+        if not product_id:
+            return None
+        return self._sessions.get(product_id)
+
+    def get_or_create(self, product_id: str) -> ListingSession:
+        with self._lock:
+            session = self._sessions.get(product_id)
+            if session is None:
+                session = ListingSession(product_id)
+            # Re-putting refreshes the expiry on every step
+            self._sessions.put(product_id, session)
+            return session
+
+    def discard(self, product_id: str):
+        self._sessions.pop(product_id)
+
+    def stats(self) -> Dict:
+        return self._sessions.stats()
+
+listing_sessions = ListingSessionStore(LISTING_SESSION_MAX, LISTING_SESSION_TTL)
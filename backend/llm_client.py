@@ -0,0 +1,366 @@
+"""Async client for OpenAI-compatible chat completion APIs (Groq by default).
+
+One pooled httpx.AsyncClient is shared by every call. A call tries the
+configured models in order under a total deadline (LLM_DEADLINE) rather than
+a timeout per model, and at most LLM_MAX_CONCURRENCY calls are in flight.
+Each model has a circuit breaker: after LLM_BREAKER_FAILURES consecutive
+failures it is skipped for LLM_BREAKER_COOLDOWN seconds, then one probe
+request decides whether it closes again; a 404 (model retired) opens it for
+LLM_MODEL_MISSING_COOLDOWN. If the current attempt has not answered after
+LLM_HEDGE_AFTER seconds, a hedged request goes to the next healthy model and
+whichever answers first wins. stream_chat() uses the provider's streaming
+mode instead and yields tokens as they arrive.
+
+GROQ_BASE_URL points the client somewhere else, e.g. llm_stub_server.py.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# LLM client settings, overridable from the environment
+GROQ_BASE_URL = os.environ.get("GROQ_BASE_URL", "https://api.groq.com/openai/v1").rstrip("/")
+GROQ_MODELS = [model.strip() for model in os.environ.get(
+    "GROQ_MODELS", "llama3-8b-8192,mixtral-8x7b-32768,llama-3.1-8b-instant,gemma2-9b-it"
+).split(",") if model.strip()]
+LLM_DEADLINE = float(os.environ.get("LLM_DEADLINE", 30))  # Seconds for a whole call, across models
+LLM_ATTEMPT_TIMEOUT = float(os.environ.get("LLM_ATTEMPT_TIMEOUT", 20))
+LLM_CONNECT_TIMEOUT = float(os.environ.get("LLM_CONNECT_TIMEOUT", 3))
+LLM_HEDGE_AFTER = float(os.environ.get("LLM_HEDGE_AFTER", 5))  # 0 disables hedged requests
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", 8))
+LLM_MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", 20))
+LLM_BREAKER_FAILURES = int(os.environ.get("LLM_BREAKER_FAILURES", 3))
+LLM_BREAKER_COOLDOWN = float(os.environ.get("LLM_BREAKER_COOLDOWN", 30))
+LLM_MODEL_MISSING_COOLDOWN = float(os.environ.get("LLM_MODEL_MISSING_COOLDOWN", 3600))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+class LLMUnavailable(Exception):
+    """Raised when no model produced a completion within the deadline."""
+
+class LLMAuthError(LLMUnavailable):
+    """Raised when the API rejects the key; retrying other models cannot help."""
+
+class AttemptFailed(Exception):
+    def __init__(self, model: str, reason: str):
+        super().__init__(f"{model}: {reason}")
+        self.model = model
+        self.reason = reason
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe, plus latency memory for stats."""
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES, cooldown: float = LLM_BREAKER_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_until = 0.0
+        self.successes = 0
+        self.failures = 0
+        self.latency_ewma: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() >= self.opened_until:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self, latency: float):
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.successes += 1
+        self._probing = False
+        self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+
+    def record_failure(self, reason: str, cooldown: Optional[float] = None):
+        """Count a failure; cooldown trips the breaker at once for that long."""
+        self.consecutive_failures += 1
+        self.failures += 1
+        self.last_error = reason
+        self._probing = False
+        if cooldown is not None or self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = OPEN
+            self.opened_until = time.monotonic() + (cooldown if cooldown is not None else self.cooldown)
+
+    def release_probe(self):
+        # A hedged probe that was cancelled proves nothing either way
+        self._probing = False
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "successes": self.successes,
+            "failures": self.failures,
+            "latency_ewma": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "retry_in": max(0.0, round(self.opened_until - time.monotonic(), 1)) if self.state != CLOSED else 0.0,
+            "last_error": self.last_error,
+        }
+
+class LLMClient:
+    """Shared chat-completions client; see the module docstring for the failure handling."""
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        models: List[str] = GROQ_MODELS,
+        base_url: str = GROQ_BASE_URL,
+        deadline: float = LLM_DEADLINE,
+        attempt_timeout: float = LLM_ATTEMPT_TIMEOUT,
+        hedge_after: float = LLM_HEDGE_AFTER,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        max_connections: int = LLM_MAX_CONNECTIONS,
+    ):
+        self.api_key = api_key
+        self.models = list(models)
+        self.base_url = base_url.rstrip("/")
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.hedge_after = hedge_after
+        self.max_concurrency = max_concurrency
+        self.timeout = httpx.Timeout(attempt_timeout, connect=LLM_CONNECT_TIMEOUT)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.breakers: Dict[str, CircuitBreaker] = {model: CircuitBreaker() for model in self.models}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self.calls = 0
+        self.unavailable = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key) and bool(self.models)
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """Event loop that chat_sync() schedules calls on; call once from startup."""
+        self._loop = loop
+        self._loop_thread = threading.get_ident()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created lazily so the client binds to the running event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+                headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
+            )
+        return self._client
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _next_model(self, tried: set) -> Optional[str]:
+        for model in self.models:
+            if model not in tried and self.breakers[model].allow():
+                tried.add(model)
+                return model
+        return None
+
+    def _check_response(self, model: str, response: httpx.Response):
+        if response.status_code in (401, 403):
+            raise LLMAuthError(f"{model}: API key rejected ({response.status_code})")
+        if response.status_code == 404:
+            self.breakers[model].record_failure("model not found", cooldown=LLM_MODEL_MISSING_COOLDOWN)
+            raise AttemptFailed(model, "model not found")
+        if response.status_code != 200:
+            reason = f"HTTP {response.status_code}"
+            self.breakers[model].record_failure(reason)
+            raise AttemptFailed(model, reason)
+
+    async def _attempt(self, model: str, payload: Dict) -> str:
+        breaker = self.breakers[model]
+        started = time.monotonic()
+        try:
+            response = await self._get_client().post("/chat/completions", json={**payload, "model": model})
+            self._check_response(model, response)
+            content = response.json()["choices"][0]["message"]["content"]
+        except asyncio.CancelledError:
+            breaker.release_probe()
+            raise
+        except (LLMAuthError, AttemptFailed):
+            raise
+        except httpx.TimeoutException:
+            breaker.record_failure("timeout")
+            raise AttemptFailed(model, "timeout")
+        except (httpx.HTTPError, KeyError, IndexError, ValueError) as e:
+            breaker.record_failure(type(e).__name__)
+            raise AttemptFailed(model, f"{type(e).__name__}: {e}")
+        breaker.record_success(time.monotonic() - started)
+        return content
+
+    async def _race(self, payload: Dict) -> Tuple[str, str]:
+        tried: set = set()
+        running: Dict[asyncio.Task, str] = {}
+        hedged: set = set()
+        errors: List[str] = []
+        try:
+            while True:
+                if not running:
+                    model = self._next_model(tried)
+                    if model is None:
+                        raise LLMUnavailable("; ".join(errors) or "All models are unavailable (circuit open)")
+                    running[asyncio.create_task(self._attempt(model, payload))] = model
+                hedge = self.hedge_after > 0 and len(running) == 1 and len(tried) < len(self.models)
+                done, _ = await asyncio.wait(running, timeout=self.hedge_after if hedge else None,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    model = self._next_model(tried)
+                    if model is not None:
+                        self.hedges += 1
+                        logger.info(f"LLM call to {next(iter(running.values()))} is slow, hedging with {model}")
+                        task = asyncio.create_task(self._attempt(model, payload))
+                        running[task] = model
+                        hedged.add(task)
+                    else:
+                        tried.update(self.models)  # Nothing left to hedge with; just wait
+                    continue
+                for task in done:
+                    model = running.pop(task)
+                    try:
+                        content = task.result()
+                    except AttemptFailed as e:
+                        errors.append(str(e))
+                        continue
+                    if task in hedged:
+                        self.hedge_wins += 1
+                    return content, model
+        except asyncio.CancelledError:
+            # Out of deadline: models still running did not answer in time
+            for model in running.values():
+                self.breakers[model].record_failure("deadline exceeded")
+            raise
+        finally:
+            for task in running:
+                task.cancel()
+
+    async def chat(self, messages: List[Dict], temperature: float = 0.3, max_tokens: int = 1200,
+                   deadline: Optional[float] = None) -> Tuple[str, str]:
+        """(content, model) from the first model to answer; raises LLMUnavailable otherwise."""
+        if not self.configured:
+            raise LLMUnavailable("No API key configured")
+        self.calls += 1
+        payload = {"messages": messages, "temperature": temperature, "max_tokens": max_tokens, "stream": False}
+        budget = deadline if deadline is not None else self.deadline
+        try:
+            async with self._get_semaphore():
+                return await asyncio.wait_for(self._race(payload), budget)
+        except asyncio.TimeoutError:
+            self.unavailable += 1
+            raise LLMUnavailable(f"No model answered within {budget}s")
+        except LLMUnavailable:
+            self.unavailable += 1
+            raise
+
+    async def stream_chat(self, messages: List[Dict], temperature: float = 0.3,
+                          max_tokens: int = 1200) -> AsyncIterator[Tuple[str, str]]:
+        """Yield (model, content delta) pairs as the first healthy model generates them.
+
+        Models are tried in order until one starts streaming, with the same
+        breakers and deadline as chat(); the deadline bounds the wait for each
+        chunk, not the whole stream. There is no hedging, since two streams
+        cannot be merged, and a failure after tokens were yielded raises
+        LLMUnavailable.
+        """
+        if not self.configured:
+            raise LLMUnavailable("No API key configured")
+        self.calls += 1
+        payload = {"messages": messages, "temperature": temperature, "max_tokens": max_tokens, "stream": True}
+        started = time.monotonic()
+        tried: set = set()
+        errors: List[str] = []
+        async with self._get_semaphore():
+            while True:
+                remaining = self.deadline - (time.monotonic() - started)
+                model = self._next_model(tried) if remaining > 0 else None
+                if model is None:
+                    self.unavailable += 1
+                    raise LLMUnavailable("; ".join(errors) or "All models are unavailable (circuit open)")
+                breaker = self.breakers[model]
+                attempt_started = time.monotonic()
+                sent = False
+                try:
+                    timeout = httpx.Timeout(min(self.attempt_timeout, remaining), connect=LLM_CONNECT_TIMEOUT)
+                    async with self._get_client().stream("POST", "/chat/completions", timeout=timeout,
+                                                         json={**payload, "model": model}) as response:
+                        if response.status_code != 200:
+                            await response.aread()
+                            self._check_response(model, response)
+                        async for delta in _sse_deltas(response):
+                            sent = True
+                            yield model, delta
+                except AttemptFailed as e:
+                    errors.append(str(e))
+                    continue
+                except httpx.HTTPError as e:
+                    reason = "timeout" if isinstance(e, httpx.TimeoutException) else type(e).__name__
+                    breaker.record_failure(reason)
+                    if sent:
+                        self.unavailable += 1
+                        raise LLMUnavailable(f"{model}: stream interrupted ({reason})")
+                    errors.append(f"{model}: {reason}")
+                    continue
+                except BaseException:
+                    # Consumer went away (client disconnected) or auth failed
+                    breaker.release_probe()
+                    raise
+                breaker.record_success(time.monotonic() - attempt_started)
+                return
+
+    def chat_sync(self, messages: List[Dict], **kwargs) -> Tuple[str, str]:
+        """chat() for worker threads: runs on the bound event loop and blocks this thread for the result."""
+        if self._loop is None or self._loop.is_closed():
+            raise LLMUnavailable("LLM client is not bound to a running event loop")
+        if threading.get_ident() == self._loop_thread:
+            raise RuntimeError("chat_sync() called from the event loop thread; await chat() instead")
+        future = asyncio.run_coroutine_threadsafe(self.chat(messages, **kwargs), self._loop)
+        return future.result()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+
+    def stats(self) -> Dict:
+        return {
+            "base_url": self.base_url,
+            "calls": self.calls,
+            "unavailable": self.unavailable,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "models": {model: breaker.stats() for model, breaker in self.breakers.items()},
+        }
+
+async def _sse_deltas(response: httpx.Response) -> AsyncIterator[str]:
+    """Content deltas from an OpenAI-style "data: {...}" event stream."""
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        try:
+            delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+        except (ValueError, KeyError, IndexError, AttributeError):
+            continue
+        if delta:
+            yield delta
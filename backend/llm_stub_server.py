@@ -0,0 +1,113 @@
+"""Local stand-in for the Groq chat completions API, for tests and offline work.
+
+Run it and point the backend at it:
+
+    uvicorn llm_stub_server:app --port 8100
+    GROQ_API_KEY=stub GROQ_BASE_URL=http://127.0.0.1:8100/openai/v1 uvicorn app:app --port 8000
+
+Each model behaves as configured by LLM_STUB_MODELS (or PUT /stub/models at
+runtime), e.g. "llama3-8b-8192=slow:8,mixtral-8x7b-32768=404,default=ok":
+
+    ok          answer after LLM_STUB_LATENCY seconds
+    slow:<s>    answer after <s> seconds
+    <status>    reply with that HTTP status (404, 429, 500, 401, ...)
+    flaky:<p>   fail with 503 with probability p, otherwise answer
+    hang        never answer
+
+Requests with "stream": true get the answer as OpenAI-style SSE chunks.
+GET /stub/stats counts requests per model.
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+from collections import Counter
+from typing import Dict
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LLM_STUB_MODELS = os.environ.get("LLM_STUB_MODELS", "default=ok")
+LLM_STUB_LATENCY = float(os.environ.get("LLM_STUB_LATENCY", 0.2))
+LLM_STUB_CHUNK_DELAY = float(os.environ.get("LLM_STUB_CHUNK_DELAY", 0.02))
+
+app = FastAPI(title="LLM stub server")
+
+def parse_behaviors(spec: str) -> Dict[str, str]:
+    behaviors = {}
+    for item in spec.split(","):
+        if "=" in item:
+            model, behavior = item.split("=", 1)
+            behaviors[model.strip()] = behavior.strip()
+    return behaviors
+
+behaviors = parse_behaviors(LLM_STUB_MODELS)
+requests_per_model: Counter = Counter()
+
+def stub_report(model: str, messages) -> str:
+    prompt = messages[-1]["content"] if messages else ""
+    return (
+        f"# Executive Summary\n\nStub report from **{model}**.\n\n"
+        f"## Why This Was Flagged\n\n- Prompt was {len(prompt)} characters long.\n\n"
+        "## Recommendations\n\n1. Review the evidence.\n2. Contact the seller.\n"
+    )
+
+def completion(model: str, content: str) -> Dict:
+    return {
+        "id": f"stub-{int(time.time() * 1000)}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+    }
+
+async def stream_completion(model: str, content: str):
+    words = content.split(" ")
+    for i, word in enumerate(words):
+        chunk = {"model": model, "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word}}]}
+        yield f"data: {json.dumps(chunk)}\n\n"
+        await asyncio.sleep(LLM_STUB_CHUNK_DELAY)
+    yield "data: [DONE]\n\n"
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "")
+    requests_per_model[model] += 1
+    behavior = behaviors.get(model, behaviors.get("default", "ok"))
+
+    delay = LLM_STUB_LATENCY
+    if behavior == "hang":
+        await asyncio.Event().wait()
+    elif behavior.startswith("slow:"):
+        delay = float(behavior.split(":", 1)[1])
+    elif behavior.startswith("flaky:"):
+        if random.random() < float(behavior.split(":", 1)[1]):
+            return JSONResponse({"error": {"message": "flaky stub failure"}}, status_code=503)
+    elif behavior.isdigit():
+        return JSONResponse({"error": {"message": f"stub status {behavior}"}}, status_code=int(behavior))
+    elif behavior != "ok":
+        raise HTTPException(status_code=500, detail=f"Unknown stub behavior '{behavior}'")
+
+    await asyncio.sleep(delay)
+    content = stub_report(model, body.get("messages", []))
+    if body.get("stream"):
+        return StreamingResponse(stream_completion(model, content), media_type="text/event-stream")
+    return completion(model, content)
+
+@app.put("/stub/models")
+async def set_behaviors(spec: Dict[str, str]):
+    """Replace the per-model behaviors, e.g. {"default": "ok", "gemma2-9b-it": "500"}"""
+    behaviors.clear()
+    behaviors.update(spec)
+    return behaviors
+
+@app.get("/stub/stats")
+async def stub_stats():
+    return {"behaviors": behaviors, "requests": dict(requests_per_model)}
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=int(os.environ.get("LLM_STUB_PORT", 8100)))
@@ -0,0 +1,113 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List
+
+# Default batching window and size, overridable from the environment
+MICRO_BATCH_WAIT_MS = float(os.environ.get("MICRO_BATCH_WAIT_MS", 5))
+MICRO_BATCH_MAX_SIZE = int(os.environ.get("MICRO_BATCH_MAX_SIZE", 32))
+
+# Every batcher registers itself here so its stats can be reported
+BATCHERS: Dict[str, "MicroBatcher"] = {}
+
+class MicroBatcher:
+    """Groups concurrent single-item model calls into one batched call.
+
+    batch_fn receives a list of items and must return a list of results in the
+    same order. Callers submit one item each; a worker thread waits up to
+    max_wait_ms after the first item arrives (or until max_batch_size items are
+    queued), runs batch_fn once and hands every caller its own result.
+    submit() blocks and is meant for code already running on an executor
+    thread; asubmit() is the awaitable form for the event loop.
+    """
+
+    def __init__(self, name: str, batch_fn: Callable[[List[Any]], List[Any]],
+                 max_batch_size: int = MICRO_BATCH_MAX_SIZE, max_wait_ms: float = MICRO_BATCH_WAIT_MS):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        BATCHERS[name] = self
+
+    def _ensure_worker(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name=f"micro-batcher-{self.name}", daemon=True)
+                    self._thread.start()
+
+    def submit_future(self, item) -> Future:
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def submit(self, item):
+        return self.submit_future(item).result()
+
+    def submit_many(self, items: List[Any]) -> List[Any]:
+        futures = [self.submit_future(item) for item in items]
+        return [future.result() for future in futures]
+
+    async def asubmit(self, item):
+        return await asyncio.wrap_future(self.submit_future(item))
+
+    async def asubmit_many(self, items: List[Any]) -> List[Any]:
+        futures = [asyncio.wrap_future(self.submit_future(item)) for item in items]
+        return list(await asyncio.gather(*futures))
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # Drop items whose callers have already given up
+            pending = [(item, future) for item, future in self._collect() if future.set_running_or_notify_cancel()]
+            if not pending:
+                continue
+            try:
+                results = list(self.batch_fn([item for item, _ in pending]))
+                if len(results) != len(pending):
+                    raise RuntimeError(f"Batcher '{self.name}' got {len(results)} results for {len(pending)} items")
+            except BaseException as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(pending, results):
+                future.set_result(result)
+            self.batches += 1
+            self.items += len(pending)
+            self.largest_batch = max(self.largest_batch, len(pending))
+
+    def stats(self) -> Dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches": self.batches,
+            "items": self.items,
+            "average_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "queued": self._queue.qsize(),
+        }
+
+def batcher_stats() -> Dict[str, Dict]:
+    return {name: batcher.stats() for name, batcher in BATCHERS.items()}
@@ -0,0 +1,175 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# "eager" loads every model during startup; "lazy" starts serving at once and
+# loads models on first use or from a background warm-up thread.
+MODEL_LOADING_MODE = os.environ.get("MODEL_LOADING_MODE", "eager").lower()
+
+VIT_CHECKPOINT = 'google/vit-base-patch16-224'
+SENTIMENT_CHECKPOINT = 'nlptown/bert-base-multilingual-uncased-sentiment'
+RELEVANCE_CHECKPOINT = 'bert-base-uncased'
+
+def estimate_model_bytes(model: Any) -> Optional[int]:
+    """Best-effort size of a model's weights in bytes, or None for objects without weights."""
+    if hasattr(model, "parameters") and hasattr(model, "buffers"):  # torch.nn.Module
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    if hasattr(model, "count_params"):  # Keras model, float32 weights
+        return int(model.count_params()) * 4
+    if hasattr(model, "vectors"):  # gensim KeyedVectors
+        return int(model.vectors.nbytes)
+    if hasattr(model, "model"):  # transformers pipeline
+        return estimate_model_bytes(model.model)
+    if hasattr(model, "model_path"):  # ONNX Runtime session wrapper
+        return os.path.getsize(model.model_path)
+    return None
+
+class ModelRegistry:
+    """Loads each model once per process and hands the same instance to every caller.
+
+    Loaders are registered by name and run on first get(); later calls return
+    the cached object. Each name has its own lock so two threads asking for the
+    same model wait for one load instead of loading it twice. A failed load is
+    remembered for reporting and retried on the next get().
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._models: Dict[str, Any] = {}
+        self._load_seconds: Dict[str, float] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._loading = set()
+        self._errors: Dict[str, str] = {}
+        self._warm_up_names = set()
+        self._registry_lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], Any], warm_up: bool = True):
+        """Register a loader; warm_up=False leaves it out of default warm-ups (it still loads on get())."""
+        with self._registry_lock:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+            if warm_up:
+                self._warm_up_names.add(name)
+            else:
+                self._warm_up_names.discard(name)
+
+    def get(self, name: str) -> Any:
+        if name in self._models:
+            return self._models[name]
+        if name not in self._loaders:
+            raise KeyError(f"No model registered under '{name}'")
+        with self._locks[name]:
+            if name not in self._models:
+                self._loading.add(name)
+                started = time.perf_counter()
+                try:
+                    self._models[name] = self._loaders[name]()
+                except Exception as e:
+                    self._errors[name] = str(e)
+                    raise
+                finally:
+                    self._loading.discard(name)
+                self._errors.pop(name, None)
+                self._load_seconds[name] = round(time.perf_counter() - started, 3)
+        return self._models[name]
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def status(self, name: str) -> str:
+        if name in self._models:
+            return "ready"
+        if name in self._loading:
+            return "loading"
+        if name in self._errors:
+            return "failed"
+        return "not_loaded"
+
+    def readiness(self) -> Dict[str, str]:
+        return {name: self.status(name) for name in self._loaders}
+
+    def warm_up(self, names: Optional[Iterable[str]] = None):
+        """Load the given models (default: all registered for warm-up), logging instead of raising on failure."""
+        if names is None:
+            names = [name for name in self._loaders if name in self._warm_up_names]
+        for name in list(names):
+            try:
+                self.get(name)
+                logger.info(f"Model '{name}' ready ({self._load_seconds.get(name)}s)")
+            except Exception as e:
+                logger.error(f"Warm-up of model '{name}' failed: {e}")
+
+    def start_background_warm_up(self, names: Optional[Iterable[str]] = None) -> threading.Thread:
+        thread = threading.Thread(target=self.warm_up, args=(names,), name="model-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def report(self) -> Dict:
+        """Load state and weight memory of every registered model."""
+        models = {}
+        for name in self._loaders:
+            loaded = name in self._models
+            models[name] = {
+                "loaded": loaded,
+                "status": self.status(name),
+                "error": self._errors.get(name),
+                "memory_bytes": estimate_model_bytes(self._models[name]) if loaded else None,
+                "load_seconds": self._load_seconds.get(name),
+            }
+        total = sum(entry["memory_bytes"] or 0 for entry in models.values())
+        return {"models": models, "total_memory_bytes": total, "total_memory_mb": round(total / (1024 * 1024), 1)}
+
+registry = ModelRegistry()
+
+# --- Shared backbones ---
+# The ViT checkpoint is loaded once with its classification head. Callers that
+# only need embeddings use its .vit backbone, which shares the same weights.
+
+def _load_vit_processor():
+    from transformers import ViTImageProcessor
+    return ViTImageProcessor.from_pretrained(VIT_CHECKPOINT)
+
+def _load_vit_classifier():
+    from transformers import ViTForImageClassification
+    return ViTForImageClassification.from_pretrained(VIT_CHECKPOINT)
+
+def _load_sentiment_tokenizer():
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(SENTIMENT_CHECKPOINT)
+
+def _load_sentiment_model():
+    from transformers import AutoModelForSequenceClassification
+    return AutoModelForSequenceClassification.from_pretrained(SENTIMENT_CHECKPOINT)
+
+def _load_relevance_tokenizer():
+    from transformers import BertTokenizer
+    return BertTokenizer.from_pretrained(RELEVANCE_CHECKPOINT)
+
+def _load_relevance_model():
+    from transformers import BertForNextSentencePrediction
+    return BertForNextSentencePrediction.from_pretrained(RELEVANCE_CHECKPOINT)
+
+def _load_resnet50_features():
+    import torch
+    from torchvision.models import resnet50, ResNet50_Weights
+    resnet = resnet50(weights=ResNet50_Weights.IMAGENET1K_V2)
+    resnet = torch.nn.Sequential(*list(resnet.children())[:-1])  # Remove classification layer
+    resnet.eval()
+    return resnet
+
+registry.register("vit_processor", _load_vit_processor)
+registry.register("vit_classifier", _load_vit_classifier)
+registry.register("sentiment_tokenizer", _load_sentiment_tokenizer)
+registry.register("sentiment_model", _load_sentiment_model)
+registry.register("relevance_tokenizer", _load_relevance_tokenizer)
+registry.register("relevance_model", _load_relevance_model)
+registry.register("resnet50_features", _load_resnet50_features)
+
+def get_vit_backbone():
+    """The ViTModel inside the shared classifier, for CLS embeddings."""
+    return registry.get("vit_classifier").vit
@@ -1,13 +1,24 @@
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, ViTImageProcessor, ViTModel, BertTokenizer, BertForNextSentencePrediction
+from model_registry import registry, get_vit_backbone
+from onnx_backend import get_text_model
 
-# Text sentiment model
-text_tokenizer = AutoTokenizer.from_pretrained('nlptown/bert-base-multilingual-uncased-sentiment')
-text_model = AutoModelForSequenceClassification.from_pretrained('nlptown/bert-base-multilingual-uncased-sentiment')
+# All checkpoints are loaded through the shared registry so other modules
+# (e.g. ProductVerifier) reuse the same weights instead of loading copies.
+# Attributes are resolved on first access, so importing this module loads
+# nothing; use `import models` and read `models.text_model` at call time.
+_LAZY_ATTRIBUTES = {
+    # Text sentiment model
+    'text_tokenizer': lambda: registry.get('sentiment_tokenizer'),
+    'text_model': lambda: get_text_model('sentiment'),  # PyTorch or ONNX per TEXT_MODEL_BACKEND
+    # Image embedding model (backbone of the shared ViT classifier)
+    'image_processor': lambda: registry.get('vit_processor'),
+    'image_model': get_vit_backbone,
+    # Relevance check model
+    'relevance_tokenizer': lambda: registry.get('relevance_tokenizer'),
+    'relevance_model': lambda: get_text_model('relevance'),
+}
 
-# Image embedding model
-image_processor = ViTImageProcessor.from_pretrained('google/vit-base-patch16-224')
-image_model = ViTModel.from_pretrained('google/vit-base-patch16-224')
-
-# Relevance check model
-relevance_tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
-relevance_model = BertForNextSentencePrediction.from_pretrained('bert-base-uncased') 
\ No newline at end of file
+def __getattr__(name):
+    loader = _LAZY_ATTRIBUTES.get(name)
+    if loader is None:
+        raise AttributeError(f"module 'models' has no attribute '{name}'")
+    return loader()
@@ -0,0 +1,152 @@
+"""ONNX Runtime backend for the BERT text models.
+
+The sentiment and relevance models are exported from the registry's PyTorch
+weights to ONNX, dynamically quantized to INT8 and served through ONNX
+Runtime. Select it with TEXT_MODEL_BACKEND=onnx; the exported files are
+written once to ONNX_MODEL_DIR and reused on later starts.
+
+Run `python onnx_backend.py` to export both models and compare them against
+PyTorch on a set of sample reviews.
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+from typing import Dict, List
+
+import torch
+
+from model_registry import registry
+
+# "torch" (default) or "onnx"
+TEXT_MODEL_BACKEND = os.environ.get("TEXT_MODEL_BACKEND", "torch").lower()
+ONNX_MODEL_DIR = os.environ.get("ONNX_MODEL_DIR", os.path.join("saved_model", "onnx"))
+ONNX_INTRA_OP_THREADS = int(os.environ.get("ONNX_INTRA_OP_THREADS", 0))  # 0 lets ONNX Runtime decide
+ONNX_OPSET = 14
+
+INPUT_NAMES = ["input_ids", "attention_mask", "token_type_ids"]
+
+class _LogitsOnly(torch.nn.Module):
+    """Wraps a Hugging Face classifier so the exported graph has a single logits output."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask, token_type_ids):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids).logits
+
+def export_quantized(model, tokenizer, name: str, output_dir: str = ONNX_MODEL_DIR) -> str:
+    """Export model to ONNX with dynamic batch/sequence axes and quantize its weights to INT8.
+
+    Returns the path of the quantized model.
+    """
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    os.makedirs(output_dir, exist_ok=True)
+    fp32_path = os.path.join(output_dir, f"{name}.onnx")
+    int8_path = os.path.join(output_dir, f"{name}.int8.onnx")
+
+    sample = tokenizer(["export sample"], ["second segment"], return_tensors='pt')
+    dynamic_axes = {input_name: {0: "batch", 1: "sequence"} for input_name in INPUT_NAMES}
+    dynamic_axes["logits"] = {0: "batch"}
+    with torch.no_grad():
+        torch.onnx.export(
+            _LogitsOnly(model).eval(),
+            tuple(sample[input_name] for input_name in INPUT_NAMES),
+            fp32_path,
+            input_names=INPUT_NAMES,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=ONNX_OPSET,
+        )
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    return int8_path
+
+class OnnxSequenceClassifier:
+    """Callable stand-in for a Hugging Face classifier backed by an ONNX Runtime session.
+
+    Accepts the same keyword tensors the PyTorch model does and returns an
+    object with a torch .logits attribute, so callers need no changes.
+    """
+
+    def __init__(self, model_path: str):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if ONNX_INTRA_OP_THREADS:
+            options.intra_op_num_threads = ONNX_INTRA_OP_THREADS
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.model_path = model_path
+        self._input_names = [i.name for i in self.session.get_inputs()]
+
+    def __call__(self, **inputs):
+        feed = {}
+        for name in self._input_names:
+            value = inputs[name] if name in inputs else torch.zeros_like(inputs["input_ids"])
+            feed[name] = value.cpu().numpy().astype("int64")
+        logits = self.session.run(["logits"], feed)[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+def _load_onnx_model(name: str, model_key: str, tokenizer_key: str) -> OnnxSequenceClassifier:
+    path = os.path.join(ONNX_MODEL_DIR, f"{name}.int8.onnx")
+    if not os.path.exists(path):
+        path = export_quantized(registry.get(model_key), registry.get(tokenizer_key), name)
+    return OnnxSequenceClassifier(path)
+
+registry.register("sentiment_model_onnx", lambda: _load_onnx_model("sentiment", "sentiment_model", "sentiment_tokenizer"),
+                  warm_up=TEXT_MODEL_BACKEND == "onnx")
+registry.register("relevance_model_onnx", lambda: _load_onnx_model("relevance", "relevance_model", "relevance_tokenizer"),
+                  warm_up=TEXT_MODEL_BACKEND == "onnx")
+
+def get_text_model(name: str):
+    """Return the sentiment or relevance model for the configured backend."""
+    if TEXT_MODEL_BACKEND == "onnx":
+        return registry.get(f"{name}_model_onnx")
+    return registry.get(f"{name}_model")
+
+# --- Parity check ---
+
+PARITY_SAMPLES = [
+    ("Great product, works exactly as described!", "Wireless Headphones. Noise cancelling over-ear. Electronics"),
+    ("This is a fake, total scam, do not buy.", "Leather Wallet. Genuine leather bifold. Clothing"),
+    ("Arrived late but the quality is okay.", "Folding Step Stool. Non-slip plastic stool. Home & Kitchen"),
+    ("Me encanta, muy buena calidad.", "Running Shoes. Lightweight mesh trainers. Clothing"),
+    ("I bought this for my dog and he loves the taste.", "USB-C Charger. 65W fast charger. Electronics"),
+]
+
+def check_parity(samples: List[tuple] = PARITY_SAMPLES, tolerance: float = 0.05) -> Dict:
+    """Compare ONNX INT8 and PyTorch outputs for both text models.
+
+    Reports the largest absolute softmax difference and whether the predicted
+    labels agree; "passed" requires full label agreement and a max difference
+    within tolerance.
+    """
+    report = {}
+    for name, tokenizer_key in (("sentiment", "sentiment_tokenizer"), ("relevance", "relevance_tokenizer")):
+        tokenizer = registry.get(tokenizer_key)
+        if name == "sentiment":
+            inputs = tokenizer([review for review, _ in samples], padding=True, truncation=True,
+                               max_length=512, return_tensors='pt')
+        else:
+            inputs = tokenizer([reference for _, reference in samples], [review for review, _ in samples],
+                               padding=True, truncation=True, max_length=512, return_tensors='pt')
+        with torch.no_grad():
+            torch_probs = torch.softmax(registry.get(f"{name}_model")(**inputs).logits, dim=1)
+        onnx_probs = torch.softmax(registry.get(f"{name}_model_onnx")(**inputs).logits, dim=1)
+
+        max_diff = float((torch_probs - onnx_probs).abs().max())
+        label_agreement = float((torch_probs.argmax(dim=1) == onnx_probs.argmax(dim=1)).float().mean())
+        report[name] = {
+            "max_abs_prob_diff": round(max_diff, 5),
+            "label_agreement": label_agreement,
+            "passed": label_agreement == 1.0 and max_diff <= tolerance,
+        }
+    return report
+
+if __name__ == "__main__":
+    parity = check_parity()
+    for model_name, result in parity.items():
+        print(f"{model_name}: {result}")
+    sys.exit(0 if all(result["passed"] for result in parity.values()) else 1)
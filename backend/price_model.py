@@ -0,0 +1,198 @@
+"""Learned per-category price bands.
+
+Each category keeps two P-square (Jain & Chlamtac, 1985) quantile sketches of
+accepted listing prices, one for the low and one for the high percentile.
+A sketch is five markers, so memory per category is constant no matter how
+many prices it has seen and an update is O(1). Categories with fewer than
+PRICE_MODEL_MIN_SAMPLES observations fall back to the static range table.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Price model settings, overridable from the environment
+PRICE_MODEL_LOW_QUANTILE = float(os.environ.get("PRICE_MODEL_LOW_QUANTILE", 0.02))
+PRICE_MODEL_HIGH_QUANTILE = float(os.environ.get("PRICE_MODEL_HIGH_QUANTILE", 0.98))
+PRICE_MODEL_MIN_SAMPLES = int(os.environ.get("PRICE_MODEL_MIN_SAMPLES", 30))
+PRICE_MODEL_BAND_MARGIN = float(os.environ.get("PRICE_MODEL_BAND_MARGIN", 0.25))  # Widen learned bands by 25% each way
+PRICE_MODEL_PATH = os.environ.get("PRICE_MODEL_PATH", os.path.join("data", "price_model.json"))
+
+class P2Quantile:
+    """Streaming estimate of one quantile with the P-square algorithm."""
+
+    def __init__(self, p: float):
+        self.p = p
+        self.heights: List[float] = []           # Marker heights q[0..4]
+        self.positions = [1, 2, 3, 4, 5]          # Actual marker positions n[0..4]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+        self.count = 0
+
+    def add(self, x: float):
+        self.count += 1
+        q = self.heights
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                step = 1 if d > 0 else -1
+                candidate = self._parabolic(i, step)
+                if not q[i - 1] < candidate < q[i + 1]:
+                    candidate = q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+                q[i] = candidate
+                n[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self) -> Optional[float]:
+        if not self.heights:
+            return None
+        if self.count < 5:
+            # Exact quantile of the few values seen so far
+            ordered = sorted(self.heights)
+            return ordered[min(len(ordered) - 1, int(round(self.p * (len(ordered) - 1))))]
+        return self.heights[2]
+
+    def to_dict(self) -> Dict:
+        return {"p": self.p, "heights": self.heights, "positions": self.positions,
+                "desired": self.desired, "count": self.count}
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "P2Quantile":
+        sketch = cls(state["p"])
+        sketch.heights = list(state["heights"])
+        sketch.positions = list(state["positions"])
+        sketch.desired = list(state["desired"])
+        sketch.count = state["count"]
+        return sketch
+
+class PriceModel:
+    """Per-category price bands learned from accepted listings, with a static fallback.
+
+    price_range() is a dict lookup per call: learned sketches are keyed by the
+    normalized category and the substring match against the static table is
+    memoized per category.
+    """
+
+    def __init__(self, static_ranges: Dict[str, Dict], low_quantile: float = PRICE_MODEL_LOW_QUANTILE,
+                 high_quantile: float = PRICE_MODEL_HIGH_QUANTILE, min_samples: int = PRICE_MODEL_MIN_SAMPLES,
+                 margin: float = PRICE_MODEL_BAND_MARGIN):
+        self.static_ranges = static_ranges
+        self.low_quantile = low_quantile
+        self.high_quantile = high_quantile
+        self.min_samples = min_samples
+        self.margin = margin
+        self._sketches: Dict[str, Tuple[P2Quantile, P2Quantile]] = {}
+        self._static_matches: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def category_key(category: str) -> str:
+        return " ".join(category.lower().split())
+
+    def static_match(self, category: str) -> str:
+        """Static table key for category, e.g. "clothing, shoes & jewelry" for "Clothing"; "default" if none."""
+        category_lower = category.lower()
+        matched = self._static_matches.get(category_lower)
+        if matched is None:
+            matched = "default"
+            for cat_key in self.static_ranges:
+                # Handle cases like "clothing, shoes & jewelry" vs "clothing"
+                if cat_key.split(',')[0] in category_lower:
+                    matched = cat_key
+                    break
+            self._static_matches[category_lower] = matched
+        return matched
+
+    def observe(self, category: str, price: float):
+        """Add the price of an accepted listing to its category's sketches."""
+        if price <= 0:
+            return
+        key = self.category_key(category)
+        with self._lock:
+            sketches = self._sketches.get(key)
+            if sketches is None:
+                sketches = self._sketches[key] = (P2Quantile(self.low_quantile), P2Quantile(self.high_quantile))
+            sketches[0].add(price)
+            sketches[1].add(price)
+
+    def price_range(self, category: str) -> Dict:
+        """{"min", "max", "source", "matched_category", "samples"} for a listing category."""
+        matched = self.static_match(category)
+        sketches = self._sketches.get(self.category_key(category))
+        if sketches is not None and sketches[0].count >= self.min_samples:
+            with self._lock:
+                low, high, samples = sketches[0].value(), sketches[1].value(), sketches[0].count
+            return {
+                "min": round(low * (1 - self.margin), 2),
+                "max": round(high * (1 + self.margin), 2),
+                "source": "learned",
+                "matched_category": matched,
+                "samples": samples,
+            }
+        static = self.static_ranges.get(matched, self.static_ranges["default"])
+        return {"min": static["min"], "max": static["max"], "source": "static", "matched_category": matched,
+                "samples": sketches[0].count if sketches is not None else 0}
+
+    def export_state(self) -> Dict:
+        with self._lock:
+            return {
+                "low_quantile": self.low_quantile,
+                "high_quantile": self.high_quantile,
+                "categories": {key: {"low": low.to_dict(), "high": high.to_dict()}
+                               for key, (low, high) in self._sketches.items()},
+            }
+
+    def import_state(self, state: Dict):
+        """Replace the learned sketches; state must use this model's quantiles."""
+        if state.get("low_quantile") != self.low_quantile or state.get("high_quantile") != self.high_quantile:
+            raise ValueError("Price model state was built with different quantiles")
+        sketches = {key: (P2Quantile.from_dict(entry["low"]), P2Quantile.from_dict(entry["high"]))
+                    for key, entry in state.get("categories", {}).items()}
+        with self._lock:
+            self._sketches = sketches
+
+    def save(self, path: str = PRICE_MODEL_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.export_state(), f)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str = PRICE_MODEL_PATH) -> bool:
+        if not os.path.exists(path):
+            return False
+        with open(path) as f:
+            self.import_state(json.load(f))
+        return True
+
+    def stats(self) -> Dict:
+        learned = sum(1 for low, _ in self._sketches.values() if low.count >= self.min_samples)
+        return {"categories": len(self._sketches), "learned_categories": learned, "min_samples": self.min_samples}
@@ -0,0 +1,242 @@
+"""Inverted index over listed products for /products/search.
+
+Titles, brands and descriptions are tokenized once, when a listing is added,
+into postings of token -> {document number: weighted term frequency}. A query
+is tokenized the same way; each term matches its exact token and, once it is
+SEARCH_MIN_PREFIX characters long, up to SEARCH_MAX_PREFIX_EXPANSIONS tokens
+that start with it (found by bisecting a sorted vocabulary). Terms are ANDed,
+filters (category, seller, status, risk level) are set intersections, and
+results are ranked by a TF-IDF score with title > brand > description.
+
+Pages are cut with a (score, sequence) cursor, so a request only sorts the
+top `limit` candidates instead of every match. Without a keyword, unfiltered
+pages walk the listing order from the cursor and touch `limit` documents.
+"""
+
+import base64
+import bisect
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Search settings, overridable from the environment
+SEARCH_DEFAULT_LIMIT = int(os.environ.get("SEARCH_DEFAULT_LIMIT", 50))
+SEARCH_MAX_LIMIT = int(os.environ.get("SEARCH_MAX_LIMIT", 200))
+SEARCH_MIN_PREFIX = int(os.environ.get("SEARCH_MIN_PREFIX", 2))
+SEARCH_MAX_PREFIX_EXPANSIONS = int(os.environ.get("SEARCH_MAX_PREFIX_EXPANSIONS", 64))
+SEARCH_PREFIX_WEIGHT = 0.5  # A prefix hit counts half as much as an exact token
+
+FIELD_WEIGHTS = {"productTitle": 3.0, "brandName": 2.0, "productDescription": 1.0}
+FILTER_FIELDS = ("category", "seller_id", "status", "risk_level")
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text.lower()) if text else []
+
+def encode_cursor(score: float, seq: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([score, seq]).encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        score, seq = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(score), int(seq)
+    except Exception:
+        raise ValueError("Invalid search cursor")
+
+def project(document: Dict, fields: Optional[List[str]]) -> Dict:
+    """Copy of document with only the given dotted paths, e.g. ["id", "listing_data.productTitle"]."""
+    if not fields:
+        return document
+    projected: Dict = {}
+    for path in fields:
+        value, parts = document, path.split(".")
+        for part in parts:
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            target = projected
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = value
+    return projected
+
+class ProductSearchIndex:
+    """Incrementally maintained inverted index of listed products.
+
+    Only ids, tokens and filter values are kept in memory; callers load the
+    documents for a page from storage.
+    """
+
+    def __init__(self):
+        self._ids: Dict[int, str] = {}                      # Document number -> product id
+        self._order: List[int] = []                         # Live document numbers, ascending
+        self._numbers: Dict[str, int] = {}                  # Product id -> document number
+        self._postings: Dict[str, Dict[int, float]] = {}    # Token -> {document number: weight}
+        self._doc_tokens: Dict[int, List[str]] = {}          # For removal on update
+        self._doc_filters: Dict[int, Dict[str, str]] = {}
+        self._filters: Dict[str, Dict[str, Set[int]]] = {field: {} for field in FILTER_FIELDS}
+        self._vocabulary: List[str] = []                    # Sorted, for prefix lookups
+        self._next_number = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @staticmethod
+    def _filter_values(product: Dict) -> Dict[str, str]:
+        listing = product.get("listing_data") or {}
+        monitoring = product.get("monitoring_result") or {}
+        return {
+            "category": (listing.get("category") or "").lower(),
+            "seller_id": product.get("seller_id") or "",
+            "status": product.get("status") or "",
+            "risk_level": monitoring.get("risk_level") or "",
+        }
+
+    def add(self, product: Dict):
+        """Index a product document; re-adding an id replaces its previous entry."""
+        listing = product.get("listing_data") or {}
+        weights: Dict[str, float] = {}
+        for field, field_weight in FIELD_WEIGHTS.items():
+            for token in tokenize(listing.get(field, "")):
+                weights[token] = weights.get(token, 0.0) + field_weight
+        filter_values = self._filter_values(product)
+
+        with self._lock:
+            self._remove(product["id"])
+            number = self._next_number
+            self._next_number += 1
+            self._ids[number] = product["id"]
+            self._order.append(number)  # Numbers only grow, so this stays sorted
+            self._numbers[product["id"]] = number
+            for token, weight in weights.items():
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = {}
+                    bisect.insort(self._vocabulary, token)
+                postings[number] = weight
+            self._doc_tokens[number] = list(weights)
+            self._doc_filters[number] = filter_values
+            for field, value in filter_values.items():
+                self._filters[field].setdefault(value, set()).add(number)
+
+    def remove(self, product_id: str):
+        with self._lock:
+            self._remove(product_id)
+
+    def _remove(self, product_id: str):
+        number = self._numbers.pop(product_id, None)
+        if number is None:
+            return
+        del self._ids[number]
+        del self._order[bisect.bisect_left(self._order, number)]
+        for token in self._doc_tokens.pop(number):
+            postings = self._postings[token]
+            del postings[number]
+            if not postings:
+                del self._postings[token]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+        for field, value in self._doc_filters.pop(number).items():
+            members = self._filters[field][value]
+            members.discard(number)
+            if not members:
+                del self._filters[field][value]
+
+    def rebuild(self, products: Iterable[Dict]):
+        with self._lock:
+            self.__init__()
+        for product in products:
+            self.add(product)
+
+    def _term_scores(self, term: str) -> Dict[int, float]:
+        """Document number -> score for one query term (exact token plus prefix expansions)."""
+        total = len(self._ids)
+        scores: Dict[int, float] = {}
+        expansions = [(term, 1.0)] if term in self._postings else []
+        if len(term) >= SEARCH_MIN_PREFIX:
+            start = bisect.bisect_left(self._vocabulary, term)
+            for token in self._vocabulary[start:start + SEARCH_MAX_PREFIX_EXPANSIONS + 1]:
+                if not token.startswith(term):
+                    break
+                if token != term:
+                    expansions.append((token, SEARCH_PREFIX_WEIGHT))
+        for token, factor in expansions:
+            postings = self._postings[token]
+            idf = math.log(1 + total / len(postings))
+            for number, weight in postings.items():
+                score = factor * weight * idf
+                if score > scores.get(number, 0.0):
+                    scores[number] = score
+        return scores
+
+    def search(self, keyword: str = "", filters: Optional[Dict[str, str]] = None,
+               limit: int = SEARCH_DEFAULT_LIMIT, cursor: Optional[str] = None) -> Dict:
+        """Ranked page of product ids: {"ids", "scores", "total", "next_cursor"}.
+
+        Without a keyword every product passing the filters matches with score
+        0, in the order it was listed.
+        """
+        limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+        after = decode_cursor(cursor) if cursor else None
+        terms = list(dict.fromkeys(tokenize(keyword)))
+
+        with self._lock:
+            candidate_sets = []
+            for field, value in (filters or {}).items():
+                if value is None or value == "":
+                    continue
+                if field not in self._filters:
+                    raise ValueError(f"Unsupported search filter: {field}")
+                key = value.lower() if field == "category" else value
+                candidate_sets.append(self._filters[field].get(key, set()))
+            allowed = set.intersection(*sorted(candidate_sets, key=len)) if candidate_sets else None
+
+            if terms:
+                matches: Optional[Dict[int, float]] = None
+                for scores in sorted((self._term_scores(term) for term in terms), key=len):
+                    if matches is None:
+                        matches = {n: s for n, s in scores.items() if allowed is None or n in allowed}
+                    else:
+                        matches = {n: s + scores[n] for n, s in matches.items() if n in scores}
+                    if not matches:
+                        break
+                matches = matches or {}
+                total = len(matches)
+
+                # Order is (score desc, document number asc); the cursor is the last item returned
+                ranked = ((-score, number) for number, score in matches.items())
+                if after is not None:
+                    last = (-after[0], after[1])
+                    ranked = (item for item in ranked if item > last)
+                page = heapq.nsmallest(limit + 1, ranked)
+            elif allowed is None:
+                # Every product matches with score 0: take the next numbers in listing order.
+                # Page items hold negated scores, as in the ranked branch.
+                start = bisect.bisect_right(self._order, after[1]) if after is not None else 0
+                page = [(-0.0, number) for number in self._order[start:start + limit + 1]]
+                total = len(self._order)
+            else:
+                numbers = allowed if after is None else (n for n in allowed if n > after[1])
+                page = [(-0.0, number) for number in heapq.nsmallest(limit + 1, numbers)]
+                total = len(allowed)
+            ids = [self._ids[number] for _, number in page[:limit]]
+
+        next_cursor = None
+        if len(page) > limit:
+            score, number = page[limit - 1]
+            next_cursor = encode_cursor(-score, number)
+        return {
+            "ids": ids,
+            "scores": [round(-score, 4) for score, _ in page[:limit]],
+            "total": total,
+            "next_cursor": next_cursor,
+        }
+
+    def stats(self) -> Dict:
+        return {"products": len(self._ids), "tokens": len(self._postings)}
@@ -1,39 +1,32 @@
+import asyncio
 import cv2
 import numpy as np
 from PIL import Image
 import torch
 import torchvision.transforms as transforms
-from torchvision.models import resnet50, ResNet50_Weights
-from transformers import ViTImageProcessor, ViTForImageClassification
 import pytesseract
 import logging
 from typing import Dict, List, Tuple, Optional, Union
 import os
 from datetime import datetime
 from test_products import TEST_PRODUCTS
+from inference_executor import run_cpu
+from micro_batcher import MicroBatcher
+from model_registry import registry
 from skimage.feature import local_binary_pattern
 from skimage.metrics import structural_similarity as ssim
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class ProductVerifier:
     def __init__(self):
         try:
-            # Initialize ResNet50 for feature extraction
-            self.resnet = resnet50(weights=ResNet50_Weights.IMAGENET1K_V2)
-            self.resnet = torch.nn.Sequential(*list(self.resnet.children())[:-1])  # Remove classification layer
-            self.resnet.eval()
-            
-            # Initialize ViT for detailed image analysis
-            self.vit_processor = ViTImageProcessor.from_pretrained('google/vit-base-patch16-224')
-            self.vit_model = ViTForImageClassification.from_pretrained('google/vit-base-patch16-224')
+            # Models come from the shared registry on first use (see the properties below)
+            self._resnet = None
             
             # Set device
             self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-            self.resnet.to(self.device)
-            self.vit_model.to(self.device)
             
             # Image preprocessing
             self.transform = transforms.Compose([
@@ -48,12 +41,49 @@ class ProductVerifier:
             
             # Initialize QR code detector
             self.qr_detector = cv2.QRCodeDetector()
+
+            # Concurrent verifications share ResNet50 and ViT forward passes
+            self.resnet_batcher = MicroBatcher("resnet50", self._resnet_forward)
+            self.vit_batcher = MicroBatcher("vit_classifier", self._vit_forward)
             
             logger.info("ProductVerifier initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing ProductVerifier: {str(e)}")
             raise
 
+    @property
+    def resnet(self):
+        """ResNet50 for feature extraction (classification layer removed)."""
+        if self._resnet is None:
+            self._resnet = registry.get("resnet50_features").to(self.device)
+        return self._resnet
+
+    @property
+    def vit_processor(self):
+        return registry.get("vit_processor")
+
+    @property
+    def vit_model(self):
+        """ViT for detailed image analysis, shared with the review image model.
+
+        It stays on the device the registry loaded it on, since other callers use it too.
+        """
+        return registry.get("vit_classifier")
+
+    def _resnet_forward(self, tensors: List[torch.Tensor]) -> List[np.ndarray]:
+        """Batch ResNet50 forward pass over (1, 3, 224, 224) tensors; one feature vector per input."""
+        with torch.no_grad():
+            features = self.resnet(torch.cat(tensors).to(self.device)).cpu().numpy()
+        return [features[i].squeeze() for i in range(len(tensors))]
+
+    def _vit_forward(self, pixel_values: List[torch.Tensor]) -> List[np.ndarray]:
+        """Batch ViT forward pass; returns the (1, hidden) CLS state of the last layer per input."""
+        with torch.no_grad():
+            vit_model = self.vit_model
+            outputs = vit_model(pixel_values=torch.cat(pixel_values).to(vit_model.device), output_hidden_states=True)
+            features = outputs.hidden_states[-1][:, 0].cpu().numpy()
+        return [features[i:i + 1] for i in range(len(pixel_values))]
+
     def extract_barcode(self, image: np.ndarray) -> Optional[str]:
         """Extract and verify QR codes using OpenCV's QRCodeDetector."""
         try:
@@ -88,46 +118,64 @@ class ProductVerifier:
             logger.error(f"Error in QR code extraction: {str(e)}")
             return None
 
+    def _prepare_visual_features(self, image: np.ndarray) -> Tuple[torch.Tensor, torch.Tensor, Dict]:
+        """Model inputs (ResNet tensor, ViT pixel values) plus the OpenCV/LBP features, which need no model."""
+        # Convert to PIL Image
+        pil_image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+        
+        # ResNet50 input
+        img_tensor = self.transform(pil_image).unsqueeze(0)
+        
+        # ViT input
+        vit_inputs = self.vit_processor(images=pil_image, return_tensors="pt")
+        
+        # SIFT features
+        keypoints, descriptors = self.sift.detectAndCompute(image, None)
+        
+        # Color histogram
+        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+        color_hist = cv2.calcHist([hsv], [0, 1], None, [180, 256], [0, 180, 0, 256])
+        cv2.normalize(color_hist, color_hist, alpha=0, beta=1, norm_type=cv2.NORM_MINMAX)
+        
+        # Texture features using LBP
+        lbp = local_binary_pattern(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), 8, 1, method='uniform')
+        lbp_hist, _ = np.histogram(lbp.ravel(), bins=59, range=(0, 59))
+        lbp_hist = lbp_hist.astype("float")
+        lbp_hist /= (lbp_hist.sum() + 1e-7)
+        
+        return img_tensor, vit_inputs["pixel_values"], {
+            "sift_descriptors": descriptors if descriptors is not None else [],
+            "color_histogram": color_hist,
+            "texture_features": lbp_hist,
+            "num_keypoints": len(keypoints) if keypoints is not None else 0
+        }
+
     def extract_visual_features(self, image: np.ndarray) -> Dict:
-        """Extract comprehensive visual features using multiple models."""
+        """Extract comprehensive visual features using multiple models; blocking."""
         try:
-            # Convert to PIL Image
-            pil_image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
-            
-            # ResNet50 features
-            img_tensor = self.transform(pil_image).unsqueeze(0).to(self.device)
-            with torch.no_grad():
-                resnet_features = self.resnet(img_tensor).squeeze().cpu().numpy()
-            
-            # ViT features
-            vit_inputs = self.vit_processor(images=pil_image, return_tensors="pt").to(self.device)
-            with torch.no_grad():
-                vit_outputs = self.vit_model(**vit_inputs, output_hidden_states=True)
-                vit_features = vit_outputs.hidden_states[-1][:, 0].cpu().numpy()
-            
-            # SIFT features
-            keypoints, descriptors = self.sift.detectAndCompute(image, None)
-            
-            # Color histogram
-            hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-            color_hist = cv2.calcHist([hsv], [0, 1], None, [180, 256], [0, 180, 0, 256])
-            cv2.normalize(color_hist, color_hist, alpha=0, beta=1, norm_type=cv2.NORM_MINMAX)
-            
-            # Texture features using LBP
-            lbp = local_binary_pattern(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), 8, 1, method='uniform')
-            lbp_hist, _ = np.histogram(lbp.ravel(), bins=59, range=(0, 59))
-            lbp_hist = lbp_hist.astype("float")
-            lbp_hist /= (lbp_hist.sum() + 1e-7)
-            
+            img_tensor, pixel_values, features = self._prepare_visual_features(image)
             return {
-                "resnet_features": resnet_features,
-                "vit_features": vit_features,
-                "sift_descriptors": descriptors if descriptors is not None else [],
-                "color_histogram": color_hist,
-                "texture_features": lbp_hist,
-                "num_keypoints": len(keypoints) if keypoints is not None else 0
+                "resnet_features": self.resnet_batcher.submit(img_tensor),
+                "vit_features": self.vit_batcher.submit(pixel_values),
+                **features
             }
-            
+        except Exception as e:
+            logger.error(f"Error in visual feature extraction: {str(e)}")
+            return {}
+
+    async def extract_visual_features_async(self, image: np.ndarray) -> Dict:
+        """extract_visual_features for the event loop.
+
+        Preprocessing and the OpenCV features run on the CPU pool; the ResNet
+        and ViT passes are awaited on the loop, so batches are not limited to
+        the number of CPU pool threads.
+        """
+        try:
+            img_tensor, pixel_values, features = await run_cpu(self._prepare_visual_features, image)
+            resnet_features, vit_features = await asyncio.gather(
+                self.resnet_batcher.asubmit(img_tensor), self.vit_batcher.asubmit(pixel_values)
+            )
+            return {"resnet_features": resnet_features, "vit_features": vit_features, **features}
         except Exception as e:
             logger.error(f"Error in visual feature extraction: {str(e)}")
             return {}
@@ -196,157 +244,184 @@ class ProductVerifier:
             return [self._convert_to_serializable(item) for item in obj]
         return obj
 
+    def _load_verification_inputs(self, image: Union[str, np.ndarray], product_id: str) -> Tuple[np.ndarray, dict, Optional[str], List[np.ndarray]]:
+        """Image, product record, decoded barcode (if any) and the genuine reference images."""
+        # Load and preprocess image
+        if isinstance(image, str):
+            img = cv2.imread(image)
+        else:
+            img = image  # Already a numpy array
+            
+        if img is None:
+            raise ValueError("Could not load image")
+        
+        # Get product details
+        product = TEST_PRODUCTS.get(product_id)
+        if not product:
+            raise ValueError("Product not found")
+        
+        # First check if the image contains a barcode
+        barcode_data = self.extract_barcode(img)
+        
+        genuine_images = []
+        if not barcode_data:
+            for genuine_img_path in product["genuine_images"]:
+                if os.path.exists(genuine_img_path):
+                    genuine_img = cv2.imread(genuine_img_path)
+                    if genuine_img is not None:
+                        genuine_images.append(genuine_img)
+        return img, product, barcode_data, genuine_images
+
     def verify_product(self, image: Union[str, np.ndarray], product_id: str) -> dict:
-        """Main verification method with separate logic for barcode and image verification."""
+        """Main verification method with separate logic for barcode and image verification; blocking."""
         try:
-            # Load and preprocess image
-            if isinstance(image, str):
-                img = cv2.imread(image)
-            else:
-                img = image  # Already a numpy array
-                
-            if img is None:
-                raise ValueError("Could not load image")
-            
-            # Get product details
-            product = TEST_PRODUCTS.get(product_id)
-            if not product:
-                raise ValueError("Product not found")
-            
-            # Initialize results
-            results = {
-                "order_id": product_id,
-                "timestamp": datetime.now().isoformat(),
-                "verification_steps": []
-            }
-            
-            # First check if the image contains a barcode
-            barcode_data = self.extract_barcode(img)
-            
-            if barcode_data:
-                # Barcode verification mode
-                logger.info("Barcode detected - performing barcode verification")
-                barcode_match = barcode_data == product["barcode"]
-                
-                results["barcode_found"] = True
-                results["barcode_match"] = bool(barcode_match)  # Convert to Python bool
-                results["verification_steps"].append({
-                    "step": "Barcode Verification",
-                    "status": "success" if barcode_match else "failure",
-                    "details": f"Barcode {'matched' if barcode_match else 'did not match'} with product database"
-                })
-                
-                # For barcode verification, we only need to check the barcode match
-                results["overall_score"] = float(1.0 if barcode_match else 0.0)  # Convert to Python float
-                results["is_authentic"] = bool(barcode_match)  # Convert to Python bool
-                # Set all product analysis fields to None/0/empty for barcode-only case
-                results["visual_similarity"] = 0.0
-                results["texture_score"] = 0.0
-                results["color_match"] = 0.0
-                results["material_quality"] = "Unknown"
-                results["stitching_quality"] = "Unknown"
-                results["security_features"] = []
-                
-            else:
-                # Image verification mode
-                logger.info("No barcode detected - performing image verification")
-                results["barcode_found"] = False
-                
-                # 1. Visual Feature Analysis
+            img, product, barcode_data, genuine_images = self._load_verification_inputs(image, product_id)
+            current_features, genuine_features = None, []
+            if not barcode_data:
                 current_features = self.extract_visual_features(img)
+                genuine_features = [self.extract_visual_features(genuine_img) for genuine_img in genuine_images]
+            return self._verification_results(img, product, product_id, barcode_data, current_features, genuine_features)
+        except Exception as e:
+            logger.error(f"Error in product verification: {str(e)}")
+            return {"error": str(e)}
+
+    async def verify_product_async(self, image: Union[str, np.ndarray], product_id: str) -> dict:
+        """verify_product for the event loop: OpenCV work runs on the CPU pool and model passes join shared batches."""
+        try:
+            img, product, barcode_data, genuine_images = await run_cpu(self._load_verification_inputs, image, product_id)
+            current_features, genuine_features = None, []
+            if not barcode_data:
+                current_features, *genuine_features = await asyncio.gather(
+                    *(self.extract_visual_features_async(each) for each in [img, *genuine_images])
+                )
+            return await run_cpu(self._verification_results, img, product, product_id, barcode_data,
+                                 current_features, genuine_features)
+        except Exception as e:
+            logger.error(f"Error in product verification: {str(e)}")
+            return {"error": str(e)}
+
+    def _verification_results(self, img: np.ndarray, product: dict, product_id: str, barcode_data: Optional[str],
+                              current_features: Optional[Dict], genuine_features: List[Dict]) -> dict:
+        """Scores and verification steps from the barcode or the precomputed visual features."""
+        # Initialize results
+        results = {
+            "order_id": product_id,
+            "timestamp": datetime.now().isoformat(),
+            "verification_steps": []
+        }
+        
+        if barcode_data:
+            # Barcode verification mode
+            logger.info("Barcode detected - performing barcode verification")
+            barcode_match = barcode_data == product["barcode"]
+            
+            results["barcode_found"] = True
+            results["barcode_match"] = bool(barcode_match)  # Convert to Python bool
+            results["verification_steps"].append({
+                "step": "Barcode Verification",
+                "status": "success" if barcode_match else "failure",
+                "details": f"Barcode {'matched' if barcode_match else 'did not match'} with product database"
+            })
+            
+            # For barcode verification, we only need to check the barcode match
+            results["overall_score"] = float(1.0 if barcode_match else 0.0)  # Convert to Python float
+            results["is_authentic"] = bool(barcode_match)  # Convert to Python bool
+            # Set all product analysis fields to None/0/empty for barcode-only case
+            results["visual_similarity"] = 0.0
+            results["texture_score"] = 0.0
+            results["color_match"] = 0.0
+            results["material_quality"] = "Unknown"
+            results["stitching_quality"] = "Unknown"
+            results["security_features"] = []
+            
+        else:
+            # Image verification mode
+            logger.info("No barcode detected - performing image verification")
+            results["barcode_found"] = False
+            
+            # 1. Visual Feature Analysis: compare with genuine product images
+            genuine_scores = [
+                self.compare_features(current_features, features) for features in genuine_features
+            ]
+            
+            if genuine_scores:
+                # Calculate average similarities
+                avg_scores = {
+                    key: np.mean([score[key] for score in genuine_scores])
+                    for key in genuine_scores[0].keys()
+                }
                 
-                # Load and compare with genuine product images
-                genuine_scores = []
-                for genuine_img_path in product["genuine_images"]:
-                    if os.path.exists(genuine_img_path):
-                        genuine_img = cv2.imread(genuine_img_path)
-                        if genuine_img is not None:
-                            genuine_features = self.extract_visual_features(genuine_img)
-                            similarities = self.compare_features(current_features, genuine_features)
-                            genuine_scores.append(similarities)
-                
-                if genuine_scores:
-                    # Calculate average similarities
-                    avg_scores = {
-                        key: np.mean([score[key] for score in genuine_scores])
-                        for key in genuine_scores[0].keys()
-                    }
-                    
-                    # Visual similarity score
-                    visual_score = float(avg_scores.get("resnet_similarity", 0) * 0.4 +
-                                  avg_scores.get("vit_similarity", 0) * 0.3 +
-                                  avg_scores.get("sift_similarity", 0) * 0.3)
-                    
-                    results["visual_similarity"] = visual_score
-                    results["verification_steps"].append({
-                        "step": "Visual Similarity",
-                        "status": "success" if visual_score > 0.75 else "failure",
-                        "details": f"Image matches {(visual_score * 100):.1f}% with genuine product"
-                    })
-                    
-                    # Color analysis
-                    color_score = float(avg_scores.get("color_similarity", 0))
-                    results["color_match"] = color_score
-                    results["verification_steps"].append({
-                        "step": "Color Analysis",
-                        "status": "success" if color_score > 0.7 else "failure",
-                        "details": f"Color signature match: {(color_score * 100):.1f}%"
-                    })
-                    
-                    # Texture analysis
-                    texture_score = float(avg_scores.get("texture_similarity", 0))
-                    results["texture_score"] = texture_score
-                    results["verification_steps"].append({
-                        "step": "Texture Analysis",
-                        "status": "success" if texture_score > 0.8 else "failure",
-                        "details": f"Texture pattern match: {(texture_score * 100):.1f}%"
-                    })
+                # Visual similarity score
+                visual_score = float(avg_scores.get("resnet_similarity", 0) * 0.4 +
+                              avg_scores.get("vit_similarity", 0) * 0.3 +
+                              avg_scores.get("sift_similarity", 0) * 0.3)
                 
-                # 2. Material Quality Assessment
-                material_quality = self._assess_material_quality(img, product["features"]["texture_features"])
-                results["material_quality"] = material_quality
+                results["visual_similarity"] = visual_score
                 results["verification_steps"].append({
-                    "step": "Material Quality",
-                    "status": "success" if material_quality == "High" else "warning",
-                    "details": f"Material quality assessment: {material_quality}"
+                    "step": "Visual Similarity",
+                    "status": "success" if visual_score > 0.75 else "failure",
+                    "details": f"Image matches {(visual_score * 100):.1f}% with genuine product"
                 })
                 
-                # 3. Logo Detection
-                logo_found = bool(self._detect_logo(img, product["features"]["logo_positions"]))
-                results["logo_detection"] = logo_found
+                # Color analysis
+                color_score = float(avg_scores.get("color_similarity", 0))
+                results["color_match"] = color_score
                 results["verification_steps"].append({
-                    "step": "Logo Detection",
-                    "status": "success" if logo_found else "failure",
-                    "details": "Brand logo detected and verified" if logo_found else "Could not verify brand logo"
+                    "step": "Color Analysis",
+                    "status": "success" if color_score > 0.7 else "failure",
+                    "details": f"Color signature match: {(color_score * 100):.1f}%"
                 })
                 
-                # 4. Security Features
-                security_features = self._detect_security_features(img, product)
-                results["security_features"] = security_features
+                # Texture analysis
+                texture_score = float(avg_scores.get("texture_similarity", 0))
+                results["texture_score"] = texture_score
                 results["verification_steps"].append({
-                    "step": "Security Features",
-                    "status": "success" if len(security_features) > 0 else "warning",
-                    "details": f"Found {len(security_features)} security features"
+                    "step": "Texture Analysis",
+                    "status": "success" if texture_score > 0.8 else "failure",
+                    "details": f"Texture pattern match: {(texture_score * 100):.1f}%"
                 })
-                
-                # Calculate overall authenticity score for image verification
-                scores = [
-                    visual_score if 'visual_score' in locals() else 0.0,
-                    texture_score if 'texture_score' in locals() else 0.0,
-                    color_score if 'color_score' in locals() else 0.0,
-                    1.0 if logo_found else 0.0,
-                    1.0 if material_quality == "High" else 0.5,
-                    1.0 if len(security_features) > 0 else 0.5
-                ]
-                results["overall_score"] = float(sum(scores) / len(scores))
-                results["is_authentic"] = bool(results["overall_score"] > 0.75)
-            
-            # Convert all NumPy types to Python native types
-            return self._convert_to_serializable(results)
             
-        except Exception as e:
-            logger.error(f"Error in product verification: {str(e)}")
-            return {"error": str(e)}
+            # 2. Material Quality Assessment
+            material_quality = self._assess_material_quality(img, product["features"]["texture_features"])
+            results["material_quality"] = material_quality
+            results["verification_steps"].append({
+                "step": "Material Quality",
+                "status": "success" if material_quality == "High" else "warning",
+                "details": f"Material quality assessment: {material_quality}"
+            })
+            
+            # 3. Logo Detection
+            logo_found = bool(self._detect_logo(img, product["features"]["logo_positions"]))
+            results["logo_detection"] = logo_found
+            results["verification_steps"].append({
+                "step": "Logo Detection",
+                "status": "success" if logo_found else "failure",
+                "details": "Brand logo detected and verified" if logo_found else "Could not verify brand logo"
+            })
+            
+            # 4. Security Features
+            security_features = self._detect_security_features(img, product)
+            results["security_features"] = security_features
+            results["verification_steps"].append({
+                "step": "Security Features",
+                "status": "success" if len(security_features) > 0 else "warning",
+                "details": f"Found {len(security_features)} security features"
+            })
+            
+            # Calculate overall authenticity score for image verification
+            scores = [
+                visual_score if 'visual_score' in locals() else 0.0,
+                texture_score if 'texture_score' in locals() else 0.0,
+                color_score if 'color_score' in locals() else 0.0,
+                1.0 if logo_found else 0.0,
+                1.0 if material_quality == "High" else 0.5,
+                1.0 if len(security_features) > 0 else 0.5
+            ]
+            results["overall_score"] = float(sum(scores) / len(scores))
+            results["is_authentic"] = bool(results["overall_score"] > 0.75)
+        
+        # Convert all NumPy types to Python native types
+        return self._convert_to_serializable(results)
 
     def _assess_material_quality(self, img: np.ndarray, expected_texture: str) -> str:
         """Assess material quality using texture analysis."""
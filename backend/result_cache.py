@@ -0,0 +1,83 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# Review result cache limits, overridable from the environment
+REVIEW_CACHE_SIZE = int(os.environ.get("REVIEW_CACHE_SIZE", 10000))
+REVIEW_CACHE_TTL = float(os.environ.get("REVIEW_CACHE_TTL", 3600))
+
+def normalize_text(text: str) -> str:
+    """Lowercase and strip surrounding whitespace.
+
+    The review models use uncased BERT tokenizers and the fake-indicator rules
+    match on lowercased text, so texts that normalize equally score equally.
+    Inner whitespace is kept because multi-word indicators such as
+    "not authentic" only match with a single space.
+    """
+    return text.strip().lower()
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after ttl seconds."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if time.monotonic() - stored_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+# Sentiment and relevance results for review texts, see review_cache_key
+review_result_cache = TTLCache(REVIEW_CACHE_SIZE, REVIEW_CACHE_TTL)
+
+def review_cache_key(review_text: str, title: str, description: str, category: str) -> tuple:
+    """Key a review by its normalized text plus the product reference used for relevance."""
+    return (text_hash(review_text), text_hash(f"{title}. {description}. {category}"))
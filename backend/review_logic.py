@@ -1,45 +1,135 @@
+import asyncio
+import logging
 import torch
 from PIL import Image
-import requests
 from io import BytesIO
-from models import text_tokenizer, text_model, image_processor, image_model, relevance_tokenizer, relevance_model
+from image_fetcher import image_fetcher
+from embedding_cache import image_embedding_cache, content_hash
+from inference_executor import run_cpu
+from micro_batcher import MicroBatcher
+from keyword_rules import RULE_MATCHER, FAKE_INDICATORS_TAG
+import models
+
+logger = logging.getLogger(__name__)
+
+# Reviews per forward pass when scoring in bulk. Reviews are sorted by token
+# length before being split into buckets so each bucket pads to a similar length.
+REVIEW_BATCH_SIZE = 32
+
+def _length_buckets(lengths, batch_size):
+    """Yield lists of indices grouped by similar length, at most batch_size each."""
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    for start in range(0, len(order), batch_size):
+        yield order[start:start + batch_size]
+
+def _run_bucketed(tokenizer, model, encodings, batch_size):
+    """Pad each length bucket of pre-tokenized inputs and run one forward pass per bucket.
+
+    Returns the logits for every input, in the original input order.
+    """
+    keys = list(encodings.keys())
+    features = [{key: encodings[key][i] for key in keys} for i in range(len(encodings["input_ids"]))]
+    lengths = [len(feature["input_ids"]) for feature in features]
+    logits = [None] * len(features)
+
+    with torch.no_grad():
+        for bucket in _length_buckets(lengths, batch_size):
+            inputs = tokenizer.pad([features[i] for i in bucket], padding=True, return_tensors='pt')
+            outputs = model(**inputs)
+            for row, i in enumerate(bucket):
+                logits[i] = outputs.logits[row]
+    return logits
+
+def analyze_review_texts(review_texts, batch_size=REVIEW_BATCH_SIZE):
+    """Batch version of analyze_review_text; returns one score per review, in order."""
+    if not review_texts:
+        return []
+    encodings = models.text_tokenizer(list(review_texts), truncation=True, max_length=512)
+    logits = _run_bucketed(models.text_tokenizer, models.text_model, encodings, batch_size)
+
+    scores = []
+    for review_text, review_logits in zip(review_texts, logits):
+        sentiment = torch.softmax(review_logits, dim=0)
+        sentiment_score = float(torch.argmax(sentiment) + 1) * 20  # Scale to 100
+        indicators = RULE_MATCHER.matches_by_tag(review_text, [FAKE_INDICATORS_TAG]).get(FAKE_INDICATORS_TAG, [])
+        penalty = len(indicators) * 15
+        scores.append(max(0, sentiment_score - penalty))
+    return scores
 
 def analyze_review_text(review_text):
-    inputs = text_tokenizer(review_text, return_tensors='pt', truncation=True, max_length=512)
-    outputs = text_model(**inputs)
-    sentiment = torch.softmax(outputs.logits, dim=1)
-    sentiment_score = float(torch.argmax(sentiment) + 1) * 20  # Scale to 100
+    return analyze_review_texts([review_text])[0]
+
+def preprocess_review_image(image_bytes):
+    """Decode raw image bytes into ViT pixel values of shape (1, 3, 224, 224)."""
+    img = Image.open(BytesIO(image_bytes)).resize((224, 224)).convert("RGB")
+    return models.image_processor(images=img, return_tensors='pt')["pixel_values"]
 
-    fake_indicators = ['fake', 'counterfeit', 'not authentic', 'not as described', 'scam']
-    penalty = sum(indicator in review_text.lower() for indicator in fake_indicators) * 15
-    return max(0, sentiment_score - penalty)
+def embed_pixel_values(pixel_values_list):
+    """Batch ViT forward pass; returns one (1, hidden) CLS embedding per input, in order."""
+    with torch.no_grad():
+        embeddings = models.image_model(pixel_values=torch.cat(pixel_values_list)).last_hidden_state[:, 0, :].numpy()
+    return [embeddings[i:i + 1] for i in range(len(pixel_values_list))]
 
-def compare_images(product_url, review_url):
+def embed_image_bytes(image_bytes):
+    """Return the ViT CLS embedding for raw image bytes as a (1, hidden) array."""
+    return embed_pixel_values([preprocess_review_image(image_bytes)])[0]
+
+async def _fetch_and_embed(url):
+    image_bytes = await image_fetcher.fetch(url)
+    key = content_hash(image_bytes)
+    embedding = await image_embedding_cache.get(key)
+    if embedding is None:
+        pixel_values = await run_cpu(preprocess_review_image, image_bytes)
+        embedding = await image_embedding_batcher.asubmit(pixel_values)
+        await image_embedding_cache.put(key, embedding)
+    image_embedding_cache.remember_url(url, key)
+    return embedding
+
+async def get_image_embedding(url):
+    """Embedding for the image at url, computed at most once per URL and per image content."""
+    embedding = await image_embedding_cache.get_by_url(url)
+    if embedding is not None:
+        return embedding
+    return await image_embedding_cache.single_flight(url, lambda: _fetch_and_embed(url))
+
+async def compare_images(product_url, review_url):
     try:
         if not review_url or not product_url:
             return None
-        product_img = Image.open(BytesIO(requests.get(product_url).content)).resize((224, 224)).convert("RGB")
-        review_img = Image.open(BytesIO(requests.get(review_url).content)).resize((224, 224)).convert("RGB")
-
-        with torch.no_grad():
-            prod_feat = image_processor(images=product_img, return_tensors='pt')
-            rev_feat = image_processor(images=review_img, return_tensors='pt')
-
-            prod_emb = image_model(**prod_feat).last_hidden_state[:, 0, :]
-            rev_emb = image_model(**rev_feat).last_hidden_state[:, 0, :]
+        prod_emb, rev_emb = await asyncio.gather(get_image_embedding(product_url), get_image_embedding(review_url))
 
-        similarity = torch.nn.functional.cosine_similarity(prod_emb, rev_emb)
+        similarity = torch.nn.functional.cosine_similarity(torch.from_numpy(prod_emb), torch.from_numpy(rev_emb))
         return round(float(similarity.item()) * 100, 2)
     except Exception as e:
-        print("Image comparison error:", e)
+        logger.warning(f"Image comparison error: {e}")
         return None
 
+def check_relevance_batch(items, batch_size=REVIEW_BATCH_SIZE):
+    """Batch version of check_relevance.
+
+    items is a list of (review, title, desc, category) tuples; returns one
+    relevance dict per item, in order.
+    """
+    if not items:
+        return []
+    references = [f"{title}. {desc}. {category}" for _, title, desc, category in items]
+    reviews = [review for review, _, _, _ in items]
+    encodings = models.relevance_tokenizer(references, reviews, truncation=True, max_length=512)
+    logits = _run_bucketed(models.relevance_tokenizer, models.relevance_model, encodings, batch_size)
+
+    results = []
+    for item_logits in logits:
+        is_irrelevant = torch.softmax(item_logits, dim=0)[0].item()
+        results.append({
+            "relevance_score": round(is_irrelevant, 2),
+            "relevance_check": "relevant" if is_irrelevant < 0.5 else "possibly irrelevant"
+        })
+    return results
+
 def check_relevance(review, title, desc, category):
-    reference = f"{title}. {desc}. {category}"
-    inputs = relevance_tokenizer(reference, review, return_tensors='pt', truncation=True, max_length=512)
-    outputs = relevance_model(**inputs)
-    is_irrelevant = torch.softmax(outputs.logits, dim=1)[0][0].item()
-    return {
-        "relevance_score": round(is_irrelevant, 2),
-        "relevance_check": "relevant" if is_irrelevant < 0.5 else "possibly irrelevant"
-    } 
\ No newline at end of file
+    return check_relevance_batch([(review, title, desc, category)])[0]
+
+# Concurrent single-review calls are merged into shared forward passes
+sentiment_batcher = MicroBatcher("sentiment", analyze_review_texts)
+relevance_batcher = MicroBatcher("relevance", check_relevance_batch)
+image_embedding_batcher = MicroBatcher("vit_embedding", embed_pixel_values)
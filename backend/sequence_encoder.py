@@ -0,0 +1,75 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import List
+
+import numpy as np
+
+# Encoded brand/tagline sequences kept in memory, overridable from the environment
+SEQUENCE_CACHE_SIZE = int(os.environ.get("SEQUENCE_CACHE_SIZE", 4096))
+
+class SequenceEncoder:
+    """Turns text into zero-padded Word2Vec sequences for the Keras authenticity model.
+
+    Produces the same (max_len, embedding_dim) matrices as the old per-word
+    loop: lowercase, split on whitespace, keep the first max_len words and
+    leave out-of-vocabulary words and padding as zero rows. Texts become
+    index arrays (-1 for no vector) and a whole batch is filled with one
+    fancy-index gather into a preallocated buffer. Encoded single texts are
+    memoized in an LRU since brand names and titles repeat constantly.
+    """
+
+    def __init__(self, word_vectors, max_len: int, embedding_dim: int, cache_size: int = SEQUENCE_CACHE_SIZE):
+        self.key_to_index = word_vectors.key_to_index
+        self.vectors = word_vectors.vectors
+        self.max_len = max_len
+        self.embedding_dim = embedding_dim
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def indices(self, texts: List[str]) -> np.ndarray:
+        """(batch, max_len) int array of vocabulary indices, -1 where there is no vector."""
+        index = np.full((len(texts), self.max_len), -1, dtype=np.int64)
+        lookup = self.key_to_index.get
+        for row, text in enumerate(texts):
+            ids = [lookup(word, -1) for word in text.lower().split()[:self.max_len]]
+            index[row, :len(ids)] = ids
+        return index
+
+    def encode_batch(self, texts: List[str]) -> np.ndarray:
+        """(batch, max_len, embedding_dim) float32 sequences for texts."""
+        index = self.indices(texts)
+        sequences = np.zeros((len(texts), self.max_len, self.embedding_dim), dtype=np.float32)
+        present = index >= 0
+        sequences[present] = self.vectors[index[present]]
+        return sequences
+
+    def encode(self, text: str) -> np.ndarray:
+        """(1, max_len, embedding_dim) sequence for one text, memoized; the result is read-only."""
+        with self._lock:
+            cached = self._cache.get(text)
+            if cached is not None:
+                self._cache.move_to_end(text)
+                self.hits += 1
+                return cached
+            self.misses += 1
+        sequence = self.encode_batch([text])
+        sequence.setflags(write=False)
+        with self._lock:
+            self._cache[text] = sequence
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return sequence
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._cache),
+            "max_entries": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
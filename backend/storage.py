@@ -0,0 +1,467 @@
+"""Pluggable document storage for listings and flags.
+
+Collections expose a small Mongo-style API (insert_one, find_one, find,
+update_one, delete_one, count_documents) so the same calls work against the
+embedded SQLite backend used by default and an in-memory backend. Filters
+support equality plus $in, $ne, $gt, $gte, $lt and $lte; conditions on
+indexed fields run in SQL, anything else is checked on the decoded documents.
+
+SQLite stores each document as JSON next to a column per indexed field
+(id, seller_id, status, severity, category, created_at, ...), each indexed
+together with id so find_page() can walk any of them with a keyset cursor
+instead of OFFSET. The database runs in WAL mode so readers in other workers are not
+blocked by writes. New indexed fields are added to existing databases with
+ALTER TABLE on open, and DERIVED_FIELDS fills in fields that older documents
+were stored without.
+
+STORAGE_BACKEND selects "sqlite" (default) or "memory"; STORAGE_PATH is the
+SQLite file.
+"""
+
+import base64
+import json
+import os
+import sqlite3
+import threading
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "sqlite").lower()
+STORAGE_PATH = os.environ.get("STORAGE_PATH", os.path.join("data", "trust_safety.db"))
+
+# Indexed fields per collection, mapped to their dotted path in the document
+COLLECTION_INDEXES: Dict[str, Dict[str, str]] = {
+    "flags": {
+        "seller_id": "seller_id",
+        "status": "status",
+        "severity": "severity",
+        "severity_rank": "severity_rank",
+        "risk": "risk",
+        "category": "category",
+        "created_at": "created_at",
+    },
+    "listed_products": {
+        "seller_id": "seller_id",
+        "status": "status",
+        "severity": "monitoring_result.risk_level",
+        "category": "listing_data.category",
+        "created_at": "created_at",
+    },
+    "monitoring_flags": {
+        "seller_id": "seller_id",
+        "status": "status",
+        "severity": "severity",
+        "category": "category",
+        "created_at": "created_at",
+    },
+}
+
+SEVERITY_RANKS = {"Critical": 4, "High": 3, "Medium": 2, "Low": 1}
+
+# Indexed fields computed from a document when it was stored without them
+DERIVED_FIELDS: Dict[str, Dict[str, Callable[[Dict], Any]]] = {
+    "flags": {"severity_rank": lambda flag: SEVERITY_RANKS.get(flag.get("severity"), 0)},
+}
+
+_OPERATORS = {"$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<=", "$ne": "!="}
+
+def get_path(document: Dict, path: str) -> Any:
+    value = document
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+def _json_default(value):
+    # numpy scalars and arrays, pydantic models
+    if hasattr(value, "item"):
+        return value.item()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if hasattr(value, "dict"):
+        return value.dict()
+    return str(value)
+
+def _matches(document: Dict, filter: Dict) -> bool:
+    for path, condition in filter.items():
+        value = get_path(document, path)
+        if isinstance(condition, dict) and any(key.startswith("$") for key in condition):
+            for operator, operand in condition.items():
+                if operator == "$in":
+                    if value not in operand:
+                        return False
+                elif operator == "$ne":
+                    if value == operand:
+                        return False
+                elif value is None:
+                    return False
+                elif operator == "$gt" and not value > operand:
+                    return False
+                elif operator == "$gte" and not value >= operand:
+                    return False
+                elif operator == "$lt" and not value < operand:
+                    return False
+                elif operator == "$lte" and not value <= operand:
+                    return False
+                elif operator not in ("$gt", "$gte", "$lt", "$lte"):
+                    raise ValueError(f"Unsupported filter operator: {operator}")
+        elif value != condition:
+            return False
+    return True
+
+def encode_cursor(after: Tuple[Any, str]) -> str:
+    """Opaque page cursor for the (sort value, id) of the last document returned by find_page()."""
+    return base64.urlsafe_b64encode(json.dumps(list(after)).encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    try:
+        value, document_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Invalid page cursor")
+    return value, document_id
+
+def _sort_key(value):
+    # None sorts first, like MongoDB
+    return (value is not None, value if value is not None else 0)
+
+class MemoryCollection:
+    """In-process collection; documents are stored as-is, in insertion order."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._documents: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def insert_one(self, document: Dict):
+        with self._lock:
+            self._documents[document["id"]] = document
+        return SimpleNamespace(inserted_id=document["id"])
+
+    def find(self, filter: Optional[Dict] = None, sort: Optional[List[Tuple[str, int]]] = None,
+             skip: int = 0, limit: int = 0) -> List[Dict]:
+        with self._lock:
+            documents = [doc for doc in self._documents.values() if _matches(doc, filter or {})]
+        return _sort_and_slice(documents, sort, skip, limit)
+
+    def find_one(self, filter: Dict) -> Optional[Dict]:
+        if set(filter) == {"id"} and not isinstance(filter["id"], dict):
+            return self._documents.get(filter["id"])
+        found = self.find(filter, limit=1)
+        return found[0] if found else None
+
+    def update_one(self, filter: Dict, update: Dict):
+        document = self.find_one(filter)
+        if document is None:
+            return SimpleNamespace(matched_count=0, modified_count=0)
+        with self._lock:
+            _apply_update(document, update)
+        return SimpleNamespace(matched_count=1, modified_count=1)
+
+    def delete_one(self, filter: Dict):
+        document = self.find_one(filter)
+        if document is None:
+            return SimpleNamespace(deleted_count=0)
+        with self._lock:
+            self._documents.pop(document["id"], None)
+        return SimpleNamespace(deleted_count=1)
+
+    def count_documents(self, filter: Optional[Dict] = None) -> int:
+        return len(self.find(filter))
+
+    def find_page(self, filter: Optional[Dict] = None, sort_field: str = "created_at", direction: int = 1,
+                  after: Optional[Tuple[Any, str]] = None, limit: int = 50) -> Tuple[List[Dict], Optional[Tuple[Any, str]]]:
+        """Up to limit documents ordered by (sort_field, id) after the given key; returns (documents, next key)."""
+        documents = self.find(filter)
+        key = lambda doc: (_sort_key(get_path(doc, sort_field)), doc["id"])
+        documents.sort(key=key, reverse=direction < 0)
+        if after is not None:
+            after_key = (_sort_key(after[0]), after[1])
+            documents = [doc for doc in documents if (key(doc) < after_key if direction < 0 else key(doc) > after_key)]
+        return _page(documents, sort_field, limit)
+
+def _sort_and_slice(documents: List[Dict], sort, skip: int, limit: int) -> List[Dict]:
+    for path, direction in reversed(sort or []):
+        documents.sort(key=lambda doc: _sort_key(get_path(doc, path)), reverse=direction < 0)
+    documents = documents[skip:]
+    return documents[:limit] if limit else documents
+
+def _page(documents: List[Dict], sort_field: str, limit: int) -> Tuple[List[Dict], Optional[Tuple[Any, str]]]:
+    if len(documents) <= limit:
+        return documents, None
+    documents = documents[:limit]
+    return documents, (get_path(documents[-1], sort_field), documents[-1]["id"])
+
+def _apply_update(document: Dict, update: Dict):
+    unsupported = set(update) - {"$set"}
+    if unsupported:
+        raise ValueError(f"Unsupported update operators: {sorted(unsupported)}")
+    for path, value in update.get("$set", {}).items():
+        target = document
+        parts = path.split(".")
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = value
+
+class SQLiteCollection:
+    """Collection stored in one SQLite table with an indexed column per indexed field."""
+
+    def __init__(self, database: "SQLiteDatabase", name: str, indexes: Dict[str, str],
+                 derived: Optional[Dict[str, Callable[[Dict], Any]]] = None):
+        self.database = database
+        self.name = name
+        self.indexes = indexes
+        self.derived = derived or {}
+        self._create()
+
+    def _create(self):
+        connection = self.database.connection()
+        with connection:
+            connection.execute(f'CREATE TABLE IF NOT EXISTS "{self.name}" (id TEXT PRIMARY KEY, doc TEXT NOT NULL)')
+            existing = {row[1] for row in connection.execute(f'PRAGMA table_info("{self.name}")')}
+            for column in self.indexes:
+                if column not in existing:
+                    connection.execute(f'ALTER TABLE "{self.name}" ADD COLUMN "{column}"')
+                    self._backfill(connection, column)
+                # (column, id) so keyset pages in find_page() are index range scans
+                connection.execute(f'DROP INDEX IF EXISTS "idx_{self.name}_{column}"')
+                connection.execute(
+                    f'CREATE INDEX IF NOT EXISTS "idx_{self.name}_{column}_id" ON "{self.name}" ("{column}", id)'
+                )
+            for field, derive in self.derived.items():
+                self._derive(connection, field, derive)
+
+    def _backfill(self, connection, column: str):
+        rows = connection.execute(f'SELECT id, doc FROM "{self.name}"').fetchall()
+        for row_id, doc in rows:
+            connection.execute(f'UPDATE "{self.name}" SET "{column}" = ? WHERE id = ?',
+                               (self._column_value(json.loads(doc), column), row_id))
+
+    def _derive(self, connection, field: str, derive: Callable[[Dict], Any]):
+        # Derived fields are indexed, so documents missing one have a NULL column
+        rows = connection.execute(f'SELECT id, doc FROM "{self.name}" WHERE "{field}" IS NULL').fetchall()
+        for row_id, doc in rows:
+            document = json.loads(doc)
+            if get_path(document, self.indexes[field]) is not None:
+                continue
+            document[field] = derive(document)
+            connection.execute(f'UPDATE "{self.name}" SET doc = ?, "{field}" = ? WHERE id = ?',
+                               (json.dumps(document, default=_json_default), document[field], row_id))
+
+    def _column_value(self, document: Dict, column: str):
+        value = get_path(document, self.indexes[column])
+        return value if value is None or isinstance(value, (str, int, float)) else json.dumps(value, default=_json_default)
+
+    def _row(self, document: Dict) -> Tuple:
+        return (document["id"], json.dumps(document, default=_json_default)) + tuple(
+            self._column_value(document, column) for column in self.indexes
+        )
+
+    def _column_for(self, path: str) -> Optional[str]:
+        if path == "id":
+            return "id"
+        for column, indexed_path in self.indexes.items():
+            if indexed_path == path or column == path:
+                return column
+        return None
+
+    def _where(self, filter: Dict) -> Tuple[str, List, Dict]:
+        """Split filter into a SQL WHERE clause over indexed columns and a residual filter."""
+        clauses, params, residual = [], [], {}
+        for path, condition in filter.items():
+            column = self._column_for(path)
+            if column is None:
+                residual[path] = condition
+                continue
+            if isinstance(condition, dict) and any(key.startswith("$") for key in condition):
+                for operator, operand in condition.items():
+                    if operator == "$in":
+                        operand = list(operand)
+                        if not operand:
+                            clauses.append("0")
+                        else:
+                            clauses.append(f'"{column}" IN ({", ".join("?" * len(operand))})')
+                            params.extend(operand)
+                    elif operator == "$ne":
+                        clauses.append(f'("{column}" IS NULL OR "{column}" != ?)')
+                        params.append(operand)
+                    elif operator in _OPERATORS:
+                        clauses.append(f'"{column}" {_OPERATORS[operator]} ?')
+                        params.append(operand)
+                    else:
+                        raise ValueError(f"Unsupported filter operator: {operator}")
+            elif condition is None:
+                clauses.append(f'"{column}" IS NULL')
+            else:
+                clauses.append(f'"{column}" = ?')
+                params.append(condition)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params, residual
+
+    def _write(self, connection, document: Dict):
+        columns = ", ".join(f'"{column}"' for column in ["id", "doc"] + list(self.indexes))
+        placeholders = ", ".join("?" * (2 + len(self.indexes)))
+        connection.execute(
+            f'INSERT OR REPLACE INTO "{self.name}" ({columns}) VALUES ({placeholders})',
+            self._row(document),
+        )
+
+    def insert_one(self, document: Dict):
+        connection = self.database.connection()
+        with connection:
+            self._write(connection, document)
+        return SimpleNamespace(inserted_id=document["id"])
+
+    def find(self, filter: Optional[Dict] = None, sort: Optional[List[Tuple[str, int]]] = None,
+             skip: int = 0, limit: int = 0) -> List[Dict]:
+        where, params, residual = self._where(filter or {})
+        sql_sort = []
+        for path, direction in sort or []:
+            column = self._column_for(path)
+            if column is None:
+                sql_sort = None
+                break
+            sql_sort.append(f'"{column}" {"DESC" if direction < 0 else "ASC"}')
+        query = f'SELECT doc FROM "{self.name}"{where}'
+        if sql_sort:
+            query += " ORDER BY " + ", ".join(sql_sort)
+        else:
+            query += " ORDER BY rowid"
+        paginate_in_sql = not residual and sql_sort is not None
+        if paginate_in_sql and (limit or skip):
+            query += " LIMIT ? OFFSET ?"
+            params = params + [limit if limit else -1, skip]
+        rows = self.database.connection().execute(query, params).fetchall()
+        documents = [json.loads(row[0]) for row in rows]
+        if paginate_in_sql:
+            return documents
+        documents = [doc for doc in documents if _matches(doc, residual)]
+        return _sort_and_slice(documents, sort if sql_sort is None else None, skip, limit)
+
+    def find_one(self, filter: Dict) -> Optional[Dict]:
+        found = self.find(filter, limit=1)
+        return found[0] if found else None
+
+    def update_one(self, filter: Dict, update: Dict):
+        # Read, modify and write in one write transaction so concurrent updates cannot interleave
+        connection = self.database.connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            document = self.find_one(filter)
+            if document is None:
+                connection.rollback()
+                return SimpleNamespace(matched_count=0, modified_count=0)
+            _apply_update(document, update)
+            self._write(connection, document)
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        return SimpleNamespace(matched_count=1, modified_count=1)
+
+    def delete_one(self, filter: Dict):
+        document = self.find_one(filter)
+        if document is None:
+            return SimpleNamespace(deleted_count=0)
+        connection = self.database.connection()
+        with connection:
+            connection.execute(f'DELETE FROM "{self.name}" WHERE id = ?', (document["id"],))
+        return SimpleNamespace(deleted_count=1)
+
+    def count_documents(self, filter: Optional[Dict] = None) -> int:
+        where, params, residual = self._where(filter or {})
+        if residual:
+            return len(self.find(filter))
+        return self.database.connection().execute(f'SELECT COUNT(*) FROM "{self.name}"{where}', params).fetchone()[0]
+
+    def find_page(self, filter: Optional[Dict] = None, sort_field: str = "created_at", direction: int = 1,
+                  after: Optional[Tuple[Any, str]] = None, limit: int = 50) -> Tuple[List[Dict], Optional[Tuple[Any, str]]]:
+        """Up to limit documents ordered by (sort_field, id) after the given key; returns (documents, next key).
+
+        sort_field must be an indexed field. NULLs sort first ascending and
+        last descending, as in SQLite.
+        """
+        column = self._column_for(sort_field)
+        if column is None:
+            raise ValueError(f"Cannot page on unindexed field: {sort_field}")
+        where, params, residual = self._where(filter or {})
+        if after is not None:
+            value, document_id = after
+            col = f'"{column}"'
+            if direction < 0:
+                if value is None:
+                    keyset, keyset_params = f"({col} IS NULL AND id < ?)", [document_id]
+                else:
+                    keyset = f"({col} < ? OR ({col} = ? AND id < ?) OR {col} IS NULL)"
+                    keyset_params = [value, value, document_id]
+            else:
+                if value is None:
+                    keyset, keyset_params = f"(({col} IS NULL AND id > ?) OR {col} IS NOT NULL)", [document_id]
+                else:
+                    keyset = f"({col} > ? OR ({col} = ? AND id > ?))"
+                    keyset_params = [value, value, document_id]
+            where = (where + " AND " if where else " WHERE ") + keyset
+            params = params + keyset_params
+        order = "DESC" if direction < 0 else "ASC"
+        query = f'SELECT doc FROM "{self.name}"{where} ORDER BY "{column}" {order}, id {order}'
+        if not residual:
+            query += " LIMIT ?"
+            params = params + [limit + 1]
+        documents = []
+        for row in self.database.connection().execute(query, params):
+            document = json.loads(row[0])
+            if _matches(document, residual):
+                documents.append(document)
+                if len(documents) > limit:
+                    break
+        return _page(documents, sort_field, limit)
+
+class SQLiteDatabase:
+    """One SQLite file in WAL mode; each thread gets its own connection."""
+
+    def __init__(self, path: str = STORAGE_PATH, indexes: Dict[str, Dict[str, str]] = COLLECTION_INDEXES,
+                 derived: Dict[str, Dict[str, Callable[[Dict], Any]]] = DERIVED_FIELDS):
+        self.path = path
+        self._indexes = indexes
+        self._derived = derived
+        self._local = threading.local()
+        self._collections: Dict[str, SQLiteCollection] = {}
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def __getitem__(self, name: str) -> SQLiteCollection:
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is None:
+                collection = self._collections[name] = SQLiteCollection(
+                    self, name, self._indexes.get(name, {}), self._derived.get(name))
+            return collection
+
+class MemoryDatabase:
+    def __init__(self):
+        self._collections: Dict[str, MemoryCollection] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = MemoryCollection(name)
+            return self._collections[name]
+
+def open_database(backend: str = STORAGE_BACKEND, path: str = STORAGE_PATH):
+    if backend == "memory":
+        return MemoryDatabase()
+    if backend == "sqlite":
+        return SQLiteDatabase(path)
+    raise ValueError(f"Unknown STORAGE_BACKEND '{backend}'")
+
+db = open_database()
@@ -0,0 +1,72 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from embedding_cache import EmbeddingCache
+
+def test_single_flight_shares_one_computation():
+    async def scenario():
+        cache = EmbeddingCache(disk_dir=None)
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return np.ones(3)
+
+        results = await asyncio.gather(*(cache.single_flight("key", compute) for _ in range(5)))
+        return calls, results, cache
+
+    calls, results, cache = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(np.array_equal(result, np.ones(3)) for result in results)
+    assert cache._inflight == {}
+
+def test_cancelled_caller_does_not_cancel_other_waiters():
+    async def scenario():
+        cache = EmbeddingCache(disk_dir=None)
+
+        async def compute():
+            await asyncio.sleep(0.05)
+            return np.full(2, 7.0)
+
+        first = asyncio.create_task(cache.single_flight("key", compute))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(cache.single_flight("key", compute))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert np.array_equal(asyncio.run(scenario()), np.full(2, 7.0))
+
+def test_failure_reaches_every_waiter_and_is_not_cached():
+    async def scenario():
+        cache = EmbeddingCache(disk_dir=None)
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(cache.single_flight("key", fail), cache.single_flight("key", fail),
+                                       return_exceptions=True)
+        return results, cache
+
+    results, cache = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert cache._inflight == {}
+
+def test_disk_store_round_trip(tmp_path):
+    async def scenario():
+        writer = EmbeddingCache(disk_dir=str(tmp_path))
+        await writer.put("abc", np.arange(4.0))
+        reader = EmbeddingCache(disk_dir=str(tmp_path))  # Empty memory, same directory
+        assert await reader.get("missing") is None
+        reader.remember_url("http://img", "abc")
+        return await reader.get_by_url("http://img"), reader
+
+    embedding, reader = asyncio.run(scenario())
+    assert np.array_equal(embedding, np.arange(4.0))
+    assert (reader.hits, reader.misses) == (1, 1)
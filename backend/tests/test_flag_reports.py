@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+from flag_reports import FAILED, PENDING, READY, FlagReportManager
+
+FLAG = {"id": "flag-1", "title": "Counterfeit", "severity": "High"}
+
+class Store:
+    def __init__(self):
+        self.flags = {FLAG["id"]: dict(FLAG)}
+
+    def save(self, flag_id, fields):
+        self.flags[flag_id].update(fields)
+
+def test_failed_generation_is_not_saved_and_not_retried_at_once():
+    store = Store()
+
+    def generate(flag):
+        raise RuntimeError("provider down")
+
+    manager = FlagReportManager(generate, store.save, workers=1)
+    with pytest.raises(RuntimeError):
+        manager.schedule(FLAG).result(timeout=5)
+    assert "ai_analysis" not in store.flags[FLAG["id"]]
+    assert manager.status(FLAG) == FAILED
+    assert manager.stats()["failed"] == 1
+    manager.shutdown()
+
+def test_claim_shares_generation_with_schedule():
+    store = Store()
+    calls = []
+    manager = FlagReportManager(lambda flag: calls.append(flag) or "background", store.save, workers=1)
+
+    future, owner = manager.claim(FLAG)
+    assert owner
+    assert manager.status(FLAG) == PENDING
+    assert manager.schedule(FLAG) is future
+    assert manager.claim(FLAG) == (future, False)
+
+    manager.finish(FLAG, "streamed report")
+    assert future.result(timeout=1) == "streamed report"
+    assert calls == []
+    assert manager.status(store.flags[FLAG["id"]]) == READY
+    manager.shutdown()
+
+def test_waiter_attaches_to_background_generation():
+    store = Store()
+    release = threading.Event()
+
+    def generate(flag):
+        release.wait(5)
+        return "background report"
+
+    manager = FlagReportManager(generate, store.save, workers=1)
+    scheduled = manager.schedule(FLAG)
+    future, owner = manager.claim(FLAG)
+    assert future is scheduled and not owner
+    release.set()
+    assert future.result(timeout=5) == "background report"
+    manager.shutdown()
+
+def test_abandoned_claim_can_be_retried_immediately():
+    store = Store()
+    manager = FlagReportManager(lambda flag: "report", store.save, workers=1)
+    future, _ = manager.claim(FLAG)
+    manager.fail(FLAG, RuntimeError("viewer left"), record=False)
+    assert isinstance(future.exception(timeout=1), RuntimeError)
+    _, owner = manager.claim(FLAG)
+    assert owner
+
+    manager.fail(FLAG, RuntimeError("provider down"))
+    assert manager.claim(FLAG) == (None, False)
+    manager.shutdown()
@@ -0,0 +1,62 @@
+import asyncio
+import io
+import os
+import time
+
+import pytest
+
+import image_uploads
+from image_uploads import ImageUploadError, UploadLimitExceeded
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+class FakeUpload:
+    """Minimal stand-in for fastapi.UploadFile: async read() plus content_type."""
+
+    def __init__(self, data: bytes, content_type: str = "image/png"):
+        self._data = io.BytesIO(data)
+        self.content_type = content_type
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._data.read(size)
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_uploads, "IMAGE_UPLOAD_DIR", str(tmp_path))
+    return tmp_path
+
+def pending_files(upload_dir):
+    return sorted(os.listdir(upload_dir / "pending"))
+
+def test_save_upload_stores_pending_file(upload_dir):
+    saved = asyncio.run(image_uploads.save_upload(FakeUpload(PNG)))
+    assert saved["ref"] == "upload:" + saved["upload_id"]
+    assert pending_files(upload_dir) == [saved["upload_id"]]
+    assert image_uploads.read_upload(saved["ref"]) == PNG
+    assert image_uploads.evidence_image(saved["ref"]) == "/uploads/images/" + saved["upload_id"]
+
+def test_oversized_upload_leaves_no_partial_file(upload_dir, monkeypatch):
+    monkeypatch.setattr(image_uploads, "IMAGE_UPLOAD_MAX_BYTES", 10)
+    with pytest.raises(ImageUploadError):
+        asyncio.run(image_uploads.save_upload(FakeUpload(PNG)))
+    assert pending_files(upload_dir) == []
+
+def test_pending_cap_rejects_until_expired_uploads_are_swept(upload_dir, monkeypatch):
+    monkeypatch.setattr(image_uploads, "IMAGE_UPLOAD_MAX_PENDING", 2)
+    first = asyncio.run(image_uploads.save_upload(FakeUpload(PNG)))
+    asyncio.run(image_uploads.save_upload(FakeUpload(PNG)))
+    with pytest.raises(UploadLimitExceeded):
+        asyncio.run(image_uploads.save_upload(FakeUpload(PNG)))
+
+    # Once an upload is older than the TTL the cap check sweeps it and admits the new one
+    old = time.time() - image_uploads.IMAGE_UPLOAD_TTL - 10
+    os.utime(upload_dir / "pending" / first["upload_id"], (old, old))
+    asyncio.run(image_uploads.save_upload(FakeUpload(PNG)))
+    assert first["upload_id"] not in pending_files(upload_dir)
+    assert len(pending_files(upload_dir)) == 2
+
+def test_kept_uploads_are_never_swept(upload_dir):
+    saved = asyncio.run(image_uploads.save_upload(FakeUpload(PNG)))
+    image_uploads.keep_upload(saved["ref"])
+    assert image_uploads.sweep_expired_uploads(ttl=-1) == 0
+    assert image_uploads.read_upload(saved["ref"]) == PNG
@@ -0,0 +1,30 @@
+from keyword_matcher import KeywordHit, KeywordMatcher
+
+def test_finds_overlapping_hits_case_insensitively():
+    matcher = KeywordMatcher().add_list("words", ["he", "she", "hers", "his"])
+    hits = matcher.find_all("uSHErs")
+    assert sorted((hit.keyword, hit.start, hit.end) for hit in hits) == [
+        ("he", 2, 4), ("hers", 2, 6), ("she", 1, 4),
+    ]
+
+def test_whole_word_lists_respect_boundaries():
+    matcher = KeywordMatcher()
+    matcher.add_list("substring", ["rep"])
+    matcher.add_list("word", ["rep"], whole_word=True)
+    assert matcher.matches_by_tag("replica bag") == {"substring": ["rep"]}
+    assert matcher.matches_by_tag("1:1 rep, cheap") == {"substring": ["rep"], "word": ["rep"]}
+
+def test_matches_by_tag_keeps_list_order_and_filters_tags():
+    matcher = KeywordMatcher()
+    matcher.add_list("suspicious", ["replica", "fake", "copy"])
+    matcher.add_list("urgency", ["hurry", "today only"])
+    text = "Copy of a fake bag - hurry, today only! another copy"
+    assert matcher.matches_by_tag(text) == {"suspicious": ["fake", "copy"], "urgency": ["hurry", "today only"]}
+    assert matcher.matches_by_tag(text, tags=["urgency"]) == {"urgency": ["hurry", "today only"]}
+    assert matcher.find_all("nothing here") == []
+
+def test_lists_added_after_a_scan_are_matched():
+    matcher = KeywordMatcher().add_list("a", ["cheap"])
+    assert matcher.find_all("cheap") == [KeywordHit("a", "cheap", 0, 0, 5)]
+    matcher.add_list("b", ["eap"])
+    assert sorted(hit.tag for hit in matcher.find_all("cheap")) == ["a", "b"]  # Rebuilding adds no duplicates
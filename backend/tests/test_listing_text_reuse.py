@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+app = pytest.importorskip("app")  # Needs the full backend environment (PIL, TensorFlow, transformers, ...)
+
+STEP_ONE = {
+    "brandName": "Acme",
+    "productTitle": "Acme trail running shoe",
+    "productDescription": "Lightweight trail running shoe with a grippy outsole and breathable mesh upper.",
+    "bulletPoints": ["Breathable mesh", "Rubber outsole"],
+}
+
+def listing_data(**changes):
+    fields = {
+        **STEP_ONE, "manufacturer": "Acme", "partNumber": "", "modelNumber": "", "countryOfOrigin": "",
+        "price": 80.0, "quantity": 1, "condition": "new", "fulfillmentType": "fba", "category": "shoes",
+        "subcategory": "", "itemType": "", "targetAudience": "", "hasVariations": False,
+        "variationType": "size", "variations": [], "mainImage": "", "additionalImages": [],
+        "shippingTemplate": "", "handlingTime": "", "shippingWeight": 0.0,
+        "shippingDimensions": {"length": 0, "width": 0, "height": 0}, "shippingService": "",
+        "freeShipping": False,
+    }
+    fields.update(changes)
+    return app.ProductListingData(**fields)
+
+@pytest.fixture
+def text_calls(monkeypatch):
+    calls = []
+    analyze = app.analyze_text_with_ml
+
+    def counting(text, product_data):
+        calls.append(text)
+        return analyze(text, product_data)
+
+    monkeypatch.setattr(app, "analyze_text_with_ml", counting)
+    return calls
+
+def run_step_one_then_text_stage(product_id, submitted):
+    async def scenario():
+        await app.monitor_listing_step({"step_number": 1, "product_id": product_id, "step_data": STEP_ONE})
+        await app.run_text_stage(submitted, app.listing_sessions.get(product_id))
+    asyncio.run(scenario())
+
+def test_submit_reuses_text_analysis_from_unchanged_step_one(text_calls):
+    run_step_one_then_text_stage("text-reuse-unchanged", listing_data())
+    assert len(text_calls) == 1
+
+def test_submit_reanalyzes_changed_text(text_calls):
+    run_step_one_then_text_stage("text-reuse-changed", listing_data(productTitle="Acme replica shoe"))
+    assert len(text_calls) == 2
@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+import llm_stub_server
+from llm_client import LLMAuthError, LLMClient, LLMUnavailable
+
+MESSAGES = [{"role": "user", "content": "Summarize this flag"}]
+
+@pytest.fixture(autouse=True)
+def stub(monkeypatch):
+    monkeypatch.setattr(llm_stub_server, "LLM_STUB_LATENCY", 0.0)
+    llm_stub_server.behaviors.clear()
+    llm_stub_server.requests_per_model.clear()
+    return llm_stub_server
+
+def make_client(models, **kwargs):
+    """LLMClient whose HTTP calls go to the stub app in-process."""
+    client = LLMClient("test-key", models=models, base_url="http://stub/openai/v1", **kwargs)
+    client._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=llm_stub_server.app),
+                                       base_url=client.base_url)
+    return client
+
+def run(client, coroutine):
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await client.aclose()
+    return asyncio.run(main())
+
+def test_breaker_opens_after_repeated_failures_and_recovers_after_one_probe(stub):
+    stub.behaviors.update({"m1": "500"})
+    client = make_client(["m1"], hedge_after=0)
+    breaker = client.breakers["m1"]
+    breaker.cooldown = 0.1
+
+    async def scenario():
+        for _ in range(breaker.failure_threshold):
+            with pytest.raises(LLMUnavailable):
+                await client.chat(MESSAGES)
+        assert breaker.state == "open"
+        with pytest.raises(LLMUnavailable):
+            await client.chat(MESSAGES)  # Rejected without a request
+        assert stub.requests_per_model["m1"] == breaker.failure_threshold
+
+        stub.behaviors["m1"] = "slow:0.1"
+        await asyncio.sleep(0.15)
+        # Half-open: only one of two concurrent calls is let through as the probe
+        results = await asyncio.gather(client.chat(MESSAGES), client.chat(MESSAGES), return_exceptions=True)
+        assert sum(isinstance(result, LLMUnavailable) for result in results) == 1
+        assert stub.requests_per_model["m1"] == breaker.failure_threshold + 1
+        assert breaker.state == "closed"
+        content, model = await client.chat(MESSAGES)
+        assert model == "m1" and "Stub report" in content
+
+    run(client, scenario())
+
+def test_hedge_wins_against_a_hanging_model(stub):
+    stub.behaviors.update({"hung": "hang", "fast": "ok"})
+    client = make_client(["hung", "fast"], hedge_after=0.05, deadline=5)
+
+    started = time.monotonic()
+    content, model = run(client, client.chat(MESSAGES))
+    assert model == "fast"
+    assert time.monotonic() - started < 2
+    assert client.hedges == 1 and client.hedge_wins == 1
+
+def test_deadline_is_enforced(stub):
+    stub.behaviors.update({"hung": "hang"})
+    client = make_client(["hung"], hedge_after=0, deadline=0.2)
+
+    started = time.monotonic()
+    with pytest.raises(LLMUnavailable, match="within 0.2s"):
+        run(client, client.chat(MESSAGES))
+    assert time.monotonic() - started < 2
+    assert client.breakers["hung"].last_error == "deadline exceeded"
+
+def test_rejected_api_key_stops_immediately(stub):
+    stub.behaviors.update({"first": "401", "second": "ok"})
+    client = make_client(["first", "second"], hedge_after=0)
+
+    with pytest.raises(LLMAuthError):
+        run(client, client.chat(MESSAGES))
+    assert stub.requests_per_model["first"] == 1
+    assert stub.requests_per_model["second"] == 0
+
+def test_failed_model_falls_over_to_the_next(stub):
+    stub.behaviors.update({"missing": "404", "backup": "ok"})
+    client = make_client(["missing", "backup"], hedge_after=0)
+
+    _, model = run(client, client.chat(MESSAGES))
+    assert model == "backup"
+    assert client.breakers["missing"].state == "open"
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from micro_batcher import MicroBatcher
+
+def test_asubmit_batches_more_callers_than_executor_threads():
+    sizes = []
+
+    def double(items):
+        sizes.append(len(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher("test_double", double, max_batch_size=64, max_wait_ms=50)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.asubmit(i) for i in range(20)))
+
+    assert asyncio.run(scenario()) == [i * 2 for i in range(20)]
+    assert max(sizes) > 4
+
+def test_short_result_list_fails_every_caller():
+    batcher = MicroBatcher("test_short", lambda items: items[:-1], max_batch_size=8, max_wait_ms=50)
+
+    async def scenario():
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.asubmit(i) for i in range(3)), return_exceptions=True), 5
+        )
+
+    results = asyncio.run(scenario())
+    assert len(results) == 3
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+def test_batch_fn_exception_reaches_caller():
+    def boom(items):
+        raise ValueError("model failed")
+
+    batcher = MicroBatcher("test_boom", boom, max_wait_ms=1)
+    with pytest.raises(ValueError):
+        batcher.submit(1)
@@ -0,0 +1,60 @@
+import pytest
+
+from product_search import ProductSearchIndex, project
+
+def product(number, title, category="shoes", status="active", brand="Acme"):
+    return {
+        "id": f"p{number}",
+        "status": status,
+        "seller_id": "s1",
+        "listing_data": {"productTitle": title, "brandName": brand, "category": category,
+                         "mainImage": "data:image/png;base64,AAAA"},
+        "monitoring_result": {"risk_level": "low"},
+    }
+
+def all_pages(index, **kwargs):
+    ids, cursor = [], None
+    while True:
+        page = index.search(cursor=cursor, **kwargs)
+        ids += page["ids"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids, page["total"]
+
+@pytest.fixture
+def index():
+    index = ProductSearchIndex()
+    for number in range(12):
+        index.add(product(number, f"running shoe model {number}", category="shoes" if number % 3 else "boots"))
+    index.add(product(12, "leather wallet", category="accessories"))
+    return index
+
+def test_unfiltered_pages_follow_listing_order_without_gaps(index):
+    index.remove("p4")
+    ids, total = all_pages(index, limit=5)
+    assert ids == [f"p{n}" for n in range(13) if n != 4]
+    assert total == 12
+
+def test_filtered_pages(index):
+    ids, total = all_pages(index, filters={"category": "Boots"}, limit=2)
+    assert ids == ["p0", "p3", "p6", "p9"]
+    assert total == 4
+
+def test_keyword_pages_are_ranked_and_disjoint(index):
+    index.add(product(13, "shoe shoe", brand="Shoe"))  # Matches in title and brand, ranks first
+    ids, total = all_pages(index, keyword="shoe", limit=4)
+    assert ids[0] == "p13"
+    assert sorted(ids) == sorted(set(ids)) and len(ids) == total == 13
+    assert index.search(keyword="wal")["ids"] == ["p12"]  # Prefix match
+
+def test_invalid_cursor_and_filter_raise_value_error(index):
+    with pytest.raises(ValueError):
+        index.search(cursor="not-a-cursor")
+    with pytest.raises(ValueError):
+        index.search(filters={"colour": "red"})
+
+def test_project_keeps_only_requested_paths():
+    document = product(1, "running shoe")
+    assert project(document, ["id", "listing_data.productTitle", "missing.path"]) == {
+        "id": "p1", "listing_data": {"productTitle": "running shoe"},
+    }
@@ -0,0 +1,72 @@
+import json
+import sqlite3
+import threading
+
+import pytest
+
+from storage import MemoryDatabase, SQLiteDatabase
+
+def test_severity_rank_is_derived_for_flags_stored_before_it_existed(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE "flags" (id TEXT PRIMARY KEY, doc TEXT NOT NULL, "severity" TEXT)')
+    for flag_id, severity in (("a", "Low"), ("b", "Critical"), ("c", "High")):
+        connection.execute('INSERT INTO "flags" (id, doc, "severity") VALUES (?, ?, ?)',
+                           (flag_id, json.dumps({"id": flag_id, "severity": severity}), severity))
+    connection.commit()
+    connection.close()
+
+    flags = SQLiteDatabase(path)["flags"]
+    assert flags.find_one({"id": "b"})["severity_rank"] == 4
+    page, _ = flags.find_page(sort_field="severity_rank", direction=-1, limit=10)
+    assert [flag["id"] for flag in page] == ["b", "c", "a"]
+    assert flags.count_documents({"severity_rank": {"$gte": 3}}) == 2
+
+@pytest.fixture(params=["sqlite", "memory"])
+def flags(request, tmp_path):
+    database = SQLiteDatabase(str(tmp_path / "flags.db")) if request.param == "sqlite" else MemoryDatabase()
+    collection = database["flags"]
+    for number in range(10):
+        collection.insert_one({"id": f"f{number:02d}", "status": "Open" if number % 2 else "Closed",
+                               "created_at": f"2026-01-{number // 3 + 1:02d}"})
+    return collection
+
+def walk(collection, **kwargs):
+    ids, after = [], None
+    while True:
+        page, after = collection.find_page(after=after, **kwargs)
+        ids += [document["id"] for document in page]
+        if after is None:
+            return ids
+
+def test_find_page_walks_ties_in_id_order(flags):
+    expected = [document["id"] for document in sorted(flags.find(), key=lambda d: (d["created_at"], d["id"]))]
+    assert walk(flags, sort_field="created_at", limit=4) == expected
+    assert walk(flags, sort_field="created_at", direction=-1, limit=3) == expected[::-1]
+
+def test_find_page_applies_filters(flags):
+    ids = walk(flags, filter={"status": "Open"}, sort_field="created_at", direction=-1, limit=2)
+    assert ids == ["f09", "f07", "f05", "f03", "f01"]
+
+def test_find_page_returns_no_key_on_the_last_page(flags):
+    page, after = flags.find_page(sort_field="created_at", limit=10)
+    assert len(page) == 10 and after is None
+
+def test_concurrent_updates_to_one_document_are_not_lost(tmp_path):
+    database = SQLiteDatabase(str(tmp_path / "updates.db"))
+    flags = database["flags"]
+    flags.insert_one({"id": "f1", "status": "Open"})
+
+    def update_fields(worker):
+        for number in range(20):
+            flags.update_one({"id": "f1"}, {"$set": {f"field_{worker}_{number}": number}})
+
+    threads = [threading.Thread(target=update_fields, args=(worker,)) for worker in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    document = flags.find_one({"id": "f1"})
+    assert sum(key.startswith("field_") for key in document) == 6 * 20
+    assert flags.update_one({"id": "missing"}, {"$set": {"status": "Closed"}}).matched_count == 0
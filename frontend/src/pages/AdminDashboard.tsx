@@ -115,8 +115,17 @@ interface Flag {
   user_upload?: any;
   gemini_analysis?: string;
   ai_analysis?: string;
+  report_status?: 'ready' | 'pending' | 'failed';
 }
 
+// Row of the flag list (/flags/query?view=summary); the full flag comes from /flags/{id}
+type FlagSummary = Pick<Flag, 'id' | 'title' | 'severity' | 'status' | 'flaggedOn' | 'risk' | 'category'> & {
+  evidence_count?: number;
+  has_report?: boolean;
+};
+
+const FLAG_PAGE_SIZE = 200;
+
 const severityColors: Record<string, string> = {
   Critical: 'bg-red-600 text-white',
   High: 'bg-orange-500 text-white',
@@ -169,19 +178,23 @@ const FlagTrendsChart = ({ labels, data }: { labels: string[], data: { [severity
   );
 };
 
-const getFlagTrendsData = (flags: Flag[]) => {
-  const dates = Array.from(new Set(flags.map((f: Flag) => f.flaggedOn))).sort();
+const getFlagTrendsData = (flags: FlagSummary[]) => {
+  const dates = Array.from(new Set(flags.map((f: FlagSummary) => f.flaggedOn))).sort();
   const severities = ['Critical', 'High', 'Medium', 'Low'];
   const data: { [severity: string]: number[] } = {};
   severities.forEach(sev => {
-    data[sev] = dates.map(date => flags.filter((f: Flag) => f.flaggedOn === date && f.severity === sev).length);
+    data[sev] = dates.map(date => flags.filter((f: FlagSummary) => f.flaggedOn === date && f.severity === sev).length);
   });
   return { labels: dates as string[], data };
 };
 
-const getSeverityCounts = (flags: Flag[]) => {
+// Evidence for uploaded listing images is a backend path such as /uploads/images/<id>
+const backendImageUrl = (src: string) =>
+  src.startsWith('/') ? `${process.env.NEXT_PUBLIC_BACKEND_URL}${src}` : src;
+
+const getSeverityCounts = (flags: FlagSummary[]) => {
   const counts: { [severity: string]: number } = { Critical: 0, High: 0, Medium: 0, Low: 0 };
-  flags.forEach((f: Flag) => { counts[f.severity] = (counts[f.severity] || 0) + 1; });
+  flags.forEach((f: FlagSummary) => { counts[f.severity] = (counts[f.severity] || 0) + 1; });
   return counts;
 };
 
@@ -197,10 +210,12 @@ const Spinner = () => (
 );
 
 const AdminDashboard = () => {
-  const [flags, setFlags] = useState<Flag[]>([]);
+  const [flags, setFlags] = useState<FlagSummary[]>([]);
+  const [flagsCursor, setFlagsCursor] = useState<string | null>(null);
+  const [totalFlags, setTotalFlags] = useState(0);
   const [loadingFlags, setLoadingFlags] = useState(true);
   const [error, setError] = useState<string | null>(null);
-  const [selectedFlag, setSelectedFlag] = useState<Flag | null>(null);
+  const [selectedFlag, setSelectedFlag] = useState<FlagSummary | null>(null);
   const [flagDetail, setFlagDetail] = useState<Flag | null>(null);
   const [loadingDetail, setLoadingDetail] = useState(false);
   const [showModal, setShowModal] = useState(false);
@@ -208,26 +223,53 @@ const AdminDashboard = () => {
   const [searchQuery, setSearchQuery] = useState('');
   const [sidebarOpen, setSidebarOpen] = useState(false);
 
+  // The list only holds summaries; evidence and reports are loaded when a flag is opened
+  const fetchFlags = async (cursor: string | null) => {
+    setLoadingFlags(true);
+    setError(null);
+    try {
+      const params = new URLSearchParams({ view: 'summary', limit: String(FLAG_PAGE_SIZE), include_total: 'true' });
+      if (cursor) params.set('cursor', cursor);
+      const res = await fetch(`${process.env.NEXT_PUBLIC_BACKEND_URL}/flags/query?${params}`);
+      if (!res.ok) throw new Error('Failed to fetch flags');
+      const data = await res.json();
+      setFlags(prev => cursor ? [...prev, ...data.flags] : data.flags);
+      setFlagsCursor(data.next_cursor || null);
+      setTotalFlags(data.total ?? 0);
+    } catch (err) {
+      setError('Failed to load flags');
+    } finally {
+      setLoadingFlags(false);
+    }
+  };
+
   useEffect(() => {
-    const fetchFlags = async () => {
-      setLoadingFlags(true);
-      setError(null);
-      try {
-        const res = await fetch(`${process.env.NEXT_PUBLIC_BACKEND_URL}/flags`);
-        if (!res.ok) throw new Error('Failed to fetch flags');
-        const data = await res.json();
-        setFlags(data);
-      } catch (err) {
-        setError('Failed to load flags');
-      } finally {
-        setLoadingFlags(false);
-      }
-    };
-    fetchFlags();
+    fetchFlags(null);
   }, []);
 
-  const handleFlagClick = async (flag: Flag) => {
+  const streamReport = (flagId: string) => new Promise<void>((resolve) => {
+    const source = new EventSource(`${process.env.NEXT_PUBLIC_BACKEND_URL}/flags/${flagId}/analysis/stream`);
+    let text = '';
+    const update = (changes: Partial<Flag>) =>
+      setFlagDetail(prev => (prev && prev.id === flagId ? { ...prev, ...changes } : prev));
+    const finish = (status: Flag['report_status']) => {
+      source.close();
+      update({ report_status: status });
+      resolve();
+    };
+    source.addEventListener('token', (e) => {
+      text += JSON.parse((e as MessageEvent).data).text;
+      update({ ai_analysis: text, report_status: 'pending' });
+    });
+    // A placeholder report ends with report_status 'failed'; the real one is generated later
+    source.addEventListener('done', (e) => finish(JSON.parse((e as MessageEvent).data).report_status || 'ready'));
+    source.addEventListener('report_error', () => finish('failed'));
+    source.onerror = () => finish('failed');
+  });
+
+  const handleFlagClick = async (flag: FlagSummary) => {
     setSelectedFlag(flag);
+    setFlagDetail(null);
     setLoadingDetail(true);
     setShowModal(true);
     try {
@@ -239,6 +281,11 @@ const AdminDashboard = () => {
       const data = await res.json();
       console.log('Flag detail data received:', data);
       setFlagDetail(data);
+      setLoadingDetail(false);
+      // Stream the AI report token by token instead of waiting for the whole text
+      if (data.report_status !== 'ready') {
+        await streamReport(flag.id);
+      }
     } catch (err) {
       console.error('Error fetching flag details:', err);
       setFlagDetail(null);
@@ -385,6 +432,17 @@ const AdminDashboard = () => {
                     ))}
                   </tbody>
                 </table>
+                {flagsCursor && (
+                  <div className="pt-3 text-center">
+                    <button
+                      className="text-xs md:text-sm border border-blue-600 text-blue-600 px-4 py-1 rounded disabled:opacity-50"
+                      disabled={loadingFlags}
+                      onClick={() => fetchFlags(flagsCursor)}
+                    >
+                      Load more flags
+                    </button>
+                  </div>
+                )}
               </div>
             </section>
           </div>
@@ -405,7 +463,7 @@ const AdminDashboard = () => {
               {/* Quick Stats */}
               <div className="grid grid-cols-2 gap-2 md:gap-4">
                 <div className="bg-blue-50 rounded p-2 md:p-3 flex flex-col items-center">
-                  <span className="text-lg md:text-2xl font-bold text-blue-700">{flags.length}</span>
+                  <span className="text-lg md:text-2xl font-bold text-blue-700">{totalFlags}</span>
                   <span className="text-xs text-gray-600">Total Flags</span>
                 </div>
                 <div className="bg-green-50 rounded p-2 md:p-3 flex flex-col items-center">
@@ -488,7 +546,7 @@ const AdminDashboard = () => {
                             {item.image && (
                               <div className="relative w-full flex flex-col items-center">
                                 <Image 
-                                  src={item.image} 
+                                  src={backendImageUrl(item.image)} 
                                   alt="Evidence" 
                                   className="rounded-lg max-w-full max-h-32 object-contain border" 
                                   width={120} height={64}
@@ -515,14 +573,14 @@ const AdminDashboard = () => {
                   </div>
                 </section>
                  {/* Product Information */}
-                 {selectedFlag.product && (
+                 {flagDetail?.product && (
                   <section>
                     <h3 className="text-lg font-semibold text-blue-900 mb-1 border-l-4 border-blue-400 pl-2">Product Information</h3>
                     <div className="bg-white rounded-lg border p-3 text-sm space-y-2 shadow-sm">
                       <div className="grid grid-cols-2 gap-2">
-                        <div><span className="font-bold">Title:</span> {selectedFlag.product.title}</div>
-                        <div><span className="font-bold">Price:</span> ${selectedFlag.product.price}</div>
-                        <div><span className="font-bold">Category:</span> {selectedFlag.product.category}</div>
+                        <div><span className="font-bold">Title:</span> {flagDetail.product.title}</div>
+                        <div><span className="font-bold">Price:</span> ${flagDetail.product.price}</div>
+                        <div><span className="font-bold">Category:</span> {flagDetail.product.category}</div>
                         {/* Mock extra details */}
                         <div><span className="font-bold">ASIN:</span> B0CV5VCL8F</div>
                         <div><span className="font-bold">EAN:</span> 0609332571501</div>
@@ -534,11 +592,11 @@ const AdminDashboard = () => {
                         <span className="ml-1 text-gray-700">Premium quality, wireless, noise-cancelling headphones with long battery life. <span className="bg-yellow-200 text-yellow-900 px-1 rounded">Brand name misspelling detected</span>. <span className="bg-red-200 text-red-800 px-1 rounded">Stock photo anomaly</span>.</span>
                       </div>
                       {/* Product Images with anomaly labels if flagged */}
-                      {selectedFlag.product.images && (
+                      {flagDetail.product.images && (
                         <div className="flex gap-2 mt-2 overflow-x-auto">
-                          {selectedFlag.product.images.map((img, idx) => {
+                          {flagDetail.product.images.map((img, idx) => {
                             // Find evidence for this image
-                            const evidence = selectedFlag.evidence.find(ev => ev.image === img);
+                            const evidence = flagDetail.evidence.find(ev => ev.image === img);
                             let label = '';
                             if (evidence) {
                               const message = evidence.message || evidence.detail || '';
@@ -566,7 +624,7 @@ const AdminDashboard = () => {
                       <div className="mt-3">
                         <h4 className="text-sm font-bold text-red-700 mb-1">Product Anomalies</h4>
                         <ul className="list-disc ml-5 space-y-1">
-                          {selectedFlag.evidence.filter(ev => ev.type === 'Visual' || ev.type === 'Text' || ev.type === 'Pattern' || ev.type === 'AI').map((ev, i) => (
+                          {flagDetail.evidence.filter(ev => ev.type === 'Visual' || ev.type === 'Text' || ev.type === 'Pattern' || ev.type === 'AI').map((ev, i) => (
                             <li key={i} className="bg-red-100 text-red-800 px-2 py-0.5 rounded text-xs font-semibold inline-block mb-1">{ev.message || ev.detail || 'Anomaly detected'}</li>
                           ))}
                         </ul>
@@ -590,26 +648,26 @@ const AdminDashboard = () => {
                 )}
                 
                 {/* Seller Information */}
-                {selectedFlag.seller && (
+                {flagDetail?.seller && (
                   <section>
                     <h3 className="text-lg font-semibold text-blue-900 mb-1 border-l-4 border-blue-400 pl-2">Seller Information</h3>
                     <div className="bg-white rounded-lg border p-3 text-sm space-y-1 shadow-sm">
-                      <div><span className="font-bold">Name:</span> {selectedFlag.seller.name}</div>
-                      <div><span className="font-bold">Rating:</span> {selectedFlag.seller.rating}</div>
-                      <div><span className="font-bold">Total Sales:</span> {selectedFlag.seller.totalSales}</div>
-                      <div><span className="font-bold">Account Age:</span> {selectedFlag.seller.accountAge}</div>
+                      <div><span className="font-bold">Name:</span> {flagDetail.seller.name}</div>
+                      <div><span className="font-bold">Rating:</span> {flagDetail.seller.rating}</div>
+                      <div><span className="font-bold">Total Sales:</span> {flagDetail.seller.totalSales}</div>
+                      <div><span className="font-bold">Account Age:</span> {flagDetail.seller.accountAge}</div>
                     </div>
                   </section>
                 )}
                
                 {/* Account Information */}
-                {selectedFlag.account && (
+                {flagDetail?.account && (
                   <section>
                     <h3 className="text-lg font-semibold text-blue-900 mb-1 border-l-4 border-blue-400 pl-2">Account Information</h3>
                     <div className="bg-white rounded-lg border p-3 text-sm space-y-1 shadow-sm">
-                      <div><span className="font-bold">Username:</span> {selectedFlag.account.username}</div>
-                      <div><span className="font-bold">Last Login:</span> {selectedFlag.account.lastLogin}</div>
-                      <div><span className="font-bold">Location:</span> {selectedFlag.account.location}</div>
+                      <div><span className="font-bold">Username:</span> {flagDetail.account.username}</div>
+                      <div><span className="font-bold">Last Login:</span> {flagDetail.account.lastLogin}</div>
+                      <div><span className="font-bold">Location:</span> {flagDetail.account.location}</div>
                     </div>
                   </section>
                 )}
@@ -693,7 +751,7 @@ const AdminDashboard = () => {
                             {item.image && (
                               <div className="relative w-full flex flex-col items-center">
                                 <Image 
-                                  src={item.image} 
+                                  src={backendImageUrl(item.image)} 
                                   alt="Evidence" 
                                   className="rounded-lg max-w-full max-h-32 object-contain border" 
                                   width={120} height={64}
@@ -720,14 +778,14 @@ const AdminDashboard = () => {
                   </div>
                 </section>
                  {/* Product Information */}
-                 {selectedFlag.product && (
+                 {flagDetail?.product && (
                   <section>
                     <h3 className="text-lg font-semibold text-blue-900 mb-1 border-l-4 border-blue-400 pl-2">Product Information</h3>
                     <div className="bg-white rounded-lg border p-3 text-sm space-y-2 shadow-sm">
                       <div className="grid grid-cols-2 gap-2">
-                        <div><span className="font-bold">Title:</span> {selectedFlag.product.title}</div>
-                        <div><span className="font-bold">Price:</span> ${selectedFlag.product.price}</div>
-                        <div><span className="font-bold">Category:</span> {selectedFlag.product.category}</div>
+                        <div><span className="font-bold">Title:</span> {flagDetail.product.title}</div>
+                        <div><span className="font-bold">Price:</span> ${flagDetail.product.price}</div>
+                        <div><span className="font-bold">Category:</span> {flagDetail.product.category}</div>
                         {/* Mock extra details */}
                         <div><span className="font-bold">ASIN:</span> B0CV5VCL8F</div>
                         <div><span className="font-bold">EAN:</span> 0609332571501</div>
@@ -739,11 +797,11 @@ const AdminDashboard = () => {
                         <span className="ml-1 text-gray-700">Premium quality, wireless, noise-cancelling headphones with long battery life. <span className="bg-yellow-200 text-yellow-900 px-1 rounded">Brand name misspelling detected</span>. <span className="bg-red-200 text-red-800 px-1 rounded">Stock photo anomaly</span>.</span>
                       </div>
                       {/* Product Images with anomaly labels if flagged */}
-                      {selectedFlag.product.images && (
+                      {flagDetail.product.images && (
                         <div className="flex gap-2 mt-2 overflow-x-auto">
-                          {selectedFlag.product.images.map((img, idx) => {
+                          {flagDetail.product.images.map((img, idx) => {
                             // Find evidence for this image
-                            const evidence = selectedFlag.evidence.find(ev => ev.image === img);
+                            const evidence = flagDetail.evidence.find(ev => ev.image === img);
                             let label = '';
                             if (evidence) {
                               const message = evidence.message || evidence.detail || '';
@@ -771,7 +829,7 @@ const AdminDashboard = () => {
                       <div className="mt-3">
                         <h4 className="text-sm font-bold text-red-700 mb-1">Product Anomalies</h4>
                         <ul className="list-disc ml-5 space-y-1">
-                          {selectedFlag.evidence.filter(ev => ev.type === 'Visual' || ev.type === 'Text' || ev.type === 'Pattern' || ev.type === 'AI').map((ev, i) => (
+                          {flagDetail.evidence.filter(ev => ev.type === 'Visual' || ev.type === 'Text' || ev.type === 'Pattern' || ev.type === 'AI').map((ev, i) => (
                             <li key={i} className="bg-red-100 text-red-800 px-2 py-0.5 rounded text-xs font-semibold inline-block mb-1">{ev.message || ev.detail || 'Anomaly detected'}</li>
                           ))}
                         </ul>
@@ -794,26 +852,26 @@ const AdminDashboard = () => {
                   </section>
                 )}
                 {/* Seller Information */}
-                {selectedFlag.seller && (
+                {flagDetail?.seller && (
                   <section>
                     <h3 className="text-lg font-semibold text-blue-900 mb-1 border-l-4 border-blue-400 pl-2">Seller Information</h3>
                     <div className="bg-white rounded-lg border p-3 text-sm space-y-1 shadow-sm">
-                      <div><span className="font-bold">Name:</span> {selectedFlag.seller.name}</div>
-                      <div><span className="font-bold">Rating:</span> {selectedFlag.seller.rating}</div>
-                      <div><span className="font-bold">Total Sales:</span> {selectedFlag.seller.totalSales}</div>
-                      <div><span className="font-bold">Account Age:</span> {selectedFlag.seller.accountAge}</div>
+                      <div><span className="font-bold">Name:</span> {flagDetail.seller.name}</div>
+                      <div><span className="font-bold">Rating:</span> {flagDetail.seller.rating}</div>
+                      <div><span className="font-bold">Total Sales:</span> {flagDetail.seller.totalSales}</div>
+                      <div><span className="font-bold">Account Age:</span> {flagDetail.seller.accountAge}</div>
                     </div>
                   </section>
                 )}
                
                 {/* Account Information */}
-                {selectedFlag.account && (
+                {flagDetail?.account && (
                   <section>
                     <h3 className="text-lg font-semibold text-blue-900 mb-1 border-l-4 border-blue-400 pl-2">Account Information</h3>
                     <div className="bg-white rounded-lg border p-3 text-sm space-y-1 shadow-sm">
-                      <div><span className="font-bold">Username:</span> {selectedFlag.account.username}</div>
-                      <div><span className="font-bold">Last Login:</span> {selectedFlag.account.lastLogin}</div>
-                      <div><span className="font-bold">Location:</span> {selectedFlag.account.location}</div>
+                      <div><span className="font-bold">Username:</span> {flagDetail.account.username}</div>
+                      <div><span className="font-bold">Last Login:</span> {flagDetail.account.lastLogin}</div>
+                      <div><span className="font-bold">Location:</span> {flagDetail.account.location}</div>
                     </div>
                   </section>
                 )}
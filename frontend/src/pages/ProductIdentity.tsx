@@ -1,4 +1,4 @@
-import React, { useState, ChangeEvent, useEffect, useCallback } from 'react';
+import React, { useState, ChangeEvent, useCallback } from 'react';
 import { FaSearch, FaGlobe, FaEnvelope, FaQuestionCircle, FaTimesCircle, FaCheckCircle, FaExclamationTriangle, FaShieldAlt } from 'react-icons/fa';
 import { FiMenu } from 'react-icons/fi';
 import Image from 'next/image';
@@ -63,6 +63,25 @@ interface ListedProduct {
   status: string;
 }
 
+// Search results come back as summaries; the full document is loaded from /products/{id}
+interface ListedProductSummary {
+  id: string;
+  listing_data: {
+    brandName: string;
+    productTitle: string;
+    price: number;
+    category: string;
+    condition: string;
+    mainImage?: string;
+  };
+  monitoring_result?: {
+    overall_risk_score: number;
+    risk_level: string;
+  };
+  created_at: string;
+  status: string;
+}
+
 // Define a type for your product structure including dynamic AI result
 interface Product {
   title: string;
@@ -382,30 +401,51 @@ const ProductIdentity = () => {
   const API_URL = `${process.env.NEXT_PUBLIC_BACKEND_URL}/predict_authenticity/`;
   const LISTING_API_URL = process.env.NEXT_PUBLIC_BACKEND_URL || '';
 
-  // State for listed products
-  const [listedProducts, setListedProducts] = useState<ListedProduct[]>([]);
-  const [searchResults, setSearchResults] = useState<ListedProduct[]>([]);
+  // Keyword search results, one page at a time
+  const [searchResults, setSearchResults] = useState<ListedProductSummary[]>([]);
+  const [searchCursor, setSearchCursor] = useState<string | null>(null);
+  const [searchKeyword, setSearchKeyword] = useState(''); // Keyword the current results were fetched for
 
-  // Fetch listed products on component mount
-  const fetchListedProducts = useCallback(async () => {
+  // Relative image paths (uploaded images) are served by the backend
+  const listingImageUrl = (src?: string) =>
+    !src ? 'https://via.placeholder.com/150' : src.startsWith('/') ? `${LISTING_API_URL}${src}` : src;
+
+  const fetchSearchPage = useCallback(async (keyword: string, cursor: string | null) => {
+    const params = new URLSearchParams({ keyword, limit: '20' });
+    if (cursor) params.set('cursor', cursor);
     try {
-      const response = await fetch(`${LISTING_API_URL}/products/search`);
+      const response = await fetch(`${LISTING_API_URL}/products/search?${params}`);
       if (response.ok) {
         const data = await response.json();
-        setListedProducts(data.products || []);
+        setSearchResults(previous => cursor ? [...previous, ...(data.products || [])] : (data.products || []));
+        setSearchCursor(data.next_cursor || null);
       } else {
-        console.error('Failed to fetch listed products:', response.status);
-        setListedProducts([]);
+        console.error('Search failed:', response.status);
+        if (!cursor) setSearchResults([]);
+        setSearchCursor(null);
       }
     } catch (error) {
-      console.error('Error fetching listed products:', error);
-      setListedProducts([]);
+      console.error('Error searching products:', error);
+      if (!cursor) setSearchResults([]);
+      setSearchCursor(null);
     }
   }, [LISTING_API_URL]);
 
-  useEffect(() => {
-    fetchListedProducts();
-  }, [fetchListedProducts]);
+  const openListedProduct = async (productId: string) => {
+    try {
+      const response = await fetch(`${LISTING_API_URL}/products/${productId}`);
+      if (!response.ok) {
+        console.error('Failed to load product:', response.status);
+        return;
+      }
+      setModalListedProduct(await response.json());
+      setModalProduct(null);
+      setModalAIResult(null);
+      setModalOpen(true);
+    } catch (error) {
+      console.error('Error loading product:', error);
+    }
+  };
 
   const handleImageChange = (e: ChangeEvent<HTMLInputElement>) => {
     if (e.target.files && e.target.files[0]) {
@@ -421,20 +461,8 @@ const ProductIdentity = () => {
   // Handle search submit for Keywords tab (search listed products)
   const handleKeywordSearchSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
-    
-    try {
-      const response = await fetch(`${LISTING_API_URL}/products/search?keyword=${encodeURIComponent(search)}`);
-      if (response.ok) {
-        const data = await response.json();
-        setSearchResults(data.products || []);
-      } else {
-        console.error('Search failed:', response.status);
-        setSearchResults([]);
-      }
-    } catch (error) {
-      console.error('Error searching products:', error);
-      setSearchResults([]);
-    }
+    setSearchKeyword(search);
+    await fetchSearchPage(search, null);
   };
 
   // Handle submit for Product Image tab (new AI integration)
@@ -672,7 +700,7 @@ const ProductIdentity = () => {
                   searchResults.map((product, idx) => (
                     <div key={idx} className="py-4 md:py-6 flex flex-col gap-2">
                       <div className="flex flex-col md:flex-row md:items-start md:gap-4">
-                        <Image src={product.listing_data.mainImage || 'https://via.placeholder.com/150'} alt={product.listing_data.productTitle} className="w-24 h-24 object-contain rounded border self-center md:self-start" width={96} height={96} />
+                        <Image src={listingImageUrl(product.listing_data.mainImage)} alt={product.listing_data.productTitle} className="w-24 h-24 object-contain rounded border self-center md:self-start" width={96} height={96} />
                         <div className="flex-1 mt-2 md:mt-0">
                           <a href="#" className="text-primary font-semibold hover:underline text-base">{product.listing_data.productTitle}</a>
                           <div className="text-xs text-text_secondary mt-1">Brand: {product.listing_data.brandName}</div>
@@ -699,12 +727,7 @@ const ProductIdentity = () => {
                           </span>
                           <button 
                             className="text-xs text-primary underline mt-2" 
-                            onClick={() => { 
-                              setModalListedProduct(product); 
-                              setModalProduct(null);
-                              setModalAIResult(null);
-                              setModalOpen(true); 
-                            }}
+                            onClick={() => openListedProduct(product.id)}
                           >
                             View Details
                           </button>
@@ -718,6 +741,16 @@ const ProductIdentity = () => {
                   </div>
                 )}
               </div>
+              {searchCursor && (
+                <div className="pt-4 text-center">
+                  <button
+                    className="border border-primary text-primary px-6 py-2 rounded font-semibold"
+                    onClick={() => fetchSearchPage(searchKeyword, searchCursor)}
+                  >
+                    Load more
+                  </button>
+                </div>
+              )}
             </div>
           </section>
         )}
@@ -371,7 +371,8 @@ const ProductListing = () => {
         },
         body: JSON.stringify({
           listing_data: productData,
-          seller_id: 'seller_123' // In real app, get from auth
+          seller_id: 'seller_123', // In real app, get from auth
+          product_id: productId // Lets the backend reuse step analyses from this session
         }),
       });
 